@@ -5,6 +5,8 @@ import numpy as np
 
 # IMPORTS FROM TOOL
 from src.functions.parallel_ct_SS import parallel_ct_SS,ct_SS
+from src.functions.monte_carlo import validate
+from src.functions.monte_carlo_ct_SS import monte_carlo_ct_SS
 
 # ========================= Parameters =========================
 if __name__ == '__main__':
@@ -82,3 +84,6 @@ if __name__ == '__main__':
         print("Results dictionary is empty.")
     else:
         print(result)
+
+        # regression check: simulate the system and compare with the certified confidence
+        validate(monte_carlo_ct_SS, fixed_params, result, trajectories=100_000, seed=0)
@@ -6,7 +6,7 @@ PYTHON_DIR="Table 3 - Parallel Runs"
 OUTPUT_FILE="Table3.csv"
 
 # Initialize the output file with headers
-echo "File,b_degree,Gamma,Lambda,c,Confidence,Execution Time (seconds)" > $OUTPUT_FILE
+echo "File,b_degree,Gamma,Lambda,c,Confidence,Execution Time (seconds),Simulated Safety,Simulation Consistent" > $OUTPUT_FILE
 
 # Loop over each Python file in the specified directory
 for pyfile in "$PYTHON_DIR"/*.py; do
@@ -30,6 +30,9 @@ for pyfile in "$PYTHON_DIR"/*.py; do
     lambda=$(echo "$output" | grep -oP "(?<='lambda': )\S+" || echo "N/A")
     c=$(echo "$output" | grep -oP "(?<='c': )\S+" || echo "N/A")
     confidence=$(echo "$output" | grep -oP "(?<='confidence': )\S+" || echo "N/A")
+    # Monte Carlo regression check printed by the ct_SS examples (see monte_carlo.validate)
+    simulated=$(echo "$output" | grep -oP "(?<=monte carlo: safety )\S+" || echo "N/A")
+    consistent=$(echo "$output" | grep -oP "(?<=consistent: )\S+" || echo "N/A")
     
     # Remove any trailing '}' from lambda or execution time if they exist
     lambda=$(echo "$lambda" | sed 's/}$//')
@@ -45,11 +48,12 @@ for pyfile in "$PYTHON_DIR"/*.py; do
     echo "c: $c"
     echo "Confidence: $confidence"
     echo "Execution Time: $execution_time seconds"
+    echo "Simulated Safety: $simulated (consistent: $consistent)"
     echo "-----------------------------"
     
     
     # Append the results to the CSV file
-    echo "\"$filename\",\"$b_degree\",\"$gamma\",\"$lambda\",\"$c\",\"$confidence\",\"$execution_time\"" >> $OUTPUT_FILE
+    echo "\"$filename\",\"$b_degree\",\"$gamma\",\"$lambda\",\"$c\",\"$confidence\",\"$execution_time\",\"$simulated\",\"$consistent\"" >> $OUTPUT_FILE
 done
 
 echo "Sorting Rows to Match Paper..."
@@ -0,0 +1,67 @@
+# IMPORTS FROM INSTALLS
+import sys
+import time
+import sympy as sp
+import numpy as np
+from SumOfSquares import poly_variable
+
+# IMPORTS FROM TOOL
+from src.functions.moment_substitution import expected_composition, legacy_substitute_moments
+from src.functions.noise_moments import noise_moment_table
+
+# ========================= Models =========================
+
+
+def room_temp_3d():
+    x = sp.symbols('x0:3')
+    varsigma = sp.symbols('varsigma0:3')
+    T_e, alpha_e, alpha, tau = 10, 8e-3, 6.2e-3, 5
+    f = np.array([(1 - tau * (alpha + alpha_e)) * x[0] + tau * alpha * x[1] + tau * alpha_e * T_e + varsigma[0],
+                  (1 - tau * (2 * alpha + alpha_e)) * x[1] + tau * alpha * (x[0] + x[2]) + tau * alpha_e * T_e + varsigma[1],
+                  (1 - tau * (alpha + alpha_e)) * x[2] + tau * alpha * x[1] + tau * alpha_e * T_e + varsigma[2]])
+    noise = {'noise_type': "normal", 'mean': np.zeros(3), 'sigma': np.array([0.01, 0.01, 0.01])}
+    return x, varsigma, f, noise
+
+
+def van_der_pol_2d():
+    x = sp.symbols('x1:3')
+    varsigma = sp.symbols('varsigma1:3')
+    f = np.array([x[0] + 0.1 * x[1] + varsigma[0],
+                  x[1] + (-x[0] + (1 - x[0] ** 2) * x[1]) * 0.1 + varsigma[1]])
+    noise = {'noise_type': "uniform", 'a': np.array([-0.02, -0.02]), 'b': np.array([0.02, 0.02])}
+    return x, varsigma, f, noise
+
+
+# ========================= Benchmark =========================
+
+def run(name, model, degree):
+    x, varsigma, f, noise = model()
+    Barrier = poly_variable('Barrier', x, degree)
+
+    start = time.time()
+    y = [sp.Dummy(f'y{i}') for i in range(len(x))]
+    BB = Barrier.subs([(x[i], y[i]) for i in range(len(x))])
+    BB = sp.expand(BB.subs([(y[i], f[i]) for i in range(len(y))]))
+    legacy = legacy_substitute_moments(BB, varsigma, **noise)
+    legacy_time = time.time() - start
+
+    start = time.time()
+    max_order = degree * max(sp.total_degree(fi, *varsigma) for fi in f)
+    moments = noise_moment_table(noise['noise_type'], len(varsigma), max_order, noise.get('mean'),
+                                 noise.get('sigma'), noise.get('rate'), noise.get('a'), noise.get('b'))
+    vectorized = expected_composition(Barrier, x, varsigma, f, moments)
+    vectorized_time = time.time() - start
+
+    gens = sorted(Barrier.free_symbols, key=str)
+    difference = sp.Poly(sp.expand(legacy - vectorized), *gens)
+    max_error = max([abs(float(c)) for c in difference.coeffs()] + [0.0])
+
+    print(f"{name}, degree {degree}: legacy {legacy_time:.3f}s, vectorized {vectorized_time:.3f}s, "
+          f"speedup {legacy_time / vectorized_time:.1f}x, max coefficient difference {max_error:.3e}")
+
+
+if __name__ == '__main__':
+    degrees = [int(d) for d in sys.argv[1:]] or [2, 4, 6]
+    for degree in degrees:
+        run("3D room temperature", room_temp_3d, degree)
+        run("2D Van der Pol", van_der_pol_2d, degree)
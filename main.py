@@ -23,10 +23,13 @@ def launch_app(auto_close=False):
     app = QApplication(sys.argv)
 
     model = BarrierToolModel(parallel=True)
+    app.aboutToQuit.connect(model.shutdown)
     view = BarrierToolView()
     presenter = BarrierToolPresenter(model, view)
 
     presenter.show()
+    # the engines and the worker pool load once the window is up
+    QTimer.singleShot(0, model.preload)
 
     # Auto-close if testing
     if auto_close or os.getenv("AUTO_CLOSE_GUI") == "1":
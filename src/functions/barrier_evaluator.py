@@ -0,0 +1,167 @@
+# IMPORTS FROM INSTALLS
+import numpy as np
+import sympy as sp
+
+# IMPORTS FROM TOOL
+from src.functions.moment_substitution import expected_composition
+from src.functions.noise_moments import noise_moment_table
+from src.functions.sparse_polynomial import monomial_generator, polynomial_add, polynomial_from_expr
+from src.utils.system_mode import SystemMode
+
+# entries of the (terms, states) monomial matrix evaluated at once; bounds the memory of a call
+BATCH_ENTRIES = 1 << 22
+
+
+class PolynomialEvaluator:
+    '''
+    One or more polynomials in dim variables compiled for evaluation on batches
+    of states: an integer exponent matrix of shape (terms, dim) shared by all of
+    them and a coefficient matrix of shape (terms, outputs). The powers x_i^k of
+    every batch are computed once, by repeated multiplication, and every
+    monomial is a product of cached powers; the polynomials are then a single
+    matrix product. Evaluators hold numpy arrays only and can be pickled to
+    workers.
+    '''
+
+    def __init__(self, exponents, coefficients, scalar=True):
+        self.exponents = np.asarray(exponents, dtype=np.int64)
+        self.coefficients = np.asarray(coefficients, dtype=np.double).reshape(len(self.exponents), -1)
+        self.scalar = scalar and self.coefficients.shape[1] == 1
+        self.dim = self.exponents.shape[1]
+        # variables that appear in some monomial, with their highest power
+        self._columns = np.flatnonzero(self.exponents.any(axis=0))
+        self._max_powers = self.exponents.max(axis=0) if len(self.exponents) else np.zeros(self.dim, dtype=np.int64)
+
+    @classmethod
+    def from_polynomials(cls, polynomials, dim, scalar=False):
+        '''Evaluator of a list of {exponent tuple: float} polynomials in dim variables'''
+        monomials = sorted(set().union(*(p.keys() for p in polynomials)))
+        row = {monom: k for k, monom in enumerate(monomials)}
+        coefficients = np.zeros((len(monomials), len(polynomials)))
+        for j, poly in enumerate(polynomials):
+            for monom, coeff in poly.items():
+                coefficients[row[monom], j] = coeff
+        exponents = np.array(monomials, dtype=np.int64).reshape(-1, dim)
+        return cls(exponents, coefficients, scalar=scalar and len(polynomials) == 1)
+
+    @classmethod
+    def from_expr(cls, expr, x):
+        '''Evaluator of a sympy polynomial in x, or of a list of them (one output each)'''
+        if isinstance(expr, (list, tuple, np.ndarray)):
+            return cls.from_polynomials([polynomial_from_expr(e, x) for e in expr], len(x))
+        return cls.from_polynomials([polynomial_from_expr(expr, x)], len(x), scalar=True)
+
+    @property
+    def outputs(self):
+        return self.coefficients.shape[1]
+
+    @property
+    def degree(self):
+        return int(self.exponents.sum(axis=1).max()) if len(self.exponents) else 0
+
+    def polynomials(self):
+        '''The compiled polynomials as {exponent tuple: float} dictionaries'''
+        return [{tuple(int(e) for e in monom): float(c) for monom, c in zip(self.exponents, column) if c != 0}
+                for column in self.coefficients.T]
+
+    def __call__(self, states):
+        '''
+        Values at STATES, an array of shape (n, dim) or a single state of shape
+        (dim,). Returns shape (n,) for a single polynomial, (n, outputs) otherwise,
+        without the first axis for a single state.
+        '''
+        states = np.asarray(states, dtype=np.double)
+        single = states.ndim == 1
+        states = states.reshape(-1, self.dim)
+        values = np.empty((len(states), self.outputs))
+        batch = max(1, BATCH_ENTRIES // max(len(self.exponents), 1))
+        for start in range(0, len(states), batch):
+            values[start:start + batch] = self._evaluate(states[start:start + batch])
+        if self.scalar:
+            values = values[:, 0]
+        return values[0] if single else values
+
+    def _evaluate(self, states):
+        monomials = np.ones((len(self.exponents), len(states)))
+        for i in self._columns:
+            # powers[k] = x_i^k for the batch
+            powers = np.empty((self._max_powers[i] + 1, len(states)))
+            powers[0] = 1.0
+            for k in range(1, len(powers)):
+                np.multiply(powers[k - 1], states[:, i], out=powers[k])
+            monomials *= powers[self.exponents[:, i]]
+        return monomials.T @ self.coefficients
+
+    def derivative(self, i):
+        '''Evaluator of the partial derivatives of the polynomials in variable i'''
+        exponents = self.exponents.copy()
+        scale = exponents[:, i].astype(np.double)
+        exponents[:, i] = np.maximum(exponents[:, i] - 1, 0)
+        return PolynomialEvaluator(exponents, self.coefficients * scale[:, None], scalar=self.scalar)
+
+    def gradient(self):
+        '''Evaluator of the gradient of a single polynomial, shape (n, dim)'''
+        if self.outputs != 1:
+            raise ValueError("the gradient needs a single polynomial")
+        return PolynomialEvaluator.from_polynomials(
+            [self.derivative(i).polynomials()[0] for i in range(self.dim)], self.dim)
+
+    def __getstate__(self):
+        return {"exponents": self.exponents, "coefficients": self.coefficients, "scalar": self.scalar}
+
+    def __setstate__(self, state):
+        self.__init__(state["exponents"], state["coefficients"], state["scalar"])
+
+
+def barrier_evaluator(result, x):
+    '''
+    =========================================
+    Compile the barrier of an engine result for evaluation on batches of states
+    =========================================
+    result = result of dt_DS, ct_DS, dt_SS or ct_SS (or of their parallel functions) holding "barrier"
+    x = list of sympy variables
+    '''
+    if "barrier" not in result:
+        raise ValueError(f"result has no barrier: {result.get('error')}")
+    return PolynomialEvaluator.from_expr(result["barrier"], x)
+
+
+def drift_evaluator(mode, barrier, x, f, varsigma=None, noise_type="normal", mean=None, sigma=None, rate=None,
+                    a=None, b=None, delta=None, rho=None, p_rate=None):
+    '''
+    =========================================
+    Compile the quantity the dynamics condition of a mode bounds
+    =========================================
+    mode = SystemMode (or its value) of the certificate
+    barrier = sympy polynomial in x, or its PolynomialEvaluator
+    x = list of sympy variables
+    f = numpy array of dynamics functions
+    varsigma, noise_type, mean, sigma, rate, a, b = noise of a dt_SS system, as in dt_SS
+    delta, rho, p_rate = diffusion, jump sizes and jump rates of a ct_SS system, as in ct_SS
+
+    The compiled polynomial is, per mode,
+        discrete_deterministic:   B(f(x)) - B(x)            (certified <= 0)
+        discrete_stochastic:      E[B(f(x, varsigma))] - B(x) (certified <= c)
+        continuous_deterministic: dB/dx . f(x)              (certified <= 0)
+        continuous_stochastic:    generator of B            (certified <= c)
+    on the state set.
+    '''
+    mode = SystemMode(getattr(mode, "value", mode))
+    dim = len(x)
+    poly = barrier.polynomials()[0] if isinstance(barrier, PolynomialEvaluator) else polynomial_from_expr(barrier, x)
+
+    if mode.is_discrete():
+        varsigma = list(varsigma or [])
+        b_degree = max((sum(monom) for monom in poly), default=0)
+        max_order = b_degree * max((sp.total_degree(fi, *varsigma) for fi in f), default=0) if varsigma else 0
+        moments = noise_moment_table(noise_type, len(varsigma), max_order, mean, sigma, rate, a, b)
+        B = sp.Add(*[sp.Float(c) * sp.Mul(*[xi ** e for xi, e in zip(x, monom)]) for monom, c in poly.items()])
+        composed = polynomial_from_expr(expected_composition(B, x, varsigma, f, moments), x)
+        return PolynomialEvaluator.from_polynomials([polynomial_add(composed, poly, -1.0)], dim, scalar=True)
+
+    # Lie derivative, plus the Brownian and Poisson terms for ct_SS, monomial by monomial
+    generator = monomial_generator(x, f, delta, rho, p_rate) if mode.is_stochastic() else monomial_generator(x, f)
+    drift = {}
+    for monom, coeff in poly.items():
+        drift = polynomial_add(drift, generator(monom), coeff)
+    return PolynomialEvaluator.from_polynomials([drift], dim, scalar=True)
@@ -0,0 +1,139 @@
+# IMPORTS FROM INSTALLS
+import itertools
+
+import numpy as np
+import sympy as sp
+import picos
+from scipy.optimize import linprog
+from SumOfSquares import Basis, SOSConstraint
+
+# IMPORTS FROM TOOL
+from .sparse_polynomial import monomial_basis
+
+BASIS_REDUCTIONS = (None, "newton", "diagonal")
+
+
+def reduce_basis(support, degree, basis_reduction="newton"):
+    '''
+    =========================================
+    Gram basis of a polynomial with the given support, with unusable monomials pruned
+    =========================================
+    support = integer array (terms, dim) of the exponents that can have a nonzero coefficient
+    degree = total degree of the polynomial (even)
+    basis_reduction = None (full basis), "newton" (Newton polytope) or
+                      "diagonal" (Newton polytope followed by the diagonal-consistency iteration)
+
+    Returns an integer numpy array of shape (monomials, dim), graded by degree.
+    '''
+    if basis_reduction not in BASIS_REDUCTIONS:
+        raise ValueError(f"Unrecognised basis reduction: {basis_reduction}")
+
+    support = np.asarray(support, dtype=np.int64)
+    basis = monomial_basis(support.shape[1], degree // 2)
+    if basis_reduction is None or len(support) == 0:
+        return basis
+
+    basis = basis[[_in_newton_polytope(2 * alpha, support) for alpha in basis]]
+    if basis_reduction == "diagonal":
+        basis = _diagonal_consistency(basis, support)
+    return basis
+
+
+def _in_newton_polytope(point, support):
+    '''Whether point lies in the convex hull of the support (half of it holds a Gram basis monomial)'''
+    if np.any(np.all(support == point, axis=1)):
+        return True
+
+    # cheap bounding box and total degree checks before the LP
+    if np.any(point < support.min(axis=0)) or np.any(point > support.max(axis=0)):
+        return False
+    degrees = support.sum(axis=1)
+    if not degrees.min() <= point.sum() <= degrees.max():
+        return False
+
+    # point = support^T weights with weights >= 0 summing to one
+    A_eq = np.vstack([support.T, np.ones(len(support))])
+    b_eq = np.append(point, 1.0)
+    lp = linprog(np.zeros(len(support)), A_eq=A_eq, b_eq=b_eq, bounds=(0, None), method="highs")
+    return lp.status == 0
+
+
+def _diagonal_consistency(basis, support):
+    '''
+    Repeatedly drop monomials alpha whose square 2*alpha is neither in the
+    support nor a product of two other basis monomials: the diagonal Gram
+    entry of alpha is then forced to zero, hence so is its whole row.
+    '''
+    support_set = set(map(tuple, support.tolist()))
+    keep = np.ones(len(basis), dtype=bool)
+    changed = True
+    while changed:
+        changed = False
+        current = basis[keep]
+        rows, cols = np.triu_indices(len(current), 1)
+        cross = set(map(tuple, (current[rows] + current[cols]).tolist()))
+        for i in np.flatnonzero(keep):
+            square = tuple((2 * basis[i]).tolist())
+            if square not in support_set and square not in cross:
+                keep[i] = False
+                changed = True
+    return basis[keep]
+
+
+def add_sos_constraint(prob, expr, variables, basis_reduction=None, name=''):
+    '''
+    =========================================
+    SOSProblem.add_sos_constraint with a reduced Gram basis
+    =========================================
+    prob = SOSProblem
+    expr = sympy expression constrained to be a sum of squares in variables
+    variables = list of sympy variables
+    basis_reduction = None, "newton" or "diagonal" (see reduce_basis)
+    name = optional name of the Gram matrix variable
+
+    "newton" is the Newton polytope reduction of SumOfSquares (sparse=True);
+    "diagonal" prunes its basis further with the diagonal-consistency iteration.
+    SumOfSquares ignores the coefficients that no product of two basis
+    monomials produces, so they are constrained to vanish here.
+    Returns the SOSConstraint and the (full, reduced) Gram matrix sizes.
+    '''
+    variables = sorted(variables, key=str)  # lex order, as SumOfSquares
+    poly = sp.poly(expr, variables)
+    deg = poly.total_degree()
+    full_size = len(monomial_basis(len(variables), deg // 2))
+    if basis_reduction is None:
+        constraint = prob.add_sos_constraint(expr, variables, name=name)
+        return constraint, (full_size, full_size)
+    if basis_reduction not in BASIS_REDUCTIONS:
+        raise ValueError(f"Unrecognised basis reduction: {basis_reduction}")
+
+    if basis_reduction == "newton":
+        constraint = prob.add_sos_constraint(expr, variables, name=name, sparse=True)
+    else:
+        assert deg % 2 == 0, 'Polynomial degree must be even!'
+        newton = np.array(Basis.from_poly_lex(poly, sparse=True).monoms, dtype=np.int64)
+        basis = Basis([tuple(m) for m in _diagonal_consistency(newton, np.array(poly.monoms())).tolist()])
+        constraint = _add_gram_constraint(prob, poly, basis, variables, deg, name)
+
+    # coefficients that only pruned monomials could produce have to vanish
+    for mono, coeff in zip(poly.monoms(), poly.coeffs()):
+        if mono in constraint.basis.sos_sym_entries:
+            continue
+        if coeff.is_number:
+            raise AssertionError('Polynomial is not representable in the reduced basis!')
+        prob.add_constraint(prob.sp_to_picos(coeff) == 0)
+    return constraint, (full_size, len(constraint.basis))
+
+
+def _add_gram_constraint(prob, poly, basis, variables, deg, name=''):
+    '''The Gram matrix constraint of SOSProblem.add_sos_constraint, in a given basis'''
+    if not name:
+        # a prefix of its own, since SumOfSquares numbers its Gram matrices _Q1, _Q2, ...
+        name = next(f"_R{k}" for k in itertools.count(1) if f"_R{k}" not in prob.mutables)
+    coefficients = dict(zip(poly.monoms(), poly.coeffs()))
+    Q = picos.SymmetricVariable(name, len(basis))
+    for mono, pairs in basis.sos_sym_entries.items():
+        coeff = prob.sp_to_picos(coefficients[mono]) if mono in coefficients else 0
+        prob.add_constraint(sum(Q[i, j] for i, j in pairs) == coeff)
+    pic_const = prob.add_constraint(Q >> 0)
+    return SOSConstraint(pic_const, Q, basis, variables, deg)
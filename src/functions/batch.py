@@ -0,0 +1,182 @@
+# IMPORTS FROM INSTALLS
+import argparse
+import importlib
+import os
+import time
+
+# IMPORTS FROM TOOL
+from src.functions.degree_scheduler import Job, RowWriter, completed_jobs
+from src.functions.problem_size import estimate_problem_size, dynamics_degree
+from src.functions.timings import PHASES
+from src.utils.config import load_config
+from src.utils.system_mode import SystemMode
+
+# engine module of every mode, imported when a batch runs rather than with this module
+ENGINES = {SystemMode.DT_DS: "src.functions.dt_DS", SystemMode.CT_DS: "src.functions.ct_DS",
+           SystemMode.DT_SS: "src.functions.dt_SS", SystemMode.CT_SS: "src.functions.ct_SS"}
+
+BATCH_FIELDS = ["config", "mode", "b_degree", "status", "gamma", "lambda", "c", "confidence",
+                "load_seconds", "solve_seconds", *(phase + "_seconds" for phase in PHASES), "peak_memory", "error",
+                "barrier"]
+
+
+def config_paths(paths):
+    '''Configuration files named by PATHS, with directories expanded to their (sorted) files'''
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if os.path.isfile(os.path.join(path, name)) and not name.startswith("."))
+        else:
+            files.append(path)
+    return files
+
+
+def _batch_job(config, mode, engine, b_degree, parameters, load_seconds, timings=True):
+    '''Run one configuration at one degree in a worker and flatten the result into a row'''
+    row = {"config": config, "mode": mode, "b_degree": b_degree, "load_seconds": load_seconds}
+    start = time.perf_counter()
+    try:
+        result = engine(**dict(parameters, b_degree=b_degree), timings=timings)
+    except Exception as exc:
+        result = {"status": "failed", "error": f"{type(exc).__name__}: {exc}"}
+    result = result if result is not None else {"error": "no result"}
+    row["solve_seconds"] = round(time.perf_counter() - start, 3)
+
+    row["status"] = result.get("status", "ok" if "barrier" in result else "infeasible")
+    for key in ("gamma", "lambda", "c", "confidence"):
+        if result.get(key) is not None:
+            row[key] = float(result[key])
+    if result.get("peak_memory") is not None:
+        row["peak_memory"] = result["peak_memory"]
+    if result.get("error") is not None:
+        row["error"] = str(result["error"])
+    if "barrier" in result:
+        row["barrier"] = str(result["barrier"])
+    for phase, seconds in result.get("timings", {}).items():
+        if phase in PHASES:
+            row[phase + "_seconds"] = seconds
+    return row
+
+
+def load_engine(mode):
+    '''Engine function of MODE, named after its module (e.g. dt_DS)'''
+    module = ENGINES[mode]
+    return getattr(importlib.import_module(module), module.rsplit(".", 1)[1])
+
+
+def _failed_row(config, exc, **fields):
+    return {"config": config, **fields, "status": "failed", "error": f"{type(exc).__name__}: {exc}"}
+
+
+def run_batch(paths, all_degrees=False, overrides=None, output=None, memory_budget=None, max_workers=None,
+              timings=True):
+    '''
+    =========================================
+    Run GUI configuration files headlessly over a process pool
+    =========================================
+    paths = configuration files exported by the GUI, or directories of them (e.g. ex/GUI_config_files)
+    all_degrees = solve every even degree up to the configured b_degree, as the GUI's parallel mode
+                  does, instead of the configured degree only
+    overrides = parameters replacing those of every configuration (e.g. {"solver": "cvxopt"})
+    output = .csv or .jsonl file the rows are streamed to as they finish (None: no file)
+    memory_budget = bytes of estimated peak memory the running jobs may use together (None: the memory
+                    available, see completed_jobs)
+    max_workers = size of a dedicated pool (None: the shared worker pool, see worker_pool)
+    timings = add the seconds per engine phase to the rows (see timings); timed runs skip the result cache
+
+    Every (configuration, degree) is one job; all jobs of all files share the
+    pool, so the worker budget is global. Returns the rows in order of
+    completion, with status "ok" (barrier found), "infeasible" or "failed".
+    '''
+    rows, jobs = [], []
+    for path in config_paths(paths):
+        config = os.path.basename(path)
+        start = time.perf_counter()
+        try:
+            mode, parameters = load_config(path)
+        except Exception as exc:
+            # an unreadable file is reported, not fatal to the batch
+            rows.append(_failed_row(config, exc))
+            continue
+        load_seconds = round(time.perf_counter() - start, 3)
+        parameters.update(overrides or {})
+
+        b_degree = parameters["b_degree"]
+        degrees = list(range(2, b_degree + 1, 2)) if all_degrees and b_degree >= 2 else [b_degree]
+        discrete, stochastic = mode.is_discrete(), mode.is_stochastic()
+        for degree in degrees:
+            memory = estimate_problem_size(parameters["dim"], degree, parameters.get("l_degree"),
+                                           len(parameters["L_unsafe"]),
+                                           dynamics_degree(parameters["x"], parameters["f"], degree, discrete),
+                                           stochastic, parameters.get("backend", "picos"))["memory"]
+            jobs.append(Job(len(jobs), _batch_job, (config, mode.value, load_engine(mode), degree, parameters,
+                                                    load_seconds, timings), {}, memory))
+
+    writer = RowWriter(output, BATCH_FIELDS) if output is not None else None
+    try:
+        for row in rows:
+            if writer is not None:
+                writer.write(row)
+        for job, future in completed_jobs(jobs, memory_budget, max_workers):
+            try:
+                row = future.result()
+            except Exception as exc:
+                # the worker itself died (e.g. killed)
+                config, mode, _, b_degree = job.args[:4]
+                row = _failed_row(config, exc, mode=mode, b_degree=b_degree)
+            rows.append(row)
+            if writer is not None:
+                writer.write(row)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return rows
+
+
+def format_table(rows):
+    '''Plain-text table of the rows, sorted by configuration and degree'''
+    columns = ["config", "b_degree", "status", "gamma", "lambda", "c", "confidence", "load_seconds",
+               "solve_seconds"]
+    cells = [columns] + [[_cell(row.get(column)) for column in columns]
+                         for row in sorted(rows, key=lambda row: (row["config"], row.get("b_degree") or 0))]
+    widths = [max(len(line[i]) for line in cells) for i in range(len(columns))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(line, widths)) for line in cells)
+
+
+def _cell(value):
+    if value is None:
+        return "-"
+    return f"{value:.6g}" if isinstance(value, float) else str(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.functions.batch",
+        description="Run configuration files exported by the GUI without the GUI, concurrently.")
+    parser.add_argument("paths", nargs="+", help="configuration files or directories of them "
+                                                 "(e.g. ex/GUI_config_files)")
+    parser.add_argument("--all-degrees", action="store_true",
+                        help="solve every even degree up to b_degree, as the GUI's parallel mode")
+    parser.add_argument("--output", help=".csv or .jsonl file for the rows")
+    parser.add_argument("--memory-budget", type=float,
+                        help="MiB of estimated memory for the running jobs (default: the memory available)")
+    parser.add_argument("--workers", type=int, help="number of worker processes")
+    parser.add_argument("--solver", choices=("mosek", "cvxopt"), help="override the configured solver")
+    parser.add_argument("--backend", choices=("picos", "sparse"), help="override the modelling backend")
+    parser.add_argument("--no-timings", action="store_true",
+                        help="leave out the per-phase timings, so that cached results can be reused")
+    args = parser.parse_args(argv)
+
+    overrides = {name: value for name, value in (("solver", args.solver), ("backend", args.backend)) if value}
+    memory_budget = args.memory_budget * 2 ** 20 if args.memory_budget is not None else None
+    rows = run_batch(args.paths, args.all_degrees, overrides, args.output, memory_budget, args.workers,
+                     not args.no_timings)
+
+    print(format_table(rows))
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# IMPORTS FROM INSTALLS
+import contextvars
+import functools
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# error reported for a computation stopped by its cancellation token
+CANCELLED_ERROR = "cancelled"
+
+_token = contextvars.ContextVar("cancel_token", default=None)
+
+
+class Cancelled(Exception):
+    '''Raised at a phase boundary of an engine whose token was cancelled'''
+
+
+class CancellationToken:
+    '''
+    Flag through which the GUI model stops a computation. cancel() sets it and
+    runs the callbacks registered with on_cancel (e.g. cancelling the future of
+    a worker, which pebble terminates); the engines running in this process stop
+    at their next phase boundary. A token does not cross process boundaries:
+    workers are stopped by terminating them.
+    '''
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as exc:
+                logger.debug(f"Cancellation callback failed: {exc}")
+
+    def on_cancel(self, callback):
+        '''Run CALLBACK on cancel(), or now if the token is already cancelled'''
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def wait(self, timeout=None):
+        '''Block until the token is cancelled or TIMEOUT seconds passed; returns whether it is cancelled'''
+        return self._event.wait(timeout)
+
+
+def checkpoint():
+    '''Raise Cancelled if the token of the running engine was cancelled (see cancellable)'''
+    token = _token.get()
+    if token is not None and token.cancelled:
+        raise Cancelled
+
+
+def cancellable(engine):
+    '''
+    Let an engine be stopped cooperatively. The engine gains a keyword argument
+    cancel_token (a CancellationToken); once it is cancelled, the engine stops at
+    its next phase boundary (see phases.phase) and returns
+    {"error": "cancelled", "b_degree": ...}. A solver call that is running is not
+    interrupted; run the engine in a worker to stop it at once.
+    '''
+
+    @functools.wraps(engine)
+    def wrapper(*args, cancel_token=None, **kwargs):
+        if cancel_token is None:
+            return engine(*args, **kwargs)
+
+        token = _token.set(cancel_token)
+        try:
+            checkpoint()
+            return engine(*args, **kwargs)
+        except Cancelled:
+            b_degree = args[0] if args else kwargs.get("b_degree")
+            logger.info(f"{engine.__name__} of degree {b_degree} cancelled")
+            return {"error": CANCELLED_ERROR, "b_degree": b_degree}
+        finally:
+            _token.reset(token)
+
+    return wrapper
@@ -0,0 +1,58 @@
+# IMPORTS FROM INSTALLS
+import numpy as np
+import sympy as sp
+
+
+def interaction_graph(x, f):
+    '''
+    =========================================
+    Variable interaction graph of the dynamics (correlative sparsity pattern)
+    =========================================
+    x = list of sympy variables
+    f = numpy array of dynamics functions
+
+    x_i is linked to every variable of f_i, and those variables to each other,
+    so that each term dB/dx_i * f_i (or B(f)) fits in one clique.
+    Returns a symmetric boolean adjacency matrix.
+    '''
+    dim = len(x)
+    index = {xi: i for i, xi in enumerate(x)}
+    adjacency = np.zeros((dim, dim), dtype=bool)
+    for i, fi in enumerate(f):
+        group = [i] + [index[s] for s in sp.sympify(fi).free_symbols if s in index]
+        adjacency[np.ix_(group, group)] = True
+    np.fill_diagonal(adjacency, False)
+    return adjacency
+
+
+def chordal_cliques(adjacency):
+    '''
+    =========================================
+    Maximal cliques of a chordal extension of a graph
+    =========================================
+    adjacency = symmetric boolean adjacency matrix
+
+    The extension is built by greedy minimum-degree elimination; each
+    eliminated vertex with its remaining neighbours forms a clique of the
+    filled graph. Returns the maximal ones as sorted lists of vertices.
+    '''
+    dim = len(adjacency)
+    neighbours = [set(np.flatnonzero(adjacency[i])) for i in range(dim)]
+    remaining = set(range(dim))
+    cliques = []
+    while remaining:
+        v = min(remaining, key=lambda u: (len(neighbours[u] & remaining), u))
+        later = neighbours[v] & remaining - {v}
+        cliques.append(frozenset(later | {v}))
+        # fill-in: the remaining neighbours of v become pairwise adjacent
+        for u in later:
+            neighbours[u] |= later - {u}
+        remaining.remove(v)
+
+    maximal = [c for c in cliques if not any(c < other for other in cliques)]
+    return [sorted(c) for c in dict.fromkeys(maximal)]
+
+
+def correlative_cliques(x, f):
+    '''Cliques of the chordal extension of the interaction graph of f (see interaction_graph)'''
+    return chordal_cliques(interaction_graph(x, f))
@@ -6,10 +6,25 @@ from SumOfSquares import *
 
 # IMPORTS FROM TOOL
 from .generate_polynomial import generate_polynomial
-
-
+from .basis_reduction import add_sos_constraint
+from .sparse_barrier import sparse_ct_SS
+from .result_cache import cached
+from .phases import phase
+from .timings import lap_picos_solve, timed
+from .memory_limit import memory_limited, out_of_memory
+from .cancellation import cancellable
+from .progress import reports_progress
+
+
+@reports_progress
+@cached
+@timed
+@memory_limited
+@cancellable
 def ct_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space, x, f, delta, rho,
-          p_rate, t, optimize=False, solver="mosek", confidence=None, gam=None, lam=None, c_val=None,l_degree=None):
+          p_rate, t, optimize=False, solver="mosek", confidence=None, gam=None, lam=None, c_val=None, l_degree=None,
+          backend="picos", basis_reduction=None,
+          relaxation="sos", warm_start=None, threads=None):
     '''
     =========================================
     Calculate the barrier for the continuous-time Stochastic System (ct_SS)
@@ -35,8 +50,26 @@ def ct_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_sp
     lam = chosen value for lambda
     c_val = chosen c value (multiplied by time horizon in confidence)
     l_degree = degree of lagrangian multipliers
+    backend = "picos" (SumOfSquares/picos modelling) or "sparse" (direct sparse SDP assembly)
+    basis_reduction = None, "newton" (Newton polytope) or "diagonal" (Newton polytope and diagonal consistency)
+    relaxation = "sos", "sdsos" (SOCP) or "dsos" (LP); the relaxations use the sparse backend with cvxopt
+    warm_start = solution of a lower degree (sparse backend with cvxopt) to start from; when given, even empty,
+                 the result returns its own solution under "warm_start" (see degree_ladder)
+    threads = number of MOSEK threads (None: MOSEK default); cvxopt uses the BLAS threads of the process
+    cache = reuse the stored result of an identical problem (see result_cache), False to bypass it
+    timings = True to return the seconds spent per phase under "timings" (see timings.PHASES)
+    timing_sink = callable receiving the timings of every call, e.g. timings.JsonlSink(path)
+    memory_limit = bytes the call may allocate (see memory_limit); the result records "peak_memory"
+    cancel_token = CancellationToken stopping the call at its next phase boundary (see cancellation)
+    progress = callable (or ProgressChannel queue) receiving the progress events of the call (see progress)
     '''
 
+    if backend == "sparse" or relaxation != "sos":
+        return sparse_ct_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space, x, f, delta,
+                            rho, p_rate, t, optimize=optimize, solver=solver, confidence=confidence, gam=gam,
+                            lam=lam, c_val=c_val, l_degree=l_degree, basis_reduction=basis_reduction,
+                            relaxation=relaxation, warm_start=warm_start, threads=threads)
+
     result = {}
     result['b_degree']=b_degree
 
@@ -66,6 +99,8 @@ def ct_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_sp
     # State set
     g = generate_polynomial(x, L_space, U_space)
 
+    phase("sets")
+
     # ========================= Initialization the sum of squares program =========================
 
     prob = SOSProblem()
@@ -157,6 +192,8 @@ def ct_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_sp
     except Exception:
         return {"error": "Gamma, Lambda, or c value definition issues", "b_degree":b_degree}
 
+    phase("multipliers")
+
     # ========================= Infinitesimal Generator =========================
 
     PartialDeriv1 = np.array([sp.diff(Barrier, xi) for xi in x])
@@ -170,19 +207,25 @@ def ct_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_sp
 
     Barrier_f = np.sum(PartialDeriv1 * f) + (1 / 2) * np.trace((np.transpose(delta) @ delta) * PartialDeriv2) + p
 
+    phase("generator")
+
     # ========================= Constraints =========================
+    gram_sizes = {}  # (full, reduced) Gram matrix size per constraint
     try:
         L0_times_g0 = [L * g for L, g in zip(L0, g0)]
-        first_condition = prob.add_sos_constraint(-Barrier - sum(L0_times_g0) + gamma, x)
+        first_condition, gram_sizes["initial"] = add_sos_constraint(prob, -Barrier - sum(L0_times_g0) + gamma, x,
+                                                                    basis_reduction)
 
         for i in range(avoid_regions):
             temp_L_times_g = [L * g for L, g in zip(L1[i], g1[i])]
-            second_condition = prob.add_sos_constraint(Barrier - sum(temp_L_times_g) - lambda_, x)
+            second_condition, gram_sizes["unsafe" + str(i + 1)] = add_sos_constraint(
+                prob, Barrier - sum(temp_L_times_g) - lambda_, x, basis_reduction)
 
         L_times_g = [L * g for L, g in zip(L, g)]
-        last_condition = prob.add_sos_constraint(-Barrier_f + c - sum(L_times_g), x)
+        last_condition, gram_sizes["dynamics"] = add_sos_constraint(prob, -Barrier_f + c - sum(L_times_g), x,
+                                                                    basis_reduction)
 
-        barrier_constraint = prob.add_sos_constraint(Barrier, x)
+        barrier_constraint, gram_sizes["barrier"] = add_sos_constraint(prob, Barrier, x, basis_reduction)
 
         # all lagrangians should be positive
         for i in L0:
@@ -201,13 +244,23 @@ def ct_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_sp
             return {"error": "Lambda_ is None", "b_degree":b_degree}
         prob.set_objective('min', (gv+cv*t)/lambda_)
 
+    phase("constraints")
+
     # ========================= Solve =========================
     try:
-        prob.solve(solver=solver)
+        if threads is not None and solver == "mosek":
+            prob.solve(solver=solver, mosek_params={"MSK_IPAR_NUM_THREADS": threads})
+        else:
+            prob.solve(solver=solver)
     except picos.modeling.problem.SolutionFailure:
         return {"error": "picos SolutionFailure", "b_degree":b_degree}
-    except Exception:
+    except Exception as exc:
+        if out_of_memory(exc):
+            # reported by memory_limited
+            raise MemoryError(str(exc)) from exc
         return {"error": "Solver Exception", "b_degree":b_degree}
+    finally:
+        lap_picos_solve(prob)
 
     # ========================= Results =========================
     #Check if expression is scalar
@@ -218,7 +271,11 @@ def ct_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_sp
     	result["barrier"] = sum(barrier_constraint.get_sos_decomp())
     else:
     	return {"error": "constraints are not sum of squares"}
+    phase("extraction")
     	
+    if basis_reduction is not None:
+        result["gram_sizes"] = gram_sizes
+
     if gam is None:
         result["gamma"] = float(gv)
     else:
@@ -0,0 +1,36 @@
+# IMPORTS FROM TOOL
+from .prescreen import prescreened
+
+
+def degree_ladder(engine, degrees, prescreen=None, target_confidence=None, **kwargs):
+    '''
+    =========================================
+    Solve increasing barrier degrees in sequence, each warm started from the last feasible one
+    =========================================
+    engine = dt_DS, ct_DS, dt_SS or ct_SS
+    degrees = increasing list of barrier degrees
+    prescreen = None, "dsos" or "sdsos" (see prescreened)
+    target_confidence = stop climbing once a barrier reaches this confidence (a deterministic
+                        barrier meets any target); None solves every degree
+    kwargs = remaining engine parameters
+
+    The Gram matrices, multipliers and barrier coefficients of a feasible degree-d
+    solution are embedded by monomial into the degree-(d+2) program as the initial
+    point of the interior-point method (sparse backend with cvxopt, see
+    SparseSOSProgram.solve); with other solvers the degrees are solved cold.
+    Returns the list of results of the degrees that were solved.
+    '''
+    results = []
+    warm_start = {}
+    for degree in degrees:
+        result = prescreened(engine, degree, prescreen, warm_start=warm_start, **kwargs)
+        if result is None:
+            continue
+        solution = result.pop("warm_start", None)
+        results.append(result)
+        if "barrier" not in result:
+            continue
+        warm_start = solution or warm_start
+        if target_confidence is not None and result.get("confidence", 1.0) >= target_confidence:
+            break
+    return results
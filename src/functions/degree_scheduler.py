@@ -0,0 +1,274 @@
+# IMPORTS FROM INSTALLS
+import csv
+import json
+import logging
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, TimeoutError, wait
+
+# IMPORTS FROM TOOL
+from .cancellation import CANCELLED_ERROR
+from .memory_limit import MEMORY_LIMIT_ERROR, available_memory, limit_jobs
+from .progress import FAILED, ProgressChannel
+from .stopping import cancel_pending, check_stopping, policy_satisfied, select_barrier
+from .worker_pool import shared_pool
+
+logger = logging.getLogger(__name__)
+
+SCHEDULES = (None, "cost")
+# error reported for degrees stopped by a timeout
+TIMEOUT_ERROR = "timeout"
+# seconds between two looks at the cancellation token while waiting for jobs
+CANCEL_POLL_SECONDS = 0.2
+
+# one pool submission: function(*args, **kwargs) labelled KEY (the barrier degree in the parallel
+# wrappers), with its estimated peak memory in bytes
+Job = namedtuple("Job", ["key", "function", "args", "kwargs", "memory"])
+
+
+def plan_degrees(degree_values, size_of, schedule=None, stopping=None, workers=None):
+    '''
+    =========================================
+    Order the degree jobs and share the solver threads between them
+    =========================================
+    degree_values = barrier degrees to solve
+    size_of = function of a degree returning estimate_problem_size
+    schedule = None (ascending degrees, default threads) or "cost"
+    stopping = stopping policy of the search (see stopping)
+    workers = number of cores, defaults to os.cpu_count()
+
+    With "cost", a search that waits for every degree starts the costliest job
+    first (longest-processing-time rule), otherwise the degrees stay ascending so
+    that an early stop is reached soon; every job gets a share of the cores
+    proportional to its estimated cost. Returns (degree, threads, memory) tuples
+    in submission order.
+    '''
+    if schedule not in SCHEDULES:
+        raise ValueError(f"Unrecognised schedule: {schedule}")
+    if schedule is None:
+        return [(degree, None, 0) for degree in degree_values]
+
+    workers = workers or os.cpu_count() or 1
+    sizes = {degree: size_of(degree) for degree in degree_values}
+    total = sum(size["cost"] for size in sizes.values()) or 1
+    order = sorted(degree_values, key=lambda degree: -sizes[degree]["cost"]) if stopping is None \
+        else sorted(degree_values)
+    return [(degree, min(workers, max(1, round(workers * sizes[degree]["cost"] / total))), sizes[degree]["memory"])
+            for degree in order]
+
+
+class DegreeScheduler:
+    '''
+    Submits jobs to a pebble pool in order, holding a job back while the
+    estimated memory of the running ones plus its own would exceed
+    MEMORY_BUDGET (one job always runs). Without a budget every job is
+    submitted at once, as a plain pool.schedule loop.
+
+    JOB_TIMEOUT (seconds) has pebble stop a job that runs longer, its future
+    raising TimeoutError; TIMEOUT (seconds) ends completed() once it has passed
+    since the scheduler was made, setting expired, and the unfinished jobs are
+    left to cancel(). So does cancelling CANCEL_TOKEN (see cancellation).
+    '''
+
+    def __init__(self, pool, jobs, memory_budget=None, job_timeout=None, timeout=None, cancel_token=None):
+        self.pool = pool
+        self.queue = list(jobs)
+        self.memory_budget = memory_budget
+        self.job_timeout = job_timeout
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.expired = False
+        self.cancel_token = cancel_token
+        self.running = {}
+
+    def _submit(self):
+        while self.queue:
+            job = self.queue[0]
+            used = sum(running.memory for running in self.running.values())
+            if self.running and self.memory_budget is not None and used + job.memory > self.memory_budget:
+                break
+            self.queue.pop(0)
+            if self.job_timeout is None:
+                future = self.pool.schedule(job.function, args=job.args, kwargs=job.kwargs)
+            else:
+                future = self.pool.schedule(job.function, args=job.args, kwargs=job.kwargs, timeout=self.job_timeout)
+            self.running[future] = job
+
+    def completed(self):
+        '''Yield (key, future) as jobs finish, submitting held jobs when memory frees up'''
+        self._submit()
+        while self.running:
+            if self.cancel_token is not None and self.cancel_token.cancelled:
+                return
+            remaining = self.deadline - time.monotonic() if self.deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                self.expired = True
+                return
+            if self.cancel_token is not None:
+                remaining = min(remaining, CANCEL_POLL_SECONDS) if remaining is not None else CANCEL_POLL_SECONDS
+            done, _ = wait(list(self.running), timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield self.running.pop(future).key, future
+            self._submit()
+
+    def cancel(self):
+        '''Cancel the running jobs and drop the held ones; returns their sorted keys'''
+        cancelled = cancel_pending({future: job.key for future, job in self.running.items()})
+        cancelled += [job.key for job in self.queue]
+        self.queue = []
+        return sorted(cancelled)
+
+
+def run_degrees(jobs, degree_values, size_of, stopping=None, target_confidence=None, ladder=False,
+                memory_budget=None, memory_limit=None, job_timeout=None, timeout=None, cancel_token=None,
+                progress=None, pool=None):
+    '''
+    =========================================
+    Run the degree jobs of a parallel function and select its barrier
+    =========================================
+    jobs = degree jobs (see Job), keyed by barrier degree, returning an engine result
+           (a list of them with LADDER)
+    degree_values = barrier degrees searched, reported as queued to PROGRESS
+    size_of = function of a degree returning estimate_problem_size
+    stopping, target_confidence = stopping policy of the search (see stopping)
+    ladder = the single job is a degree_ladder returning the result of every rung
+    memory_budget, memory_limit, job_timeout, timeout, cancel_token, progress = see the parallel functions
+    pool = pebble pool to run the jobs on (None: the shared worker pool, see worker_pool)
+
+    Degrees failing, timing out or dying in their worker are logged and reported
+    to PROGRESS. Returns the barrier chosen by select_barrier or, without one, a
+    "cancelled", "memory_limit" or "timeout" error for the reason no barrier was
+    found (None if every degree finished without one). The cancelled, memory
+    limited and timed out degrees are added under "cancelled_degrees",
+    "memory_limited_degrees" and "timed_out_degrees".
+    '''
+    from pebble import ProcessExpired
+
+    check_stopping(stopping, target_confidence)
+    barriers = {}
+    cancelled = []
+    limited = []
+    timed_out = []
+
+    channel = ProgressChannel(progress)
+    channel.queue_degrees(degree_values, size_of)
+    jobs, memory_budget = limit_jobs(jobs, memory_limit, memory_budget)
+    jobs = channel.attach(jobs)
+    scheduler = DegreeScheduler(pool if pool is not None else shared_pool(), jobs, memory_budget, job_timeout,
+                                timeout, cancel_token)
+    pending = set(job.key for job in jobs)
+
+    for degree, future in scheduler.completed():
+        pending.discard(degree)
+        try:
+            results = future.result()
+        except TimeoutError:
+            logger.warning(f"Degree {degree} timed out")
+            timed_out.append(degree)
+        except ProcessExpired as exc:
+            # under a memory limit, a native solver may abort its worker on a failed allocation
+            logger.warning(f"Worker of degree {degree} died: {exc}")
+            if memory_limit is not None:
+                limited.append(degree)
+            channel.report(degree, FAILED, error=MEMORY_LIMIT_ERROR if memory_limit is not None else str(exc))
+        except Exception as exc:
+            logger.error(f"Degree {degree} raised an exception: {exc}")
+            channel.report(degree, FAILED, error=str(exc))
+        else:
+            for result in (results if ladder else [results]):
+                if result is None:
+                    continue
+                if "barrier" in result:
+                    barriers[result["b_degree"]] = result
+                elif "error" in result:
+                    logger.info(f"No barrier of degree {result['b_degree']}: {result['error']}")
+                    if result["error"] == MEMORY_LIMIT_ERROR:
+                        limited.append(result["b_degree"])
+                else:
+                    logger.warning(f"Degree {degree} returned neither a barrier nor an error")
+        if policy_satisfied(stopping, barriers, pending, target_confidence):
+            cancelled = scheduler.cancel()
+            break
+
+    stopped = cancel_token is not None and cancel_token.cancelled
+    if stopped:
+        # cancelled by the caller: stop scheduling and terminate the running workers
+        cancelled = sorted(cancelled + scheduler.cancel())
+    elif scheduler.expired:
+        # the search ran out of time: stop the degrees that have not finished
+        timed_out = sorted(timed_out + scheduler.cancel())
+    if cancelled:
+        logger.info(f"Cancelled degrees: {cancelled}")
+    if timed_out:
+        logger.info(f"Timed out degrees: {timed_out}")
+    for degree in timed_out:
+        channel.report(degree, FAILED, error=TIMEOUT_ERROR)
+    channel.close()
+
+    result = select_barrier(stopping, barriers)
+    if result is None and stopped:
+        result = {"error": CANCELLED_ERROR, "b_degree": min(cancelled, default=None)}
+    elif result is None and (limited or timed_out):
+        # report why no barrier was found
+        result = {"error": MEMORY_LIMIT_ERROR if limited else TIMEOUT_ERROR, "b_degree": min(limited or timed_out)}
+    if result is not None:
+        if cancelled:
+            result["cancelled_degrees"] = cancelled
+        if limited:
+            result["memory_limited_degrees"] = sorted(limited)
+        if timed_out:
+            result["timed_out_degrees"] = timed_out
+    return result
+
+
+def completed_jobs(jobs, memory_budget=None, max_workers=None):
+    '''
+    Run JOBS and yield (job, future) as they finish. max_workers gives the jobs
+    a dedicated pool of that size, None the shared worker pool (see worker_pool);
+    memory_budget is passed to the DegreeScheduler and defaults to the memory
+    available, so that jobs which could not all fit run one after another.
+    '''
+    from pebble import ProcessPool
+
+    jobs = {job.key: job for job in jobs}
+    if memory_budget is None:
+        memory_budget = available_memory()
+    pool = shared_pool() if max_workers is None else ProcessPool(max_workers=max_workers)
+    try:
+        for key, future in DegreeScheduler(pool, list(jobs.values()), memory_budget).completed():
+            yield jobs[key], future
+    finally:
+        if max_workers is not None:
+            pool.stop()
+            pool.join()
+
+
+class RowWriter:
+    '''
+    Appends result rows to a .csv or .jsonl file as they arrive, flushing every
+    row so that a long sweep or batch can be followed (or recovered) while it runs.
+    '''
+
+    def __init__(self, path, fieldnames):
+        self.path = path
+        self._file = open(path, "w", newline="")
+        self._csv = None
+        if not path.endswith(".jsonl"):
+            self._csv = csv.DictWriter(self._file, fieldnames=fieldnames, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, row):
+        if self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -3,17 +3,30 @@ import sympy as sp
 import numpy as np
 from SumOfSquares import *
 import picos
-import scipy
 
 # IMPORTS FROM TOOL
 from .generate_polynomial import generate_polynomial
-from .doublefactorial import doublefactorial
-from .factorial import factorial
-
-
+from .basis_reduction import add_sos_constraint
+from .sparse_barrier import sparse_dt_SS
+from .result_cache import cached
+from .phases import phase
+from .timings import lap_picos_solve, timed
+from .memory_limit import memory_limited, out_of_memory
+from .cancellation import cancellable
+from .progress import reports_progress
+from .moment_substitution import expected_composition
+from .noise_moments import noise_moment_table
+
+
+@reports_progress
+@cached
+@timed
+@memory_limited
+@cancellable
 def dt_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space, x, varsigma, f,
           t, noise_type="normal", optimize=False, solver="mosek", confidence=None, gam=None, lam=None, c_val=None,
-          mean=None, sigma=None, rate=None, a=None, b=None, l_degree=None):
+          mean=None, sigma=None, rate=None, a=None, b=None, l_degree=None, backend="picos",
+          basis_reduction=None, relaxation="sos", warm_start=None, threads=None):
     '''
     =========================================
     Calculate the barrier for the discrete-time Stochastic System (dt_SS)
@@ -38,13 +51,34 @@ def dt_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_sp
     gam = chosen value for gamma
     lam = chosen value for lambda
     c_val = chosen c value (multiplied by time horizon in confidence)
-    sigma = standard deviations of normal/gaussian noise (mean assumed to be zero)
+    mean = means of normal/gaussian noise (zero if not given); the expectation uses the raw moments
+           E[varsigma^k], which include the mean (see noise_moments)
+    sigma = standard deviations of normal/gaussian noise
     rate = exponential noise rate parameter
     a = lower bound of integral for uniform noise
     b = upper bound of integral for uniform noise
     l_degree = degree of lagrangian multipliers
+    backend = "picos" (SumOfSquares/picos modelling) or "sparse" (direct sparse SDP assembly)
+    basis_reduction = None, "newton" (Newton polytope) or "diagonal" (Newton polytope and diagonal consistency)
+    relaxation = "sos", "sdsos" (SOCP) or "dsos" (LP); the relaxations use the sparse backend with cvxopt
+    warm_start = solution of a lower degree (sparse backend with cvxopt) to start from; when given, even empty,
+                 the result returns its own solution under "warm_start" (see degree_ladder)
+    threads = number of MOSEK threads (None: MOSEK default); cvxopt uses the BLAS threads of the process
+    cache = reuse the stored result of an identical problem (see result_cache), False to bypass it
+    timings = True to return the seconds spent per phase under "timings" (see timings.PHASES)
+    timing_sink = callable receiving the timings of every call, e.g. timings.JsonlSink(path)
+    memory_limit = bytes the call may allocate (see memory_limit); the result records "peak_memory"
+    cancel_token = CancellationToken stopping the call at its next phase boundary (see cancellation)
+    progress = callable (or ProgressChannel queue) receiving the progress events of the call (see progress)
     '''
 
+    if backend == "sparse" or relaxation != "sos":
+        return sparse_dt_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space, x, varsigma,
+                            f, t, noise_type=noise_type, optimize=optimize, solver=solver, confidence=confidence,
+                            gam=gam, lam=lam, c_val=c_val, mean=mean, sigma=sigma, rate=rate, a=a, b=b,
+                            l_degree=l_degree, basis_reduction=basis_reduction, relaxation=relaxation,
+                            warm_start=warm_start, threads=threads)
+
     result = {}
     result['b_degree'] = b_degree
 
@@ -74,6 +108,8 @@ def dt_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_sp
     # State set
     g = generate_polynomial(x, L_space, U_space)
 
+    phase("sets")
+
     # ========================= Initialization the sum of squares program =========================
 
     prob = SOSProblem()
@@ -166,100 +202,35 @@ def dt_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_sp
     except Exception:
         return {"error": "Gamma, Lambda, or c value definition issues","b_degree":b_degree}
 
-    # ========================= Sub Difference Equations =========================
-    y = [sp.Dummy(f'y{i}') for i in range(len(x))]
-    BB = Barrier.subs([(x[i], y[i]) for i in range(len(x))])
-    BB = BB.subs([(y[i], f[i]) for i in range(len(y))])
-    BB = sp.expand(BB)
-
-    for i in range(len(varsigma)):
-        # Get coefficients and monomials
-        coeff_dict = BB.as_coefficients_dict()
-        m, mm = list(coeff_dict.keys()), list(coeff_dict.values())
-
-        if noise_type == "normal" or noise_type == "gaussian":
-            # use central moment and standard dev (sigma) and assume mean = 0
-            for k in range(len(m)):
-                m[k] = str(m[k])
-                m[k] = m[k].replace("**", "^")
-                s1 = m[k].split('*')
-                chk = 0
-                for k2 in range(len(s1)):
-                    s2 = str(s1[k2]).split('^')
-
-                    if s2[0] == varsigma[i].name and len(s2) == 1:
-                        df = scipy.stats.norm.moment(1, mean[i], sigma[i])
-                        s1[k2] = str(df)
-                    
-                    elif s2[0] == varsigma[i].name:
-                    	dfk = int(s2[1])
-                    	df = scipy.stats.norm.moment(dfk, mean[i], sigma[i])
-                    	s1[k2] = str(df)
-                    	
-                if chk == 0:
-                    sy1 = sp.sympify('*'.join(s1))
-                    m[k] = sy1
-
-        elif noise_type == "exponential":
-            # use non-central moment and rate parameter
-            for k in range(len(m)):
-                m[k] = str(m[k])
-                m[k] = m[k].replace("**", "^")
-                s1 = m[k].split('*')
-                for k2 in range(len(s1)):
-                    s2 = str(s1[k2]).split('^')
-                    if s2[0] == varsigma[i].name and len(s2) == 1:
-                        s1[k2] = str(1 / rate[i])
-                        break
-
-                    if s2[0] == varsigma[i].name:
-                        dfk = int(s2[1])
-                        df = factorial(dfk) / (rate[i] ** dfk)
-                        s1[k2] = str(df)
-
-                sy1 = sp.sympify('*'.join(s1))
-                m[k] = sy1
-
-        elif noise_type == "uniform":
-            # use raw moment and a and b are ranges for noise per dimension
-            for k in range(len(m)):
-                m[k] = str(m[k])
-                m[k] = m[k].replace("**", "^")
-                s1 = m[k].split('*')
-                for k2 in range(len(s1)):
-                    s2 = str(s1[k2]).split('^')
-                    if s2[0] == varsigma[i].name and len(s2) == 1:
-                        s1[k2] = str((b[i] ** 2 - a[i] ** 2) / (3 * (b[i] - a[i])))
-                        break
-
-                    if s2[0] == varsigma[i].name:
-                        dfk = int(s2[1])
-                        df = (b[i] ** (dfk + 1) - a[i] ** (dfk + 1)) / ((dfk + 1) * (b[i] - a[i]))
-                        s1[k2] = str(df)
-                sy1 = sp.sympify('*'.join(s1))
-                m[k] = sy1
+    phase("multipliers")
 
-        else:
-            raise Exception(f"Unrecognised NoiseType: {noise_type}")
+    # ========================= Sub Difference Equations =========================
+    # E[B(f(x,varsigma))]: compose in a sparse polynomial ring and replace every
+    # noise power by its moment in a single vectorized pass
+    max_order = b_degree * max((sp.total_degree(fi, *varsigma) for fi in f), default=0) if varsigma else 0
+    moments = noise_moment_table(noise_type, len(varsigma), max_order, mean, sigma, rate, a, b)
+    Barrier_f = expected_composition(Barrier, x, varsigma, f, moments)
 
-        # Recombine terms
-        BB = sum([mm_val * m_val for mm_val, m_val in zip(mm, m)])
-    Barrier_f = BB
+    phase("generator")
 
     # ========================= Constraints =========================
 
+    gram_sizes = {}  # (full, reduced) Gram matrix size per constraint
     try:
         L0_times_g0 = [L * g for L, g in zip(L0, g0)]
-        first_condition = prob.add_sos_constraint(-Barrier - sum(L0_times_g0) + gamma, x)
+        first_condition, gram_sizes["initial"] = add_sos_constraint(prob, -Barrier - sum(L0_times_g0) + gamma, x,
+                                                                    basis_reduction)
 
         for i in range(avoid_regions):
             temp_L_times_g = [L * g for L, g in zip(L1[i], g1[i])]
-            second_condition = prob.add_sos_constraint(Barrier - sum(temp_L_times_g) - lambda_, x)
+            second_condition, gram_sizes["unsafe" + str(i + 1)] = add_sos_constraint(
+                prob, Barrier - sum(temp_L_times_g) - lambda_, x, basis_reduction)
 
         L_times_g = [L * g for L, g in zip(L, g)]
-        last_condition = prob.add_sos_constraint(-Barrier_f + Barrier + c - sum(L_times_g), x)
+        last_condition, gram_sizes["dynamics"] = add_sos_constraint(prob, -Barrier_f + Barrier + c - sum(L_times_g), x,
+                                                                    basis_reduction)
 
-        barrier_constraint = prob.add_sos_constraint(Barrier, x)
+        barrier_constraint, gram_sizes["barrier"] = add_sos_constraint(prob, Barrier, x, basis_reduction)
 
         # all lagrangians should be positive
         for i in L0:
@@ -280,13 +251,23 @@ def dt_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_sp
             return {"error":"lambda_ is None","b_degree":b_degree}
         prob.set_objective('min', (gv + cv*t)/lambda_)
 
+    phase("constraints")
+
     # ========================= Solve =========================
     try:
-        prob.solve(solver=solver)
+        if threads is not None and solver == "mosek":
+            prob.solve(solver=solver, mosek_params={"MSK_IPAR_NUM_THREADS": threads})
+        else:
+            prob.solve(solver=solver)
     except picos.modeling.problem.SolutionFailure:
         return {"error": "picos SolutionFailure","b_degree":b_degree}
-    except Exception:
+    except Exception as exc:
+        if out_of_memory(exc):
+            # reported by memory_limited
+            raise MemoryError(str(exc)) from exc
         return {"error": "Solver Exception","b_degree":b_degree}
+    finally:
+        lap_picos_solve(prob)
 
     # ========================= Results =========================
     #Check if expression is scalar
@@ -297,7 +278,11 @@ def dt_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_sp
     	result["barrier"] = sum(barrier_constraint.get_sos_decomp())
     else:
     	return {"error": "constraints are not sum of squares"}
+    phase("extraction")
     
+    if basis_reduction is not None:
+        result["gram_sizes"] = gram_sizes
+
     if gam is None:
         result["gamma"] = float(gv)
     else:
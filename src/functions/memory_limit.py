@@ -0,0 +1,143 @@
+# IMPORTS FROM INSTALLS
+import functools
+import logging
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows: no address-space limits, peak memory is not tracked
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# error reported for a job that ran out of its memory limit
+MEMORY_LIMIT_ERROR = "memory_limit"
+# errors of the engines for a solver that failed, which may be a failed allocation
+SOLVER_ERRORS = ("Solver Exception", "picos SolutionFailure", "SolutionFailure")
+# MOSEK response codes of an allocation failure
+MOSEK_SPACE_ERRORS = ("err_space", "err_space_no_info", "err_space_leaking")
+# fraction of a memory limit within which a failed solve counts as having hit it
+LIMIT_REACHED = 0.95
+
+
+def _status_bytes(field):
+    '''Field of /proc/self/status in bytes (Linux), None elsewhere'''
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    '''Restart the peak resident set size of this process (Linux), so that a reused worker reports per job'''
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss():
+    '''Peak resident set size of this process in bytes, None when unknown'''
+    peak = _status_bytes("VmHWM")
+    if peak is None and resource is not None:
+        # kilobytes on Linux, bytes on macOS; never reset, so an upper bound for reused workers
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return peak
+
+
+def available_memory():
+    '''Memory available to new jobs in bytes (MemAvailable on Linux), None when unknown'''
+    try:
+        with open("/proc/meminfo") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def out_of_memory(exc):
+    '''Whether a solver exception (or one of its causes) is an allocation failure: MemoryError or MSK_RES_ERR_SPACE'''
+    while exc is not None:
+        if isinstance(exc, MemoryError):
+            return True
+        code = str(getattr(exc, "errno", "")).rsplit(".", 1)[-1]
+        if code in MOSEK_SPACE_ERRORS or "MSK_RES_ERR_SPACE" in str(exc):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def memory_limited(engine):
+    '''
+    Run an engine under a memory limit and record its peak memory. The engine
+    gains a keyword argument memory_limit: bytes of address space the call may
+    allocate on top of what the process already uses (None: no limit). The limit
+    applies to the whole process for the duration of the call, so it is meant
+    for worker processes (see the parallel functions).
+
+    The result gets "peak_memory" (peak resident set size in bytes); a call that
+    exceeds its limit returns {"error": "memory_limit", ...} instead of taking
+    down its process. Native solvers do not raise MemoryError under the limit:
+    the engines re-raise the allocation failures of out_of_memory as MemoryError,
+    and a solver error of a call whose peak address space came within
+    LIMIT_REACHED of the limit is reported as "memory_limit" too.
+    '''
+
+    @functools.wraps(engine)
+    def wrapper(*args, memory_limit=None, **kwargs):
+        reset_peak_rss()
+        b_degree = args[0] if args else kwargs.get("b_degree")
+        previous = None
+        if memory_limit is not None and resource is not None:
+            previous = resource.getrlimit(resource.RLIMIT_AS)
+            current = _status_bytes("VmSize") or 0
+            soft = current + int(memory_limit)
+            if previous[1] != resource.RLIM_INFINITY:
+                soft = min(soft, previous[1])
+            resource.setrlimit(resource.RLIMIT_AS, (soft, previous[1]))
+            # VmPeak is never reset: only a call that raises it can have reached the limit
+            peak_before = _status_bytes("VmPeak") or 0
+        try:
+            result = engine(*args, **kwargs)
+            if previous is not None and isinstance(result, dict) and result.get("error") in SOLVER_ERRORS:
+                peak = _status_bytes("VmPeak") or 0
+                if peak > peak_before and peak >= current + LIMIT_REACHED * (soft - current):
+                    raise MemoryError(result["error"])
+        except MemoryError:
+            logger.warning(f"{engine.__name__} of degree {b_degree} exceeded its memory limit of {memory_limit} bytes")
+            result = {"error": MEMORY_LIMIT_ERROR, "b_degree": b_degree, "memory_limit": memory_limit}
+        finally:
+            if previous is not None:
+                resource.setrlimit(resource.RLIMIT_AS, previous)
+
+        if isinstance(result, dict):
+            result["peak_memory"] = peak_rss()
+        return result
+
+    return wrapper
+
+
+def limit_jobs(jobs, memory_limit, memory_budget=None):
+    '''
+    Give every degree job of a parallel function the memory limit MEMORY_LIMIT and
+    reserve the limit, rather than the job's estimate, against the memory budget;
+    the budget defaults to the memory available, so that jobs which could not all
+    fit run one after another. Returns the jobs and the budget.
+    '''
+    if memory_limit is None:
+        return jobs, memory_budget
+    if memory_budget is None:
+        memory_budget = available_memory()
+    return [job._replace(kwargs=dict(job.kwargs, memory_limit=memory_limit), memory=memory_limit)
+            for job in jobs], memory_budget
@@ -0,0 +1,177 @@
+# IMPORTS FROM INSTALLS
+import numpy as np
+import sympy as sp
+import scipy
+
+# IMPORTS FROM TOOL
+from .factorial import factorial
+from .timings import span
+
+
+def expected_terms(exponents, coefficients, noise_columns, moments):
+    '''
+    =========================================
+    Take the expectation of a sparse polynomial over its noise variables
+    =========================================
+    exponents = integer numpy array of shape (terms, generators)
+    coefficients = numpy array of the term coefficients
+    noise_columns = generator indices of the noise variables (one per row of moments)
+    moments = numpy array of shape (len(noise_columns), max_order + 1), see noise_moment_table
+
+    Every noise power varsigma_i^k is replaced by moments[i][k] for all noise
+    variables at once, and terms that become equal are merged. Returns the
+    exponents of the remaining generators and their coefficients.
+    '''
+    exponents = np.asarray(exponents, dtype=np.int64)
+    coefficients = np.asarray(coefficients, dtype=np.double)
+    noise_columns = np.asarray(noise_columns, dtype=np.int64)
+    kept_columns = np.setdiff1d(np.arange(exponents.shape[1]), noise_columns)
+
+    if len(coefficients) == 0:
+        return np.zeros((0, len(kept_columns)), dtype=np.int64), coefficients
+
+    # gather the moment of every (term, noise variable) pair in one go
+    noise_powers = exponents[:, noise_columns]
+    factors = np.prod(moments[np.arange(len(noise_columns)), noise_powers], axis=1)
+
+    # merge the terms that only differed in their noise powers
+    reduced, inverse = np.unique(exponents[:, kept_columns], axis=0, return_inverse=True)
+    values = np.bincount(inverse.ravel(), weights=coefficients * factors, minlength=len(reduced))
+
+    nonzero = values != 0
+    return reduced[nonzero], values[nonzero]
+
+
+def substitute_moments(expr, x, varsigma, moments):
+    '''
+    =========================================
+    Replace the noise variables of a sympy expression by their moments
+    =========================================
+    expr = sympy polynomial expression in x, varsigma and (optionally) coefficient symbols
+    x = list of sympy variables
+    varsigma = list of sympy variables for noise
+    moments = numpy array of noise moments, see noise_moment_table
+    '''
+    params = sorted(sp.sympify(expr).free_symbols - set(x) - set(varsigma), key=str)
+    ring, *_ = sp.ring(list(x) + list(varsigma) + params, sp.RR)
+    return _expectation_to_expr(ring(expr), len(x), len(varsigma), moments)
+
+
+def expected_composition(barrier, x, varsigma, f, moments):
+    '''
+    =========================================
+    Compute E[B(f(x,varsigma))] for a polynomial barrier B
+    =========================================
+    barrier = sympy polynomial in x whose coefficients may be symbols
+    x = list of sympy variables
+    varsigma = list of sympy variables for noise
+    f = numpy array of dynamics functions
+    moments = numpy array of noise moments, see noise_moment_table
+
+    The composition is carried out in a sparse polynomial ring so that the
+    (large) expanded expression is never built as a sympy tree.
+    '''
+    dim = len(x)
+    params = sorted(sp.sympify(barrier).free_symbols - set(x), key=str)
+    ring, *_ = sp.ring(list(x) + list(varsigma) + params, sp.RR)
+    dynamics = [ring(fi) for fi in f]
+
+    powers = {}
+
+    def power(i, p):
+        if (i, p) not in powers:
+            powers[(i, p)] = ring.one if p == 0 else power(i, p - 1) * dynamics[i]
+        return powers[(i, p)]
+
+    # B(f) = sum_k c_k * prod_i f_i^alpha_ki, with the powers of f shared between terms
+    composed = ring.zero
+    offset = dim + len(varsigma)
+    for monom, coeff in ring(barrier).terms():
+        term = ring({(0,) * offset + monom[offset:]: coeff})
+        for i, p in enumerate(monom[:dim]):
+            if p:
+                term = term * power(i, p)
+        composed += term
+
+    return _expectation_to_expr(composed, dim, len(varsigma), moments)
+
+
+def _expectation_to_expr(poly, dim, noise_count, moments):
+    gens = poly.ring.symbols
+    if not poly:
+        return sp.Integer(0)
+
+    exponents = np.array(list(poly.keys()), dtype=np.int64)
+    coefficients = np.array([float(c) for c in poly.values()], dtype=np.double)
+    noise_columns = np.arange(dim, dim + noise_count)
+    with span("moments"):
+        reduced, values = expected_terms(exponents, coefficients, noise_columns, moments)
+
+    kept = [s for k, s in enumerate(gens) if not dim <= k < dim + noise_count]
+    return sp.Add(*[sp.Float(v) * sp.Mul(*[s ** int(e) for s, e in zip(kept, monom) if e])
+                    for monom, v in zip(reduced, values)])
+
+
+def legacy_substitute_moments(BB, varsigma, noise_type, mean=None, sigma=None, rate=None, a=None, b=None):
+    '''
+    =========================================
+    String based moment substitution, as originally written in dt_SS
+    =========================================
+    Kept as a reference for regression tests and benchmarks of the
+    exponent based path (substitute_moments / expected_composition).
+
+    BB = expanded sympy expression in x and varsigma
+    varsigma = list of sympy variables for noise
+    noise_type = "normal" or "gaussian", "exponential", "uniform"
+    '''
+    for i in range(len(varsigma)):
+        # Get coefficients and monomials
+        coeff_dict = BB.as_coefficients_dict()
+        m, mm = list(coeff_dict.keys()), list(coeff_dict.values())
+
+        if noise_type == "normal" or noise_type == "gaussian":
+            for k in range(len(m)):
+                m[k] = str(m[k]).replace("**", "^")
+                s1 = m[k].split('*')
+                for k2 in range(len(s1)):
+                    s2 = str(s1[k2]).split('^')
+                    if s2[0] == varsigma[i].name and len(s2) == 1:
+                        s1[k2] = str(scipy.stats.norm.moment(1, mean[i], sigma[i]))
+                    elif s2[0] == varsigma[i].name:
+                        s1[k2] = str(scipy.stats.norm.moment(int(s2[1]), mean[i], sigma[i]))
+                m[k] = sp.sympify('*'.join(s1))
+
+        elif noise_type == "exponential":
+            for k in range(len(m)):
+                m[k] = str(m[k]).replace("**", "^")
+                s1 = m[k].split('*')
+                for k2 in range(len(s1)):
+                    s2 = str(s1[k2]).split('^')
+                    if s2[0] == varsigma[i].name and len(s2) == 1:
+                        s1[k2] = str(1 / rate[i])
+                        break
+                    if s2[0] == varsigma[i].name:
+                        dfk = int(s2[1])
+                        s1[k2] = str(factorial(dfk) / (rate[i] ** dfk))
+                m[k] = sp.sympify('*'.join(s1))
+
+        elif noise_type == "uniform":
+            for k in range(len(m)):
+                m[k] = str(m[k]).replace("**", "^")
+                s1 = m[k].split('*')
+                for k2 in range(len(s1)):
+                    s2 = str(s1[k2]).split('^')
+                    if s2[0] == varsigma[i].name and len(s2) == 1:
+                        s1[k2] = str((b[i] ** 2 - a[i] ** 2) / (3 * (b[i] - a[i])))
+                        break
+                    if s2[0] == varsigma[i].name:
+                        dfk = int(s2[1])
+                        s1[k2] = str((b[i] ** (dfk + 1) - a[i] ** (dfk + 1)) / ((dfk + 1) * (b[i] - a[i])))
+                m[k] = sp.sympify('*'.join(s1))
+
+        else:
+            raise Exception(f"Unrecognised NoiseType: {noise_type}")
+
+        # Recombine terms
+        BB = sum([mm_val * m_val for mm_val, m_val in zip(mm, m)])
+    return BB
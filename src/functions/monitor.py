@@ -0,0 +1,252 @@
+# IMPORTS FROM INSTALLS
+import argparse
+import json
+import time
+from itertools import islice
+
+import numpy as np
+
+# IMPORTS FROM TOOL
+from src.functions.barrier_evaluator import PolynomialEvaluator
+from src.utils.common import get_expression_from_string
+from src.utils.config import prepare_parameters
+from src.utils.system_mode import SystemMode
+
+# kinds of monitor events
+ABOVE_GAMMA, APPROACHING_LAMBDA, ABOVE_LAMBDA = "above_gamma", "approaching_lambda", "above_lambda"
+LEFT_STATE_SET, ENTERED_UNSAFE, DECREASE_VIOLATED = "left_state_set", "entered_unsafe", "decrease_violated"
+EVENT_KINDS = (ABOVE_GAMMA, APPROACHING_LAMBDA, ABOVE_LAMBDA, LEFT_STATE_SET, ENTERED_UNSAFE, DECREASE_VIOLATED)
+CERTIFICATE_FIELDS = ("barrier", "gamma", "lambda", "c", "confidence", "b_degree")
+CHUNK_SIZE = 1 << 16
+
+
+def save_certificate(path, config, result):
+    '''
+    =========================================
+    Save a barrier certificate as a GUI configuration file with its result
+    =========================================
+    path = file to write
+    config = configuration exported by the GUI (see ex/GUI_config_files), defining the mode and the regions
+    result = result holding "barrier" of the engine or parallel function run on config
+    '''
+    if "barrier" not in result:
+        raise ValueError(f"result has no barrier: {result.get('error')}")
+    certificate = {key: (str(result[key]) if key == "barrier" else result[key])
+                   for key in CERTIFICATE_FIELDS if result.get(key) is not None}
+    with open(path, 'w') as json_file:
+        json.dump(dict(config, certificate=certificate), json_file, indent=4)
+
+
+def load_certificate(path):
+    '''
+    =========================================
+    Load a certificate written by save_certificate
+    =========================================
+    path = certificate file
+
+    Returns the prepared parameters of the configuration (see load_config) with
+    "mode" (SystemMode), "barrier" (sympy expression), "gamma", "lambda" and
+    "c" (0 for the deterministic modes).
+    '''
+    with open(path, 'r') as json_file:
+        config = json.load(json_file)
+    certificate = config.pop("certificate")
+    mode = SystemMode(config["mode"])
+    parameters = prepare_parameters(mode, config)
+    parameters.update(certificate)
+    parameters["mode"] = mode
+    parameters["barrier"] = get_expression_from_string(certificate["barrier"], parameters["x"],
+                                                       "The barrier of the certificate cannot be parsed.")
+    parameters["c"] = float(certificate.get("c") or 0.0)
+    return parameters
+
+
+def state_chunks(source, dim, chunk_size=CHUNK_SIZE, columns=None):
+    '''
+    =========================================
+    Arrays of shape (<= chunk_size, dim) read from a stream of states
+    =========================================
+    source = .csv or .npy path (.npy files are memory-mapped), numpy array (or np.memmap) with one state
+             per row, or an iterable of states and/or arrays of states
+    dim = dimension of state space
+    chunk_size = number of states per chunk
+    columns = indices of the state columns of a file or array (default: the first dim columns)
+
+    Only one chunk is held in memory at a time. A first line of a .csv file that
+    is not numeric is skipped as a header.
+    '''
+    columns = list(range(dim)) if columns is None else list(columns)
+    if isinstance(source, str) and source.endswith(".npy"):
+        source = np.load(source, mmap_mode="r")
+    if isinstance(source, str):
+        yield from _csv_chunks(source, chunk_size, columns)
+    elif isinstance(source, np.ndarray):
+        source = source.reshape(len(source), -1)
+        for start in range(0, len(source), chunk_size):
+            yield np.asarray(source[start:start + chunk_size, columns], dtype=np.double)
+    else:
+        buffer, size = [], 0
+        for item in source:
+            states = np.asarray(item, dtype=np.double).reshape(-1, dim)
+            buffer.append(states)
+            size += len(states)
+            while size >= chunk_size:
+                stacked = np.vstack(buffer)
+                yield stacked[:chunk_size]
+                buffer, size = [stacked[chunk_size:]], size - chunk_size
+        if size:
+            yield np.vstack(buffer)
+
+
+def _csv_chunks(path, chunk_size, columns):
+    with open(path, 'r') as file:
+        first = file.readline()
+        try:
+            rows = [np.array(first.split(","), dtype=np.double)[columns]] if first.strip() else []
+        except ValueError:
+            rows = []
+        while True:
+            lines = [line for line in islice(file, chunk_size - len(rows)) if line.strip()]
+            if lines:
+                rows.append(np.loadtxt(lines, delimiter=",", ndmin=2, usecols=columns))
+            if rows:
+                yield np.vstack(rows).reshape(-1, len(columns))
+            if not lines:
+                return
+            rows = []
+
+
+class SafetyMonitor:
+    '''
+    Runtime monitor of a barrier certificate (see load_certificate) on streams
+    of states. Every chunk is evaluated at once with a compiled barrier (see
+    barrier_evaluator); the monitor keeps the last state of the previous chunk
+    so that crossings and steps spanning two chunks are detected. It flags:
+
+    - above_gamma / approaching_lambda / above_lambda: the barrier crosses gamma,
+      gamma + approach * (lambda - gamma), or lambda (the level of the unsafe sets);
+    - left_state_set / entered_unsafe: the state leaves the state set or enters an unsafe set;
+    - decrease_violated (discrete-time modes): a step increases the barrier by
+      more than c (0 for dt_DS) plus tolerance. For dt_SS only the expected
+      increase is certified, so single violations are expected; their rate is reported.
+
+    Crossings are reported once per excursion. Memory is bounded by the chunk
+    size and max_events, the number of events kept with their details.
+    '''
+
+    def __init__(self, certificate, approach=0.9, tolerance=1e-9, max_events=1000):
+        self.mode = SystemMode(certificate["mode"])
+        self.barrier = PolynomialEvaluator.from_expr(certificate["barrier"], certificate["x"])
+        self.gamma = float(certificate["gamma"])
+        self.lambda_ = float(certificate["lambda"])
+        self.c = float(certificate.get("c") or 0.0) if self.mode.is_stochastic() else 0.0
+        self.approach_level = self.gamma + approach * (self.lambda_ - self.gamma)
+        self.tolerance = tolerance
+        self.max_events = max_events
+        self.dim = len(certificate["x"])
+        self.L_space = np.asarray(certificate["L_space"], dtype=np.double)
+        self.U_space = np.asarray(certificate["U_space"], dtype=np.double)
+        self.L_unsafe = np.asarray(certificate["L_unsafe"], dtype=np.double).reshape(-1, self.dim)
+        self.U_unsafe = np.asarray(certificate["U_unsafe"], dtype=np.double).reshape(-1, self.dim)
+        self.reset()
+
+    def reset(self):
+        '''Forget the stream monitored so far'''
+        self.states = 0
+        self.chunks = 0
+        self.seconds = 0.0
+        self.counts = dict.fromkeys(EVENT_KINDS, 0)
+        self.events = []
+        self.max_barrier = -np.inf
+        self._last_value = None
+        self._last_flags = dict.fromkeys(EVENT_KINDS, False)
+
+    def process(self, states):
+        '''Monitor the next chunk of states, shape (n, dim); returns the events of the chunk that are kept'''
+        start = time.perf_counter()
+        states = np.asarray(states, dtype=np.double).reshape(-1, self.dim)
+        if not len(states):
+            return []
+        values = self.barrier(states)
+
+        conditions = {
+            ABOVE_GAMMA: values > self.gamma,
+            APPROACHING_LAMBDA: values >= self.approach_level,
+            ABOVE_LAMBDA: values >= self.lambda_,
+            LEFT_STATE_SET: np.any((states < self.L_space) | (states > self.U_space), axis=1),
+            ENTERED_UNSAFE: np.any(np.all((states[:, None, :] >= self.L_unsafe) &
+                                          (states[:, None, :] <= self.U_unsafe), axis=2), axis=1),
+        }
+        flagged = {}
+        for kind, condition in conditions.items():
+            # rising edges, continuing the previous chunk
+            previous = np.concatenate([[self._last_flags[kind]], condition[:-1]])
+            flagged[kind] = np.flatnonzero(condition & ~previous)
+            self._last_flags[kind] = bool(condition[-1])
+        if self.mode.is_discrete():
+            previous = values[:-1] if self._last_value is None else np.concatenate([[self._last_value], values[:-1]])
+            offset = 1 if self._last_value is None else 0
+            flagged[DECREASE_VIOLATED] = np.flatnonzero(values[offset:] - previous > self.c + self.tolerance) + offset
+
+        for kind, indices in flagged.items():
+            self.counts[kind] += len(indices)
+        # details only for the events that are kept, in stream order
+        indices = np.concatenate(list(flagged.values()))
+        kinds = np.repeat([EVENT_KINDS.index(kind) for kind in flagged], [len(i) for i in flagged.values()])
+        order = np.lexsort((kinds, indices))[:max(self.max_events - len(self.events), 0)]
+        events = [{"index": self.states + int(indices[k]), "kind": EVENT_KINDS[kinds[k]],
+                   "barrier": float(values[indices[k]])} for k in order]
+        self.events += events
+
+        self._last_value = float(values[-1])
+        self.max_barrier = max(self.max_barrier, float(values.max()))
+        self.states += len(states)
+        self.chunks += 1
+        self.seconds += time.perf_counter() - start
+        return events
+
+    def run(self, source, chunk_size=CHUNK_SIZE, columns=None):
+        '''Monitor a whole stream (see state_chunks) and return the report'''
+        for chunk in state_chunks(source, self.dim, chunk_size, columns):
+            self.process(chunk)
+        return self.report()
+
+    def report(self):
+        '''
+        Summary of the stream so far: "states", "chunks", "seconds" (spent
+        monitoring), "states_per_second", "max_barrier", the number of events per
+        kind under "counts", the first max_events events under "events", and
+        "safe" (no state reached lambda or an unsafe set).
+        '''
+        return {"mode": self.mode.value, "states": self.states, "chunks": self.chunks,
+                "seconds": round(self.seconds, 6),
+                "states_per_second": self.states / self.seconds if self.seconds > 0 else None,
+                "max_barrier": self.max_barrier if self.states else None, "counts": dict(self.counts),
+                "events": list(self.events),
+                "safe": self.counts[ABOVE_LAMBDA] == 0 and self.counts[ENTERED_UNSAFE] == 0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.functions.monitor",
+        description="Monitor logged states with a barrier certificate saved by save_certificate.")
+    parser.add_argument("certificate", help="certificate file")
+    parser.add_argument("states", nargs="+", help=".csv or .npy files of states, one state per row")
+    parser.add_argument("--columns", help="comma separated indices of the state columns (default: the first dim)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="states evaluated at once")
+    parser.add_argument("--approach", type=float, default=0.9,
+                        help="fraction of the way from gamma to lambda reported as approaching lambda")
+    args = parser.parse_args(argv)
+
+    certificate = load_certificate(args.certificate)
+    columns = [int(column) for column in args.columns.split(",")] if args.columns else None
+    reports = []
+    for path in args.states:
+        report = SafetyMonitor(certificate, approach=args.approach).run(path, args.chunk_size, columns)
+        print(json.dumps(dict(report, file=path, events=report["events"][:20])))
+        reports.append(report)
+    return reports
+
+
+if __name__ == "__main__":
+    main()
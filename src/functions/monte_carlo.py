@@ -0,0 +1,172 @@
+# IMPORTS FROM INSTALLS
+import inspect
+
+import numpy as np
+import sympy as sp
+from scipy.stats import beta
+
+# IMPORTS FROM TOOL
+from src.functions.degree_scheduler import Job, completed_jobs
+
+# trajectories simulated by one pool job
+BATCH_SIZE = 100_000
+
+
+class Dynamics:
+    '''
+    Vector field of sympy expressions compiled with lambdify for numpy batches.
+    Only the expressions are pickled; every process compiles them once, on
+    first use. Called with arrays of shape (n, len(symbols_i)) per symbol
+    group, it returns an array of shape (n, len(expressions)); rows() returns
+    its transpose.
+    '''
+
+    def __init__(self, expressions, *symbol_groups):
+        self.expressions = [sp.sympify(e) for e in expressions]
+        self.symbol_groups = [list(group) for group in symbol_groups]
+        self._function = None
+
+    def __call__(self, *arrays):
+        return self.rows(*arrays).T
+
+    def rows(self, *arrays):
+        '''Values as an array of shape (len(expressions), n), one contiguous row per expression'''
+        if self._function is None:
+            symbols = [s for group in self.symbol_groups for s in group]
+            self._function = sp.lambdify(symbols, self.expressions, "numpy")
+        n = len(arrays[0])
+        columns = [column for array in arrays for column in np.asarray(array).T]
+        values = self._function(*columns)
+        # constant expressions come back as scalars
+        rows = np.empty((len(values), n))
+        for row, value in zip(rows, values):
+            row[:] = value
+        return rows
+
+    def __getstate__(self):
+        return {"expressions": self.expressions, "symbol_groups": self.symbol_groups}
+
+    def __setstate__(self, state):
+        self.__init__(state["expressions"], *state["symbol_groups"])
+
+
+def sample_box(rng, lower, upper, n):
+    '''N states drawn uniformly from the box [lower, upper]'''
+    lower, upper = np.asarray(lower, dtype=np.double), np.asarray(upper, dtype=np.double)
+    return lower + (upper - lower) * rng.random((n, len(lower)))
+
+
+def in_boxes(states, lower, upper):
+    '''Whether each state (row of STATES) lies in one of the boxes [lower[k], upper[k]]'''
+    dim = states.shape[1]
+    lower = np.asarray(lower, dtype=np.double).reshape(-1, dim)
+    upper = np.asarray(upper, dtype=np.double).reshape(-1, dim)
+    inside = np.zeros(len(states), dtype=bool)
+    # column by column: cheaper than reducing an (n, boxes, dim) array over its short axes
+    for low, high in zip(lower, upper):
+        box = np.ones(len(states), dtype=bool)
+        for i in range(dim):
+            box &= (states[:, i] >= low[i]) & (states[:, i] <= high[i])
+        inside |= box
+    return inside
+
+
+def clopper_pearson(successes, trials, level=0.95):
+    '''
+    =========================================
+    Exact (Clopper-Pearson) confidence interval of a binomial proportion
+    =========================================
+    successes = number of successes
+    trials = number of trials
+    level = coverage of the interval
+    '''
+    alpha = 1 - level
+    low = beta.ppf(alpha / 2, successes, trials - successes + 1) if successes > 0 else 0.0
+    high = beta.ppf(1 - alpha / 2, successes + 1, trials - successes) if successes < trials else 1.0
+    return float(low), float(high)
+
+
+def run_batches(simulate, arguments, trajectories, batch_size=BATCH_SIZE, seed=None, max_workers=None,
+                memory_budget=None, state_dim=1):
+    '''
+    =========================================
+    Simulate trajectories in batches on the worker pool and add up their counts
+    =========================================
+    simulate = picklable function(n, seed, *arguments) returning a dict of counts for n trajectories
+    arguments = further arguments of simulate
+    trajectories = total number of trajectories
+    batch_size = trajectories per pool job
+    seed = seed of the independent batch streams (np.random.SeedSequence)
+    max_workers = None (shared worker pool) or the size of a dedicated pool
+    memory_budget = bytes the running batches may use together (None: the memory available, see completed_jobs)
+    state_dim = number of columns of the arrays a batch holds, for its memory estimate
+
+    Only the counts come back from the workers, so the number of trajectories
+    is bounded by time, not memory.
+    '''
+    sizes = [min(batch_size, trajectories - start) for start in range(0, trajectories, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    # a batch holds about ten arrays of its states and noise
+    memory = 10 * batch_size * state_dim * 8
+    jobs = [Job(k, simulate, (n, seeds[k], *arguments), {}, memory) for k, n in enumerate(sizes)]
+
+    totals = {}
+    for _, future in completed_jobs(jobs, memory_budget, max_workers):
+        for key, count in future.result().items():
+            totals[key] = totals.get(key, 0) + count
+    return totals
+
+
+def safety_estimate(counts, trajectories, seconds, level=0.95, certified=None):
+    '''
+    The result dict of a validation: "trajectories", "unsafe" and
+    "left_state_set" (counts), the empirical "safety_probability" with its
+    "confidence_interval" at LEVEL, the "certified_confidence" of the barrier
+    and whether the two are "consistent" (the certified lower bound does not
+    exceed the upper end of the interval), and the throughput.
+    '''
+    unsafe = int(counts.get("unsafe", 0))
+    low, high = clopper_pearson(trajectories - unsafe, trajectories, level)
+    estimate = {"trajectories": trajectories, "unsafe": unsafe, "left_state_set": int(counts.get("left", 0)),
+                "safety_probability": (trajectories - unsafe) / trajectories, "confidence_interval": (low, high),
+                "level": level, "seconds": round(seconds, 3),
+                "trajectories_per_second": trajectories / seconds if seconds > 0 else None}
+    if certified is not None:
+        estimate["certified_confidence"] = float(certified)
+        estimate["consistent"] = bool(certified <= high)
+    return estimate
+
+
+def certified_confidence(result):
+    '''Confidence of an engine result, or None if there is no barrier'''
+    if result is None or "barrier" not in result:
+        return None
+    return result.get("confidence")
+
+
+def validate(simulator, parameters, result, **options):
+    '''
+    =========================================
+    Regression check of a certificate: simulate its system and print a summary line
+    =========================================
+    simulator = monte_carlo_dt_SS or monte_carlo_ct_SS
+    parameters = keyword arguments of the engine that produced result; those the simulator
+                 does not take (b_degree, solver, ...) are ignored
+    result = result of the engine
+    options = further arguments of simulator (trajectories, seed, ...)
+
+    Prints "monte carlo: ... consistent: True/False" for the benchmark tables and
+    returns the estimate. A result without a barrier has nothing to validate: it
+    is not simulated and None is returned.
+    '''
+    if not result or "barrier" not in result:
+        print("monte carlo: skipped, no certificate")
+        return None
+    accepted = inspect.signature(simulator).parameters
+    estimate = simulator(**{key: value for key, value in parameters.items() if key in accepted}, result=result,
+                         **options)
+    low, high = estimate["confidence_interval"]
+    print(f"monte carlo: safety {estimate['safety_probability']:.6g} in [{low:.6g}, {high:.6g}] "
+          f"over {estimate['trajectories']} trajectories, certified {estimate.get('certified_confidence')}, "
+          f"consistent: {estimate.get('consistent')}")
+    return estimate
@@ -0,0 +1,120 @@
+# IMPORTS FROM INSTALLS
+import time
+
+import numpy as np
+
+# IMPORTS FROM TOOL
+from src.functions.monte_carlo import (BATCH_SIZE, Dynamics, certified_confidence, in_boxes, run_batches,
+                                       safety_estimate, sample_box)
+
+
+def monte_carlo_ct_SS(dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space, x, f, delta, rho, p_rate, t,
+                      result=None, trajectories=1_000_000, step=None, tolerance=0.01, max_step=None,
+                      batch_size=BATCH_SIZE, seed=None, level=0.95, max_workers=None, memory_budget=None):
+    '''
+    =========================================
+    Estimate the safety probability of a continuous-time Stochastic System (ct_SS) by simulation
+    =========================================
+    dim = dimension of state space
+    L_initial = numpy array of initial set lower bounds
+    U_initial = numpy array of initial set upper bounds
+    L_unsafe = numpy array of unsafe set(s) lower bounds
+    U_unsafe = numpy array of unsafe set(s) upper bounds
+    L_space = numpy array of state set lower bounds
+    U_space = numpy array of state set upper bounds
+    x = list of sympy variables
+    f = numpy array of dynamics functions (drift)
+    delta = numpy array of diffusion term for brownian (could be equations)
+    rho = numpy array of reset term, for poisson (could be equations)
+    p_rate = numpy array of poisson rate values
+    t = time horizon
+    result = result of ct_SS or parallel_ct_SS whose confidence is compared with the estimate
+    trajectories = number of simulated trajectories
+    step = fixed step size, or None for steps adapted to every trajectory (see below)
+    tolerance = adaptive steps: largest expected displacement per step, as a fraction of the
+                smallest side of the state set
+    max_step = adaptive steps: largest step (default t / 100)
+    batch_size = trajectories per pool job
+    seed = seed of the simulation, for reproducible estimates
+    level = coverage of the confidence interval
+    max_workers = None (shared worker pool) or the size of a dedicated pool
+    memory_budget = bytes the running batches may use together
+
+    The jump-diffusion of the ct_SS generator is integrated with Euler-Maruyama:
+    every coordinate i moves by f_i(x) dt plus Brownian noise of variance
+    (delta^T delta)_ii dt (delta^T delta itself for a vector delta, as in ct_SS),
+    and jumps by rho_i(x) at the times of a Poisson process of rate p_rate[i].
+    Adaptive steps keep the drift displacement |f| dt and the diffusion
+    displacement sqrt(variance dt) of every trajectory below the tolerance.
+    Initial states are drawn uniformly from the initial set; a trajectory is
+    unsafe if it is in an unsafe set at one of its steps up to t. Returns the
+    dict of monte_carlo.safety_estimate, with the mean number of "steps".
+    '''
+    if not (len(L_initial) == dim == len(U_initial) == len(L_space) == len(U_space) == len(x) == len(f) ==
+            len(delta) == len(rho)):
+        raise ValueError("length of arrays doesn't match dimensions!")
+
+    # per-coordinate variance, with the weighting of trace((delta^T delta) * Hessian) in ct_SS
+    W = np.transpose(delta) @ delta
+    variance = [W[i][i] if np.ndim(W) == 2 else W for i in range(dim)]
+    side = float(np.min(np.asarray(U_space, dtype=np.double) - np.asarray(L_space, dtype=np.double)))
+    steps = (step, tolerance * side, max_step if max_step is not None else t / 100)
+    arguments = (Dynamics(f, x), Dynamics(variance, x), Dynamics(rho, x), np.asarray(p_rate, dtype=np.double),
+                 float(t), steps, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space)
+
+    start = time.perf_counter()
+    counts = run_batches(_simulate_batch, arguments, trajectories, batch_size, seed, max_workers, memory_budget,
+                         dim)
+    estimate = safety_estimate(counts, trajectories, time.perf_counter() - start, level,
+                               certified_confidence(result))
+    estimate["steps"] = counts.get("steps", 0) / trajectories
+    return estimate
+
+
+def _simulate_batch(n, seed, drift, variance, rho, p_rate, horizon, steps, L_initial, U_initial, L_unsafe, U_unsafe,
+                    L_space, U_space):
+    rng = np.random.default_rng(seed)
+    step, tolerance, max_step = steps
+    jumping = np.flatnonzero(p_rate > 0)
+
+    # states are stored one coordinate per row, and only while their trajectory runs
+    states = sample_box(rng, L_initial, U_initial, n).T.copy()
+    remaining = np.full(n, horizon)
+    unsafe = in_boxes(states.T, L_unsafe, U_unsafe)
+    left = ~in_boxes(states.T, L_space, U_space)
+    counts = {"unsafe": int(unsafe.sum()), "left": 0, "steps": 0}
+    running = ~unsafe
+    states, remaining, left = states[:, running], remaining[running], left[running]
+    while len(remaining):
+        velocity = drift.rows(states.T)
+        spread = np.sqrt(np.maximum(variance.rows(states.T), 0.0))
+        if step is not None:
+            dt = np.full(len(remaining), float(step))
+        else:
+            speed = np.abs(velocity).max(axis=0)
+            diffusion = spread.max(axis=0) ** 2
+            with np.errstate(divide="ignore"):
+                dt = np.minimum(tolerance / speed, tolerance ** 2 / diffusion)
+            dt = np.clip(dt, max_step * 1e-4, max_step)
+        dt = np.minimum(dt, remaining)
+
+        moved = states + velocity * dt + spread * np.sqrt(dt) * rng.standard_normal(states.shape)
+        if len(jumping):
+            resets = rho.rows(states.T)
+            for j in jumping:
+                moved[j] += rng.poisson(p_rate[j] * dt) * resets[j]
+
+        states = moved
+        remaining -= dt
+        hit = in_boxes(states.T, L_unsafe, U_unsafe)
+        left |= ~in_boxes(states.T, L_space, U_space)
+        counts["steps"] += len(remaining)
+
+        # retire the trajectories that are unsafe or at the horizon
+        done = hit | (remaining <= horizon * 1e-12)
+        if done.any():
+            counts["unsafe"] += int(hit.sum())
+            counts["left"] += int(left[done].sum())
+            running = ~done
+            states, remaining, left = states[:, running], remaining[running], left[running]
+    return counts
@@ -0,0 +1,87 @@
+# IMPORTS FROM INSTALLS
+import time
+
+import numpy as np
+
+# IMPORTS FROM TOOL
+from src.functions.monte_carlo import (BATCH_SIZE, Dynamics, certified_confidence, in_boxes, run_batches,
+                                       safety_estimate, sample_box)
+from src.functions.noise_moments import _normalise_noise_type
+
+
+def monte_carlo_dt_SS(dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space, x, varsigma, f, t,
+                      noise_type="normal", mean=None, sigma=None, rate=None, a=None, b=None, result=None,
+                      trajectories=1_000_000, batch_size=BATCH_SIZE, seed=None, level=0.95, max_workers=None,
+                      memory_budget=None):
+    '''
+    =========================================
+    Estimate the safety probability of a discrete-time Stochastic System (dt_SS) by simulation
+    =========================================
+    dim = dimension of state space
+    L_initial = numpy array of initial set lower bounds
+    U_initial = numpy array of initial set upper bounds
+    L_unsafe = numpy array of unsafe set(s) lower bounds
+    U_unsafe = numpy array of unsafe set(s) upper bounds
+    L_space = numpy array of state set lower bounds
+    U_space = numpy array of state set upper bounds
+    x = list of sympy variables
+    varsigma = list of sympy variables for noise
+    f = numpy array of dynamics functions
+    t = time horizon (number of steps)
+    noise_type = "normal" or "gaussian", "exponential", "uniform"
+    mean = means of normal/gaussian noise (zero if not given)
+    sigma = standard deviations of normal/gaussian noise
+    rate = exponential noise rate parameter
+    a = lower bound of integral for uniform noise
+    b = upper bound of integral for uniform noise
+    result = result of dt_SS or parallel_dt_SS whose confidence is compared with the estimate
+    trajectories = number of simulated trajectories
+    batch_size = trajectories per pool job
+    seed = seed of the simulation, for reproducible estimates
+    level = coverage of the confidence interval
+    max_workers = None (shared worker pool) or the size of a dedicated pool
+    memory_budget = bytes the running batches may use together
+
+    The initial states are drawn uniformly from the initial set. A trajectory
+    is unsafe if one of its states x_0..x_t lies in an unsafe set. The dynamics
+    are compiled once per worker with lambdify; the batches only return their
+    counts. Returns the dict of monte_carlo.safety_estimate.
+    '''
+    if not (len(L_initial) == dim == len(U_initial) == len(L_space) == len(U_space) == len(x) == len(f)):
+        raise ValueError("length of arrays doesn't match dimensions!")
+
+    noise = _noise_sampler(noise_type, len(varsigma), mean, sigma, rate, a, b)
+    dynamics = Dynamics(f, x, varsigma)
+    arguments = (dynamics, noise, int(t), L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space)
+
+    start = time.perf_counter()
+    counts = run_batches(_simulate_batch, arguments, trajectories, batch_size, seed, max_workers, memory_budget,
+                         dim + len(varsigma))
+    return safety_estimate(counts, trajectories, time.perf_counter() - start, level, certified_confidence(result))
+
+
+def _noise_sampler(noise_type, noise_count, mean=None, sigma=None, rate=None, a=None, b=None):
+    '''(numpy Generator method name, keyword arguments) drawing the noise of every step'''
+    noise_type = _normalise_noise_type(noise_type)
+    if noise_type == "normal":
+        mean = np.zeros(noise_count) if mean is None else np.asarray(mean, dtype=np.double)
+        return "normal", {"loc": mean, "scale": np.asarray(sigma, dtype=np.double)}
+    if noise_type == "exponential":
+        return "exponential", {"scale": 1 / np.asarray(rate, dtype=np.double)}
+    return "uniform", {"low": np.asarray(a, dtype=np.double), "high": np.asarray(b, dtype=np.double)}
+
+
+def _simulate_batch(n, seed, dynamics, noise, steps, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space):
+    rng = np.random.default_rng(seed)
+    method, parameters = noise
+    noise_count = len(dynamics.symbol_groups[1])
+
+    states = sample_box(rng, L_initial, U_initial, n)
+    unsafe = in_boxes(states, L_unsafe, U_unsafe)
+    left = ~in_boxes(states, L_space, U_space)
+    for _ in range(steps):
+        draws = getattr(rng, method)(size=(n, noise_count), **parameters)
+        states = dynamics(states, draws)
+        unsafe |= in_boxes(states, L_unsafe, U_unsafe)
+        left |= ~in_boxes(states, L_space, U_space)
+    return {"unsafe": int(unsafe.sum()), "left": int(left.sum())}
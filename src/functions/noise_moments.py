@@ -0,0 +1,113 @@
+# IMPORTS FROM INSTALLS
+from functools import lru_cache
+from math import comb
+import numpy as np
+import sympy as sp
+
+# IMPORTS FROM TOOL
+from .doublefactorial import doublefactorial
+from .factorial import factorial
+
+NOISE_PARAMETERS = {
+    "normal": ("mean", "sigma"),
+    "exponential": ("rate",),
+    "uniform": ("a", "b"),
+}
+
+
+def noise_moment_table(noise_type, noise_count, max_order, mean=None, sigma=None, rate=None, a=None, b=None):
+    '''
+    =========================================
+    Raw moments E[varsigma_i^k] of every noise variable, for k = 0..max_order
+    =========================================
+    noise_type = "normal" or "gaussian", "exponential", "uniform"
+    noise_count = number of noise variables
+    max_order = highest moment order to tabulate
+    mean = means of normal/gaussian noise (zero if not given)
+    sigma = standard deviations of normal/gaussian noise
+    rate = exponential noise rate parameter
+    a = lower bound of integral for uniform noise
+    b = upper bound of integral for uniform noise
+
+    Returns a read-only numpy array of shape (noise_count, max_order + 1).
+    Rows are looked up per dimension in an LRU cache keyed on the distribution
+    and its parameters, so repeated calls within a process do not recompute them.
+    '''
+    noise_type = _normalise_noise_type(noise_type)
+    if mean is None:
+        mean = np.zeros(noise_count)
+    values = {"mean": mean, "sigma": sigma, "rate": rate, "a": a, "b": b}
+
+    rows = []
+    for i in range(noise_count):
+        parameters = tuple(float(values[name][i]) for name in NOISE_PARAMETERS[noise_type])
+        rows.append(distribution_moments(noise_type, parameters, max_order))
+
+    table = np.vstack(rows) if rows else np.ones((0, max_order + 1), dtype=np.double)
+    table.setflags(write=False)
+    return table
+
+
+@lru_cache(maxsize=1024)
+def distribution_moments(noise_type, parameters, max_order):
+    '''
+    =========================================
+    Cached raw moments of a single one-dimensional noise distribution
+    =========================================
+    noise_type = "normal", "exponential" or "uniform"
+    parameters = tuple of distribution parameters, ordered as in NOISE_PARAMETERS
+    max_order = highest moment order to tabulate
+    '''
+    row = np.array(_moments(noise_type, parameters, max_order), dtype=np.double)
+    row.setflags(write=False)
+    return row
+
+
+def exact_moment_table(noise_type, noise_count, max_order, mean=None, sigma=None, rate=None, a=None, b=None):
+    '''
+    =========================================
+    Raw moments E[varsigma_i^k] of every noise variable as exact rationals
+    =========================================
+    Arguments as in noise_moment_table. The parameters are taken at the exact
+    values of their double precision representation; returns a list of
+    noise_count lists of sympy Rationals, for k = 0..max_order.
+    '''
+    noise_type = _normalise_noise_type(noise_type)
+    if mean is None:
+        mean = np.zeros(noise_count)
+    values = {"mean": mean, "sigma": sigma, "rate": rate, "a": a, "b": b}
+    return [_moments(noise_type, tuple(sp.Rational(float(values[name][i])) for name in NOISE_PARAMETERS[noise_type]),
+                     max_order) for i in range(noise_count)]
+
+
+def _moments(noise_type, parameters, max_order):
+    '''Raw moments of orders 0..max_order, in the arithmetic of the parameters (floats or sympy Rationals)'''
+    orders = range(max_order + 1)
+    if noise_type == "normal":
+        # closed form: E[X^k] = sum_{j even} C(k, j) mean^(k-j) sigma^j (j-1)!!
+        mean, sigma = parameters
+        return [sum(comb(k, j) * mean ** (k - j) * sigma ** j * (doublefactorial(j - 1) if j else 1)
+                    for j in range(0, k + 1, 2)) for k in orders]
+    if noise_type == "exponential":
+        rate, = parameters
+        return [factorial(k) / (rate ** k) for k in orders]
+    a, b = parameters
+    return [(b ** (k + 1) - a ** (k + 1)) / ((k + 1) * (b - a)) for k in orders]
+
+
+def clear_noise_moment_cache():
+    '''
+    =========================================
+    Empty the moment cache (e.g. for benchmarks)
+    =========================================
+    '''
+    distribution_moments.cache_clear()
+
+
+def _normalise_noise_type(noise_type):
+    name = str(getattr(noise_type, "value", noise_type)).lower()
+    if name == "gaussian":
+        name = "normal"
+    if name not in NOISE_PARAMETERS:
+        raise Exception(f"Unrecognised NoiseType: {noise_type}")
+    return name
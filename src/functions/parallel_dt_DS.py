@@ -1,19 +1,17 @@
-# import time
-import sympy as sp
-import numpy as np
-from SumOfSquares import *
-import multiprocessing
-from functools import partial
-# import concurrent.futures
-from pebble import ProcessPool, ThreadPool
-from concurrent.futures import as_completed
-
 # IMPORTS FROM TOOL
 from src.functions.dt_DS import dt_DS
+from src.functions.prescreen import prescreened
+from src.functions.degree_ladder import degree_ladder
+from src.functions.degree_scheduler import Job, plan_degrees, run_degrees
+from src.functions.problem_size import estimate_problem_size, dynamics_degree
 
 
 def parallel_dt_DS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space, x, f, solver="mosek",
-                   gam=None, lam=None, l_degree=None):
+                   gam=None, lam=None, l_degree=None, backend="picos", basis_reduction=None,
+                   sparsity=None, prescreen=None, ladder=False, stopping="first_feasible",
+                   schedule=None, memory_budget=None, memory_limit=None,
+                   job_timeout=None, timeout=None, cancel_token=None,
+                   progress=None):
     """
     =========================================
     Calculate the barrier for the discrete-time Deterministic System (dt_DS)
@@ -32,15 +30,41 @@ def parallel_dt_DS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_sp
     gam = choose a value for gamma
     lam = choose a value for lambda_
     l_degree = degree of lagrangian multipliers
-    """
+    backend = "picos" (SumOfSquares/picos modelling) or "sparse" (direct sparse SDP assembly)
+    basis_reduction = None, "newton" (Newton polytope) or "diagonal" (Newton polytope and diagonal consistency)
+    sparsity = None or "correlative" (clique-restricted SOS from the chordal extension of f, sparse backend only)
+    prescreen = None, "dsos" or "sdsos": try the LP/SOCP relaxation first, full SOS only if it fails
+    ladder = solve the degrees in order in one worker and stop at the first barrier, so that the
+             higher degrees are never built (see degree_ladder)
+    stopping = "first_feasible" (default), "lowest_degree" (a barrier with every lower degree finished)
+               or None (every degree); the remaining degrees are cancelled and reported
+    schedule = None (all degrees at once) or "cost": order the jobs by estimated cost and share the
+               MOSEK threads by it (see plan_degrees)
+    memory_budget = bytes of estimated peak memory the running degrees may use together (None: no cap)
+    memory_limit = bytes each degree may allocate; a degree exceeding it fails alone with a
+                   "memory_limit" error, reported under "memory_limited_degrees" (see memory_limit)
+    job_timeout = seconds a degree may run before its worker is stopped (None: no limit)
+    timeout = seconds the whole search may take; the degrees still running then are stopped
+              and the best barrier found so far is returned. Stopped degrees are reported
+              under "timed_out_degrees"
+    cancel_token = CancellationToken (see cancellation): cancelling it stops the scheduling and
+                   terminates the workers of the running degrees, which are reported under
+                   "cancelled_degrees" (a "cancelled" error without a barrier)
+    progress = callable receiving the state of every degree as it changes (queued, building,
+               solving, done, failed or cancelled), in a thread of the caller (see progress)
 
-    multiprocessing.set_start_method("spawn")
+    The degrees run on the shared worker pool (see worker_pool), which stays up
+    between calls so that later searches skip the worker start-up.
+    """
 
     fixed_params = {
         'dim': dim,
         'L_initial': L_initial,
         'U_initial': U_initial,
         'l_degree': l_degree,
+        'backend': backend,
+        'basis_reduction': basis_reduction,
+        'sparsity': sparsity,
         'L_unsafe': L_unsafe,
         'U_unsafe': U_unsafe,
         'L_space': L_space,
@@ -57,27 +81,18 @@ def parallel_dt_DS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_sp
     
     degree_values = get_degree_values(b_degree)
 
-    results_dict = None
-
-    with ProcessPool() as pool:
-
-        futures = {pool.schedule(dt_DS, args=(degree,), kwargs=fixed_params): degree for degree in degree_values}
-
-        for future in as_completed(futures, timeout=None):
-            try:
-                result = future.result()
-            except Exception as exc:
-                print(f'Function raised an exception: {exc}')
-            else:
-                if result is not None:
-                    if "barrier" in result:
-                        results_dict = result
-                        pool.stop()
-                        pool.join(timeout=0)
-                        break
-                    elif "error" in result:
-                        print("Error in degree:", result['b_degree'], " -- ", result['error'])
-                    else:
-                        print("Error!", " -- Unknown error!")
+    # estimated size of each degree's program, for the cost-aware schedule
+    size_of = lambda degree: estimate_problem_size(dim, degree, l_degree, len(L_unsafe),
+                                                   dynamics_degree(x, f, degree, discrete=True),
+                                                   stochastic=False, backend=backend)
 
-    return results_dict
+    if ladder:
+        # a single worker climbs the degrees and stops at the first barrier
+        jobs = [Job(degree_values[-1], degree_ladder, (dt_DS, degree_values, prescreen, 0.0),
+                    fixed_params, 0)]
+    else:
+        jobs = [Job(degree, prescreened, (dt_DS, degree, prescreen), dict(fixed_params, threads=threads), memory)
+                for degree, threads, memory in plan_degrees(degree_values, size_of, schedule, stopping)]
+    # a deterministic barrier meets any confidence target
+    return run_degrees(jobs, degree_values, size_of, stopping, 0.0, ladder, memory_budget, memory_limit,
+                       job_timeout, timeout, cancel_token, progress)
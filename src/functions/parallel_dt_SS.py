@@ -1,19 +1,18 @@
-import time
-import sympy as sp
-import numpy as np
-from SumOfSquares import *
-import multiprocessing
-from functools import partial
-from pebble import ProcessPool, ThreadPool
-from concurrent.futures import as_completed
-
 # IMPORTS FROM TOOL
 from src.functions.dt_SS import dt_SS
+from src.functions.prescreen import prescreened
+from src.functions.degree_ladder import degree_ladder
+from src.functions.degree_scheduler import Job, plan_degrees, run_degrees
+from src.functions.problem_size import estimate_problem_size, dynamics_degree
 
 
 def parallel_dt_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space, x, varsigma, f,
                    t, noise_type="normal", optimize=False, solver="mosek", confidence=None, gam=None, lam=None,
-                   c_val=None, mean=None, sigma=None, rate=None, a=None, b=None, l_degree=None):
+                   c_val=None, mean=None, sigma=None, rate=None, a=None, b=None, l_degree=None,
+                   backend="picos", basis_reduction=None, prescreen=None, ladder=False,
+                   target_confidence=None, stopping=None, schedule=None, memory_budget=None,
+                   memory_limit=None, job_timeout=None, timeout=None,
+                   cancel_token=None, progress=None):
     '''
         =========================================
         Calculate the barrier for the discrete-time Stochastic System (dt_SS)
@@ -38,11 +37,37 @@ def parallel_dt_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_sp
         gam = chosen value for gamma
         lam = chosen value for lambda
         c_val = chosen c value (multiplied by time horizon in confidence)
-        sigma = standard deviations of normal/gaussian noise (mean assumed to be zero)
+        mean = means of normal/gaussian noise (zero if not given)
+        sigma = standard deviations of normal/gaussian noise
         rate = exponential noise rate parameter
         a = lower bound of integral for uniform noise
         b = upper bound of integral for uniform noise
         l_degree = degree of lagrangian multipliers
+        backend = "picos" (SumOfSquares/picos modelling) or "sparse" (direct sparse SDP assembly)
+        basis_reduction = None, "newton" (Newton polytope) or "diagonal" (Newton polytope and diagonal consistency)
+        prescreen = None, "dsos" or "sdsos": try the LP/SOCP relaxation first, full SOS only if it fails
+        ladder = solve the degrees in order in one worker, each warm started from the last barrier
+                 (sparse backend with cvxopt), up to target_confidence
+        target_confidence = stop once a barrier reaches this confidence (ladder mode or the "confidence" policy)
+        stopping = None (every degree, default), "first_feasible", "lowest_degree" (a barrier with every lower
+                   degree finished) or "confidence"; the remaining degrees are cancelled and reported
+        schedule = None (all degrees at once) or "cost": order the jobs by estimated cost and share the
+                   MOSEK threads by it (see plan_degrees)
+        memory_budget = bytes of estimated peak memory the running degrees may use together (None: no cap)
+        memory_limit = bytes each degree may allocate; a degree exceeding it fails alone with a
+                       "memory_limit" error, reported under "memory_limited_degrees" (see memory_limit)
+        job_timeout = seconds a degree may run before its worker is stopped (None: no limit)
+        timeout = seconds the whole search may take; the degrees still running then are stopped
+                  and the best barrier found so far is returned. Stopped degrees are reported
+                  under "timed_out_degrees"
+        cancel_token = CancellationToken (see cancellation): cancelling it stops the scheduling and
+                       terminates the workers of the running degrees, which are reported under
+                       "cancelled_degrees" (a "cancelled" error without a barrier)
+        progress = callable receiving the state of every degree as it changes (queued, building,
+                   solving, done, failed or cancelled), in a thread of the caller (see progress)
+
+        The degrees run on the shared worker pool (see worker_pool), which stays up
+        between calls so that later searches skip the worker start-up.
         '''
 
     fixed_params = {
@@ -69,36 +94,29 @@ def parallel_dt_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_sp
         'rate': rate,
         'a': a,
         'b': b,
-        'l_degree': l_degree
+        'l_degree': l_degree,
+        'backend': backend,
+        'basis_reduction': basis_reduction
     }
 
     get_degree_values = lambda b_degree: [x for x in range(2, b_degree+2, 2)] if b_degree % 2 == 0 else \
         [x for x in range(2, b_degree+1, 2)]
     
     degree_values = get_degree_values(b_degree)
-    results_list = []
-
-    with ProcessPool() as pool:
-        futures = {pool.schedule(dt_SS, args=(degree,), kwargs=fixed_params): degree for degree in degree_values}
-
-        for future in as_completed(futures, timeout=None):
-            try:
-                result = future.result()
-            except Exception as exc:
-                print(f'Function raised an exception: {exc}')
-            else:
-                if result is not None:
-                    if "barrier" in result:
-                        results_list.append(result)
-                    elif "error" in result:
-                        print("Error in degree:", result['b_degree'], " -- ", result['error'])
-                    else:
-                        print("Error!", " -- Unknown error!")
+    # estimated size of each degree's program, for the cost-aware schedule
+    size_of = lambda degree: estimate_problem_size(dim, degree, l_degree, len(L_unsafe),
+                                                   dynamics_degree(x, f, degree, discrete=True),
+                                                   stochastic=True, backend=backend)
 
-    if results_list:
-        highest_confidence_barrier = max(results_list, key=lambda x: x['confidence'])
-        return highest_confidence_barrier
-    # Do something with highest_confidence_barrier
+    if ladder:
+        # a single worker climbs the degrees, warm starting each rung from the last barrier
+        jobs = [Job(degree_values[-1], degree_ladder, (dt_SS, degree_values, prescreen, target_confidence),
+                    fixed_params, 0)]
     else:
-        print("No results with a barrier found.")
+        jobs = [Job(degree, prescreened, (dt_SS, degree, prescreen), dict(fixed_params, threads=threads), memory)
+                for degree, threads, memory in plan_degrees(degree_values, size_of, schedule, stopping)]
+    best_barrier = run_degrees(jobs, degree_values, size_of, stopping, target_confidence, ladder, memory_budget,
+                               memory_limit, job_timeout, timeout, cancel_token, progress)
+    if best_barrier is None:
         return {"error": "No results with a barrier found"}
+    return best_barrier
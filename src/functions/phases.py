@@ -0,0 +1,16 @@
+# IMPORTS FROM TOOL
+from .cancellation import checkpoint
+from .progress import phase_ended
+from .timings import lap
+
+
+def phase(name):
+    '''
+    End the current phase of the running engine as NAME (see timings.PHASES).
+    The phase is timed when timings were requested (see timings), the engine
+    stops here if it was cancelled (see cancellation), and otherwise reports
+    its progress (see progress).
+    '''
+    lap(name)
+    checkpoint()
+    phase_ended(name)
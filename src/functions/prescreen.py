@@ -0,0 +1,19 @@
+def prescreened(engine, b_degree, prescreen=None, **kwargs):
+    '''
+    =========================================
+    Run an engine on a cheap relaxation first and escalate to full SOS only when it fails
+    =========================================
+    engine = dt_DS, ct_DS, dt_SS or ct_SS
+    b_degree = degree of barrier polynomial
+    prescreen = None (full SOS only), "dsos" (LP) or "sdsos" (SOCP)
+    kwargs = remaining engine parameters
+
+    DSOS and SDSOS certificates are SOS certificates, so a barrier found by
+    the relaxation is returned as is, marked with the "relaxation" key.
+    '''
+    if prescreen is not None:
+        result = engine(b_degree, relaxation=prescreen, **kwargs)
+        if result is not None and "barrier" in result:
+            result["relaxation"] = prescreen
+            return result
+    return engine(b_degree, **kwargs)
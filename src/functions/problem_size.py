@@ -0,0 +1,72 @@
+# IMPORTS FROM INSTALLS
+from math import comb
+
+import sympy as sp
+
+# resident memory of a worker that has imported sympy, picos and the solvers
+BASE_MEMORY = 250 * 2 ** 20
+
+
+def _even(degree):
+    return degree + degree % 2
+
+
+def dynamics_degree(x, f, b_degree, discrete):
+    '''
+    Degree of B(f) (discrete time) or of the Lie derivative dB/dx f (continuous
+    time), from the largest total degree of the dynamics in x. Diffusion and
+    jump terms are not counted.
+    '''
+    f_degree = max([sp.Poly(fi, *x).total_degree() for fi in f] + [1])
+    return b_degree * f_degree if discrete else b_degree - 1 + f_degree
+
+
+def estimate_problem_size(dim, b_degree, l_degree=None, unsafe_regions=1, condition_degree=None,
+                          stochastic=False, backend="picos"):
+    '''
+    =========================================
+    Size of the barrier SOS program, predicted before building it
+    =========================================
+    dim = dimension of state space
+    b_degree = degree of barrier polynomial
+    l_degree = degree of lagrangian multipliers (defaults to b_degree)
+    unsafe_regions = number of unsafe sets
+    condition_degree = degree of the dynamics condition (see dynamics_degree), defaults to b_degree
+    stochastic = whether c is a level-set variable
+    backend = "picos" or "sparse" (multipliers parametrised by their Gram matrices, no extra equalities)
+
+    Assumes full Gram bases and free level sets. Returns a dict with the Gram
+    block sizes, the number of scalar variables and equality constraints, the
+    estimated peak memory of the worker in bytes and a relative cost (flops
+    of one interior-point iteration).
+    '''
+    l_degree = b_degree if l_degree is None else l_degree
+    condition_degree = b_degree if condition_degree is None else condition_degree
+    gram = lambda degree: comb(dim + _even(degree) // 2, _even(degree) // 2)
+    monomials = lambda degree: comb(dim + _even(degree), _even(degree))
+
+    # initial, unsafe, dynamics and barrier conditions; a multiplier times the quadratic g_i has degree l_degree + 2
+    conditions = [max(b_degree, l_degree + 2)] * (1 + unsafe_regions) + [max(condition_degree, l_degree + 2), b_degree]
+    multipliers = (2 + unsafe_regions) * dim
+
+    gram_blocks = [gram(degree) for degree in conditions] + [gram(l_degree)] * multipliers
+    equalities = [monomials(degree) for degree in conditions]
+    scalars = (3 if stochastic else 2) + comb(dim + b_degree, b_degree)
+    if backend == "picos":
+        # free multiplier coefficients, each matched against its own Gram matrix
+        equalities += [monomials(l_degree)] * multipliers
+        scalars += multipliers * comb(dim + l_degree, l_degree)
+
+    m = sum(equalities)
+    cost = m ** 3 / 3 + sum(mj * n ** 3 + mj ** 2 * n ** 2 for mj, n in zip(equalities, gram_blocks))
+    # dense Schur complement plus a few copies of every Gram block
+    memory = BASE_MEMORY + 8 * m ** 2 + 80 * sum(n ** 2 for n in gram_blocks)
+
+    return {
+        "gram_blocks": gram_blocks,
+        "scalars": scalars,
+        "equalities": m,
+        "columns": scalars + sum(n * (n + 1) // 2 for n in gram_blocks),
+        "memory": memory,
+        "cost": cost,
+    }
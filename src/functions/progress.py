@@ -0,0 +1,165 @@
+# IMPORTS FROM INSTALLS
+import contextvars
+import functools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# states of a degree, in the order they are reported
+QUEUED, BUILDING, SOLVING, DONE, FAILED, CANCELLED = "queued", "building", "solving", "done", "failed", "cancelled"
+STATES = (QUEUED, BUILDING, SOLVING, DONE, FAILED, CANCELLED)
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+# phases (see timings.PHASES) after which an engine has built its program and is solving it
+SOLVING_AFTER = ("constraints", "solver_compile", "solver_run", "extraction")
+
+_reporter = contextvars.ContextVar("progress_reporter", default=None)
+
+
+def progress_event(b_degree, state, **fields):
+    '''
+    A progress event: {"b_degree", "state", "time"} and optional fields such as
+    "phase" (the last phase finished), "elapsed" (seconds since the degree started), "gram_blocks" and
+    "gram_size" (estimated number and largest size of its Gram matrices) and "error".
+    '''
+    return {"b_degree": b_degree, "state": state, "time": time.time(), **fields}
+
+
+def _sender(progress):
+    '''Callable delivering events to PROGRESS: a callable, or a queue shared with the workers'''
+    return progress.put if hasattr(progress, "put") else progress
+
+
+class _Reporter:
+    def __init__(self, send, b_degree):
+        self.send = send
+        self.b_degree = b_degree
+        self.start = time.perf_counter()
+
+    def report(self, state, **fields):
+        try:
+            self.send(progress_event(self.b_degree, state, elapsed=round(time.perf_counter() - self.start, 3),
+                                     **fields))
+        except Exception as exc:
+            # a closed channel must not fail the computation
+            logger.debug(f"Progress event lost: {exc}")
+
+
+def phase_ended(phase):
+    '''Report the state of the running engine after PHASE (called by phases.phase)'''
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter.report(SOLVING if phase in SOLVING_AFTER else BUILDING, phase=phase)
+
+
+def reports_progress(engine):
+    '''
+    Let an engine report its progress. The engine gains a keyword argument
+    progress: a callable receiving progress events, or the queue of a
+    ProgressChannel when the engine runs in a worker. The engine reports
+    "building" when it starts and after every phase, "solving" once its program
+    is built, and "done" (barrier found) or "failed" when it returns.
+    '''
+
+    @functools.wraps(engine)
+    def wrapper(*args, progress=None, **kwargs):
+        if progress is None:
+            return engine(*args, **kwargs)
+
+        reporter = _Reporter(_sender(progress), args[0] if args else kwargs.get("b_degree"))
+        token = _reporter.set(reporter)
+        reporter.report(BUILDING)
+        try:
+            result = engine(*args, **kwargs)
+        except Exception as exc:
+            reporter.report(FAILED, error=f"{type(exc).__name__}: {exc}")
+            raise
+        finally:
+            _reporter.reset(token)
+        if isinstance(result, dict) and "barrier" in result:
+            reporter.report(DONE)
+        else:
+            reporter.report(FAILED, error=str(result.get("error", "no barrier")) if isinstance(result, dict)
+                            else "no barrier")
+        return result
+
+    return wrapper
+
+
+class ProgressChannel:
+    '''
+    Carries the progress events of a parallel function to CALLBACK, in a thread
+    of the calling process. The workers put their events on queue (a queue of
+    the shared manager, see worker_pool), the function itself reports the
+    degrees it queues or loses through report(). Degrees that have not finished
+    when the channel is closed are reported as cancelled. Without a callback
+    the channel does nothing.
+    '''
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.queue = None
+        self._thread = None
+        self._unfinished = set()
+        if callback is not None:
+            from .worker_pool import shared_manager
+
+            self.queue = shared_manager().Queue()
+            self._thread = threading.Thread(target=self._forward, daemon=True)
+            self._thread.start()
+
+    def _forward(self):
+        while True:
+            try:
+                event = self.queue.get()
+            except (EOFError, OSError):
+                # the manager was shut down
+                return
+            if event is None:
+                return
+            self._deliver(event)
+
+    def _deliver(self, event):
+        if event["state"] in FINAL_STATES:
+            self._unfinished.discard(event["b_degree"])
+        else:
+            self._unfinished.add(event["b_degree"])
+        try:
+            self.callback(event)
+        except Exception as exc:
+            logger.debug(f"Progress callback failed: {exc}")
+
+    def attach(self, jobs):
+        '''The jobs (see degree_scheduler.Job) with the channel's queue passed as progress'''
+        if self.queue is None:
+            return jobs
+        return [job._replace(kwargs=dict(job.kwargs, progress=self.queue)) for job in jobs]
+
+    def queue_degrees(self, degrees, size_of):
+        '''Report DEGREES as queued, with their estimated Gram matrices (size_of as in plan_degrees)'''
+        if self.queue is None:
+            return
+        for degree in degrees:
+            blocks = size_of(degree)["gram_blocks"]
+            self.report(degree, QUEUED, gram_blocks=len(blocks), gram_size=max(blocks, default=0))
+
+    def report(self, b_degree, state, **fields):
+        '''Report a degree from the calling process, after the events its worker sent so far'''
+        if self.queue is not None:
+            try:
+                self.queue.put(progress_event(b_degree, state, **fields))
+            except Exception as exc:
+                logger.debug(f"Progress event lost: {exc}")
+
+    def close(self):
+        '''Deliver the events sent so far and stop the channel'''
+        if self._thread is not None:
+            try:
+                self.queue.put(None)
+            except Exception as exc:
+                logger.debug(f"Progress channel closed early: {exc}")
+            self._thread.join(timeout=5)
+            self._thread = None
+            for degree in sorted(self._unfinished):
+                self._deliver(progress_event(degree, CANCELLED))
@@ -0,0 +1,202 @@
+# IMPORTS FROM INSTALLS
+import functools
+import glob
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pickle
+import tempfile
+import zlib
+
+import numpy as np
+import sympy as sp
+
+logger = logging.getLogger(__name__)
+
+# bump to drop every stored result after a change of the result format
+CACHE_VERSION = 1
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "protect")
+DEFAULT_MAX_MEGABYTES = 256
+# arguments that change how a problem is solved, not its solution
+IGNORED_ARGUMENTS = ("threads",)
+# result entries measured by the run (see memory_limit and timings) rather than part of the solution
+RUN_KEYS = ("peak_memory", "timings")
+SUFFIX = ".pkl.z"
+
+_MISS = object()
+
+
+def canonical(value):
+    '''
+    JSON-serialisable form of an engine argument: expressions are expanded (so that
+    x1*(x2 + 1) and x1*x2 + x1 agree), numbers become floats and arrays nested lists.
+    '''
+    if isinstance(value, sp.Expr):
+        return ["expr", sp.srepr(sp.expand(value))]
+    if isinstance(value, sp.Basic):
+        return ["sympy", sp.srepr(value)]
+    if isinstance(value, np.ndarray):
+        return canonical(value.tolist())
+    if isinstance(value, (bool, np.bool_)) or value is None or isinstance(value, str):
+        return value if not isinstance(value, np.bool_) else bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return [canonical(v) for v in value]
+    if isinstance(value, dict):
+        return [[str(k), canonical(v)] for k, v in sorted(value.items(), key=lambda item: str(item[0]))]
+    return ["repr", repr(value)]
+
+
+@functools.lru_cache(maxsize=None)
+def code_fingerprint():
+    '''Hash of the barrier synthesis sources, so that an edited engine never returns stale results'''
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def problem_key(engine_name, arguments):
+    '''Content hash of an engine call, from its bound arguments'''
+    problem = {name: canonical(value) for name, value in arguments.items() if name not in IGNORED_ARGUMENTS}
+    text = json.dumps([CACHE_VERSION, code_fingerprint(), engine_name, problem], sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultCache:
+    '''
+    Size-bounded on-disk store of engine results, one zlib-compressed pickle per
+    problem key. Entries are written to a temporary file and renamed into place,
+    so concurrent processes never read a partial entry; a hit refreshes the
+    entry's modification time, and stores evict the least recently used entries
+    once the directory exceeds MAX_BYTES.
+    '''
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_MEGABYTES * 2 ** 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                result = pickle.loads(zlib.decompress(file.read()))
+        except FileNotFoundError:
+            return default
+        except Exception as exc:
+            # truncated or written by an incompatible version: drop it
+            logger.debug(f"Discarding unreadable cache entry {path}: {exc}")
+            self._remove(path)
+            return default
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key, result):
+        try:
+            data = zlib.compress(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception as exc:
+            logger.debug(f"Result not cached: {exc}")
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temporary, self._path(key))
+        except OSError as exc:
+            logger.debug(f"Result not cached: {exc}")
+            self._remove(temporary)
+            return
+        self.evict()
+
+    def entries(self):
+        '''(path, size, last use) of every entry, least recently used first'''
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*" + SUFFIX)):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def result_cache():
+    '''
+    Cache configured by the environment, or None when disabled: caching is
+    off unless PROTECT_CACHE=1, PROTECT_CACHE_DIR moves it from
+    ~/.cache/protect and PROTECT_CACHE_SIZE bounds it in MiB (default 256).
+    '''
+    if os.environ.get("PROTECT_CACHE", "0").lower() not in ("1", "true", "on", "yes"):
+        return None
+    directory = os.environ.get("PROTECT_CACHE_DIR") or DEFAULT_DIRECTORY
+    max_bytes = float(os.environ.get("PROTECT_CACHE_SIZE", DEFAULT_MAX_MEGABYTES)) * 2 ** 20
+    return ResultCache(directory, max_bytes)
+
+
+def cached(engine):
+    '''
+    Put the result cache in front of an engine, which gains a keyword argument
+    cache (default True; False bypasses the cache). Only results with a barrier
+    are stored: a failure may come from the run rather than the problem (a
+    missing licence, a memory limit, a solver crash, a cancellation) and has to
+    be retried. Warm-started calls are not cached, since their result carries
+    the solver state of the previous degree, nor are timed calls (see timings),
+    which are meant to measure the solve. The measurements of the run (RUN_KEYS)
+    are not stored, and a result served from the cache has "cached": True.
+    '''
+    signature = inspect.signature(engine)
+
+    @functools.wraps(engine)
+    def wrapper(*args, cache=True, **kwargs):
+        store = result_cache() if cache else None
+        if store is None or kwargs.get("timings") or kwargs.get("timing_sink") is not None:
+            return engine(*args, **kwargs)
+        # options of the decorators below (timings, memory_limit) are not part of the problem
+        problem = {name: value for name, value in kwargs.items() if name in signature.parameters}
+        arguments = signature.bind(*args, **problem)
+        arguments.apply_defaults()
+        if arguments.arguments.get("warm_start") is not None:
+            return engine(*args, **kwargs)
+
+        key = problem_key(engine.__name__, arguments.arguments)
+        result = store.get(key, _MISS)
+        if result is not _MISS:
+            logger.debug(f"{engine.__name__}: result cache hit {key[:12]}")
+            return dict(result, cached=True)
+        result = engine(*args, **kwargs)
+        if isinstance(result, dict) and "barrier" in result:
+            store.put(key, {name: value for name, value in result.items() if name not in RUN_KEYS})
+        return result
+
+    return wrapper
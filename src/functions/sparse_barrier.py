@@ -0,0 +1,275 @@
+# IMPORTS FROM INSTALLS
+import numpy as np
+
+# IMPORTS FROM TOOL
+from .chordal import correlative_cliques
+from .generate_polynomial import generate_polynomial
+from .memory_limit import out_of_memory
+from .moment_substitution import expected_terms
+from .noise_moments import noise_moment_table
+from .sparse_polynomial import AffinePolynomial, PowerProducts, monomial_generator, polynomial_from_expr
+from .sparse_sos import SparseSOSProgram, SolverFailure
+from .phases import phase
+from .timings import span
+
+
+def sparse_dt_DS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space, x, f,
+                 solver="mosek", gam=None, lam=None, l_degree=None, basis_reduction=None, sparsity=None,
+                 relaxation="sos", warm_start=None, threads=None):
+    '''
+    =========================================
+    dt_DS on the direct sparse SDP backend (same parameters and result as dt_DS)
+    =========================================
+    '''
+    powers = PowerProducts([polynomial_from_expr(fi, x) for fi in f], dim)
+    return _sparse_barrier(powers, True, False, b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe,
+                           L_space, U_space, x, f, solver, gam, lam, l_degree, basis_reduction,
+                           cliques=_cliques(x, f, sparsity), relaxation=relaxation, warm_start=warm_start,
+                           threads=threads)
+
+
+def sparse_ct_DS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space, x, f,
+                 solver="mosek", gam=None, lam=None, l_degree=None, basis_reduction=None, sparsity=None,
+                 relaxation="sos", warm_start=None, threads=None):
+    '''
+    =========================================
+    ct_DS on the direct sparse SDP backend (same parameters and result as ct_DS)
+    =========================================
+    '''
+    lie_derivative = monomial_generator(x, f)
+    return _sparse_barrier(lie_derivative, False, False, b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe,
+                           L_space, U_space, x, f, solver, gam, lam, l_degree, basis_reduction,
+                           cliques=_cliques(x, f, sparsity), relaxation=relaxation, warm_start=warm_start,
+                           threads=threads)
+
+
+def sparse_dt_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space, x, varsigma, f,
+                 t, noise_type="normal", optimize=False, solver="mosek", confidence=None, gam=None, lam=None,
+                 c_val=None, mean=None, sigma=None, rate=None, a=None, b=None, l_degree=None,
+                 basis_reduction=None, relaxation="sos", warm_start=None, threads=None):
+    '''
+    =========================================
+    dt_SS on the direct sparse SDP backend (same parameters and result as dt_SS)
+    =========================================
+    '''
+    gens = list(x) + list(varsigma)
+    dynamics = [polynomial_from_expr(fi, gens) for fi in f]
+    max_order = b_degree * max([sum(m[dim:]) for fi in dynamics for m in fi] + [0])
+    moments = noise_moment_table(noise_type, len(varsigma), max_order, mean, sigma, rate, a, b)
+    powers = PowerProducts(dynamics, len(gens))
+    noise_columns = np.arange(dim, len(gens))
+
+    def expectation(alpha):
+        # E[f(x,varsigma)^alpha] as a polynomial in x
+        power = powers(alpha)
+        with span("moments"):
+            exponents, values = expected_terms(list(power.keys()), list(power.values()), noise_columns, moments)
+        return dict(zip(map(tuple, exponents.tolist()), values.tolist()))
+
+    return _sparse_barrier(expectation, True, True, b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe,
+                           L_space, U_space, x, f, solver, gam, lam, l_degree, basis_reduction, c_val=c_val, t=t,
+                           confidence=confidence, optimize=optimize, lambda_positive=True, relaxation=relaxation,
+                           warm_start=warm_start, threads=threads)
+
+
+def sparse_ct_SS(b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space, x, f, delta, rho,
+                 p_rate, t, optimize=False, solver="mosek", confidence=None, gam=None, lam=None, c_val=None,
+                 l_degree=None, basis_reduction=None, relaxation="sos", warm_start=None, threads=None):
+    '''
+    =========================================
+    ct_SS on the direct sparse SDP backend (same parameters and result as ct_SS)
+    =========================================
+    '''
+    if not (len(delta) == dim == len(rho)):
+        raise ValueError("length of arrays doesn't match dimensions!")
+    generator = monomial_generator(x, f, delta, rho, p_rate)
+    return _sparse_barrier(generator, False, True, b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe,
+                           L_space, U_space, x, f, solver, gam, lam, l_degree, basis_reduction, c_val=c_val, t=t,
+                           confidence=confidence, optimize=optimize, relaxation=relaxation, warm_start=warm_start,
+                           threads=threads)
+
+
+def _cliques(x, f, sparsity):
+    '''Variable cliques for the sparsity mode: None (dense) or "correlative" (chordal extension of f)'''
+    if sparsity is None:
+        return None
+    if sparsity == "correlative":
+        return correlative_cliques(x, f)
+    raise ValueError(f"Unrecognised sparsity mode: {sparsity}")
+
+
+def _level_sets(program, dim, gam, lam, c_val, t, confidence, stochastic, lambda_positive):
+    '''
+    Scalar level-set variables and their constraints, with the same checks as
+    the picos engines. Raises an Exception for inconsistent user values.
+    '''
+    if gam is None:
+        gamma = program.add_scalar()
+        program.add_constraint(gamma)
+    else:
+        if gam < 0:
+            raise Exception("Gamma is less than zero!")
+        gamma = gam
+
+    c = 0
+    if stochastic:
+        if c_val is None:
+            c = program.add_scalar()
+            program.add_constraint(c)
+        else:
+            if c_val < 0:
+                raise Exception("c is less than zero!")
+            c = c_val
+
+    if lam is None:
+        lambda_ = program.add_scalar()
+        program.add_constraint(lambda_)
+    else:
+        if lam < 0 or (lambda_positive and lam == 0):
+            raise Exception("Lambda is less than or equal to zero!")
+        lambda_ = lam
+
+    if gam is None or lam is None or (stochastic and c_val is None):
+        factor = 1 if (not stochastic or confidence is None or confidence == 0) else 1 - confidence
+        # with every level set free the program is homogeneous: the strict inequality is
+        # normalised to >= 1, which excludes the trivial all-zero solution
+        margin = 1.0 if gam is None and lam is None and (not stochastic or c_val is None) else 0.0
+        program.add_constraint(lambda_ * factor - gamma - c * (t if stochastic else 0) - margin)
+    else:
+        if lam <= gam:
+            raise Exception("User defined lambda value is less than user defined gamma!")
+        elif stochastic and lam <= gam + c_val * t:
+            raise Exception("User defined parameters will give confidence less than 0!")
+
+    return gamma, lambda_, c
+
+
+def _sparse_barrier(operator, discrete, stochastic, b_degree, dim, L_initial, U_initial, L_unsafe, U_unsafe,
+                    L_space, U_space, x, f, solver, gam, lam, l_degree, basis_reduction, c_val=None, t=None,
+                    confidence=None, optimize=False, lambda_positive=False, cliques=None, relaxation="sos",
+                    warm_start=None, threads=None):
+    result = {}
+    result['b_degree'] = b_degree
+
+    # check array values are correct length
+    if not (len(L_initial) == dim == len(U_initial) == len(L_space) == len(U_space) == len(x) == len(f)):
+        raise ValueError("length of arrays doesn't match dimensions!")
+
+    # set default l_degree value
+    if l_degree is None:
+        l_degree = b_degree
+
+    # Get number of avoid regions
+    avoid_regions = len(L_unsafe)
+    if len(L_unsafe) != len(U_unsafe):
+        raise ValueError("Unsafe regions were not defined correctly.")
+
+    # ========================= Computing g =========================
+    g0 = [polynomial_from_expr(g, x) for g in generate_polynomial(x, L_initial, U_initial)]
+    g1 = [[polynomial_from_expr(g, x) for g in generate_polynomial(x, L_unsafe[i], U_unsafe[i])]
+          for i in range(avoid_regions)]
+    g = [polynomial_from_expr(g, x) for g in generate_polynomial(x, L_space, U_space)]
+    phase("sets")
+
+    program = SparseSOSProgram(dim, relaxation)
+    Barrier = program.add_polynomial(b_degree, cliques)
+
+    try:
+        gamma, lambda_, c = _level_sets(program, dim, gam, lam, c_val, t, confidence, stochastic, lambda_positive)
+    except Exception:
+        if stochastic:
+            return {"error": "Gamma, Lambda, or c value definition issues", "b_degree": b_degree}
+        return {"error": "Gamma or Lambda definition issues", "b_degree": b_degree}
+    phase("multipliers")
+
+    # ========================= Dynamics =========================
+    Barrier_f = Barrier.apply(operator)
+    phase("generator")
+
+    # ========================= Constraints and Lagrangians =========================
+    try:
+        # SOS multipliers are parametrised directly by their Gram matrices; with cliques,
+        # the multiplier of g_i only depends on the variables of a clique containing x_i
+        variables = [None] * dim if cliques is None else [next(c for c in cliques if i in c) for i in range(dim)]
+        L0 = [program.add_sos_polynomial(l_degree, variables=variables[i])[0] for i in range(dim)]
+        L1 = [[program.add_sos_polynomial(l_degree, variables=variables[i])[0] for i in range(dim)]
+              for _ in range(avoid_regions)]
+        L = [program.add_sos_polynomial(l_degree, variables=variables[i])[0] for i in range(dim)]
+        phase("multipliers")
+
+        conditions = [program.add_sos_constraint(-Barrier - sum(Li.times(gi) for Li, gi in zip(L0, g0)) + gamma,
+                                                 "initial", basis_reduction, cliques)]
+        for i in range(avoid_regions):
+            conditions.append(program.add_sos_constraint(
+                Barrier - sum(Li.times(gi) for Li, gi in zip(L1[i], g1[i])) - lambda_,
+                "unsafe" + str(i + 1), basis_reduction, cliques))
+
+        last = -Barrier_f - sum(Li.times(gi) for Li, gi in zip(L, g)) + c
+        if discrete:
+            last = last + Barrier
+        conditions.append(program.add_sos_constraint(last, "dynamics", basis_reduction, cliques))
+
+        barrier_constraint = program.add_sos_constraint(Barrier, "barrier", basis_reduction, cliques)
+        conditions.append(barrier_constraint)
+    except AssertionError:
+        return {"error": "AssertionError (probably odd b_degree)", "b_degree": b_degree}
+
+    # ========================= Optimization ==================
+    if optimize:
+        if lam is None:
+            return {"error": "lambda_ is None", "b_degree": b_degree}
+        program.set_objective((gamma + c * t) * (1 / lambda_) + AffinePolynomial(dim))
+    elif gam is None and lam is None and not stochastic:
+        # the normalised feasible set is an unbounded cone; pinning its scale keeps
+        # the interior-point iterates bounded
+        program.set_objective(lambda_)
+
+    phase("constraints")
+
+    # ========================= Solve =========================
+    try:
+        # the DSOS (LP) and SDSOS (SOCP) relaxations are always solved with cvxopt
+        program.solve(solver=solver if relaxation == "sos" else "cvxopt", warm_start=warm_start, threads=threads)
+    except SolverFailure:
+        return {"error": "SolutionFailure", "b_degree": b_degree}
+    except Exception as exc:
+        if out_of_memory(exc):
+            # reported by memory_limited
+            raise MemoryError(str(exc)) from exc
+        return {"error": "Solver Exception", "b_degree": b_degree}
+    finally:
+        # assembling the matrices; the solver call itself is timed as solver_run
+        phase("solver_compile")
+
+    # ========================= Results =========================
+    decomposition = barrier_constraint.get_sos_decomp(x)
+    phase("extraction")
+    if len(decomposition.free_symbols) == 0:
+        return {"error": "barrier is scalar!", "b_degree": b_degree}
+    result["barrier"] = sum(decomposition)
+    if basis_reduction is not None or cliques is not None:
+        # (full, reduced) Gram matrix size per condition; the multipliers are free and not reduced
+        result["gram_sizes"] = {condition.name: (condition.full_size, len(condition)) for condition in conditions}
+    if cliques is not None:
+        result["cliques"] = [[str(x[i]) for i in clique] for clique in cliques]
+    if warm_start is not None:
+        # the solution keyed by column label, to warm start the next degree (see degree_ladder)
+        result["warm_start"] = program.solution_map()
+        result["iterations"] = program.iterations
+
+    result["gamma"] = program.value(gamma) if gam is None else gam
+    result["lambda"] = program.value(lambda_) if lam is None else lam
+    if stochastic:
+        result["c"] = program.value(c) if c_val is None else c_val
+        try:
+            result["confidence"] = 1 - (result['gamma'] + result['c'] * t) / result['lambda']
+        except ZeroDivisionError:
+            return {"error": "Divide by zero error", "b_degree": b_degree}
+
+    if result["lambda"] > result["gamma"] and result["lambda"] > 0 and result["gamma"] > 0 \
+            and (not stochastic or result["c"] > 0):
+        return result
+    elif result["lambda"] <= result["gamma"]:
+        return {"error": "lambda not greater than gamma", "b_degree": b_degree}
+    else:
+        return {"error": "numerical error on level sets e.g. negative value", "b_degree": b_degree}
@@ -0,0 +1,269 @@
+# IMPORTS FROM INSTALLS
+from itertools import combinations_with_replacement
+import numpy as np
+import sympy as sp
+
+
+def monomial_basis(dim, degree):
+    '''
+    =========================================
+    Exponents of all monomials in dim variables up to the given total degree
+    =========================================
+    dim = number of variables
+    degree = maximal total degree
+
+    Returns an integer numpy array of shape (monomials, dim), graded by degree.
+    '''
+    rows = []
+    for d in range(degree + 1):
+        for combo in combinations_with_replacement(range(dim), d):
+            row = [0] * dim
+            for i in combo:
+                row[i] += 1
+            rows.append(row)
+    return np.array(rows, dtype=np.int64).reshape(-1, dim)
+
+
+def clique_basis(dim, clique, degree):
+    '''
+    =========================================
+    Exponents of all monomials in the clique variables up to the given total degree
+    =========================================
+    dim = number of variables
+    clique = indices of the variables the monomials may depend on
+    degree = maximal total degree
+
+    Returns an integer numpy array of shape (monomials, dim), graded by degree.
+    '''
+    local = monomial_basis(len(clique), degree)
+    basis = np.zeros((len(local), dim), dtype=np.int64)
+    basis[:, list(clique)] = local
+    return basis
+
+
+def polynomial_from_expr(expr, gens):
+    '''
+    =========================================
+    Convert a sympy polynomial expression to a {exponent tuple: float} dictionary
+    =========================================
+    expr = sympy expression (or number) polynomial in gens
+    gens = list of sympy variables
+    '''
+    poly = sp.Poly(sp.sympify(expr), *gens)
+    return {monom: float(coeff) for monom, coeff in poly.terms() if coeff != 0}
+
+
+def polynomial_mul(p, q):
+    '''
+    =========================================
+    Product of two {exponent tuple: float} polynomials
+    =========================================
+    '''
+    result = {}
+    for mp, cp in p.items():
+        for mq, cq in q.items():
+            monom = tuple(a + b for a, b in zip(mp, mq))
+            result[monom] = result.get(monom, 0.0) + cp * cq
+    return result
+
+
+def polynomial_add(p, q, scale=1.0):
+    '''
+    =========================================
+    p + scale * q for {exponent tuple: float} polynomials
+    =========================================
+    '''
+    result = dict(p)
+    for monom, coeff in q.items():
+        result[monom] = result.get(monom, 0.0) + scale * coeff
+    return result
+
+
+class PowerProducts:
+    '''
+    Cache of the products prod_i p_i^alpha_i of a list of numeric polynomials,
+    built incrementally so that every product reuses a smaller one.
+    '''
+
+    def __init__(self, polynomials, nvars):
+        self.polynomials = polynomials
+        self._cache = {(0,) * len(polynomials): {(0,) * nvars: 1.0}}
+
+    def __call__(self, alpha):
+        alpha = tuple(int(a) for a in alpha)
+        if alpha not in self._cache:
+            k = max(i for i, a in enumerate(alpha) if a)
+            lower = alpha[:k] + (alpha[k] - 1,) + alpha[k + 1:]
+            self._cache[alpha] = polynomial_mul(self(lower), self.polynomials[k])
+        return self._cache[alpha]
+
+
+def monomial_generator(x, f, delta=None, rho=None, p_rate=None):
+    '''
+    =========================================
+    Monomial-wise (infinitesimal) generator of a continuous-time system
+    =========================================
+    x = list of sympy variables
+    f = numpy array of dynamics functions (drift)
+    delta = numpy array of diffusion term for brownian (ct_SS only)
+    rho = numpy array of reset term, for poisson (ct_SS only)
+    p_rate = numpy array of poisson rate values (ct_SS only)
+
+    Returns a function taking an exponent tuple alpha to the {exponent tuple: float}
+    polynomial of the generator applied to x^alpha: the Lie derivative along f plus,
+    with delta, the Brownian and Poisson terms of ct_SS.
+    '''
+    dim = len(x)
+    unit = [tuple(int(i == j) for j in range(dim)) for i in range(dim)]
+    drift = [polynomial_from_expr(fi, x) for fi in f]
+
+    diffusion = []
+    jumps = []
+    if delta is not None:
+        # same weighting as trace((delta^T delta) * Hessian) in ct_SS
+        W = np.transpose(delta) @ delta
+        diffusion = [polynomial_from_expr(W[i][i] if np.ndim(W) == 2 else W, x) for i in range(dim)]
+        jumps = [PowerProducts([polynomial_add({unit[j]: 1.0}, polynomial_from_expr(rho[j], x))], dim)
+                 if p_rate[j] != 0 else None for j in range(dim)]
+
+    def shifted(alpha, i, k):
+        return tuple(a - k if j == i else a for j, a in enumerate(alpha))
+
+    def generator(alpha):
+        result = {}
+        for i in range(dim):
+            if alpha[i]:
+                result = polynomial_add(result, polynomial_mul({shifted(alpha, i, 1): 1.0}, drift[i]), alpha[i])
+            if diffusion and alpha[i] >= 2:
+                result = polynomial_add(result, polynomial_mul({shifted(alpha, i, 2): 1.0}, diffusion[i]),
+                                        0.5 * alpha[i] * (alpha[i] - 1))
+        for j in range(len(jumps)):
+            if jumps[j] is not None:
+                jump = polynomial_mul({shifted(alpha, j, alpha[j]): 1.0}, jumps[j]((alpha[j],)))
+                result = polynomial_add(polynomial_add(result, jump, p_rate[j]), {alpha: 1.0}, -p_rate[j])
+        return result
+
+    return generator
+
+
+class AffinePolynomial:
+    '''
+    Polynomial in x whose coefficients are affine in the decision variables of
+    a SparseSOSProgram, stored as COO triplets (monomial exponent, column, value).
+    Column -1 holds the constant part of a coefficient.
+    '''
+
+    def __init__(self, dim, exponents=None, columns=None, values=None):
+        self.dim = dim
+        self.exponents = np.zeros((0, dim), dtype=np.int64) if exponents is None \
+            else np.asarray(exponents, dtype=np.int64).reshape(-1, dim)
+        self.columns = np.zeros(0, dtype=np.int64) if columns is None else np.asarray(columns, dtype=np.int64)
+        self.values = np.zeros(0, dtype=np.double) if values is None else np.asarray(values, dtype=np.double)
+
+    @classmethod
+    def constant(cls, dim, value):
+        return cls(dim, np.zeros((1, dim)), [-1], [float(value)])
+
+    @classmethod
+    def variable(cls, dim, column, value=1.0):
+        return cls(dim, np.zeros((1, dim)), [column], [value])
+
+    @classmethod
+    def from_numeric(cls, dim, poly):
+        if not poly:
+            return cls(dim)
+        return cls(dim, list(poly.keys()), np.full(len(poly), -1), list(poly.values()))
+
+    def __len__(self):
+        return len(self.values)
+
+    def degree(self):
+        return int(self.exponents.sum(axis=1).max()) if len(self) else 0
+
+    def _coerce(self, other):
+        if isinstance(other, AffinePolynomial):
+            return other
+        return AffinePolynomial.constant(self.dim, other)
+
+    def __add__(self, other):
+        other = self._coerce(other)
+        return AffinePolynomial(self.dim, np.vstack([self.exponents, other.exponents]),
+                                np.concatenate([self.columns, other.columns]),
+                                np.concatenate([self.values, other.values]))
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return AffinePolynomial(self.dim, self.exponents, self.columns, -self.values)
+
+    def __sub__(self, other):
+        return self + (-self._coerce(other))
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, other):
+        if isinstance(other, dict):
+            return self.times(other)
+        return AffinePolynomial(self.dim, self.exponents, self.columns, self.values * float(other))
+
+    __rmul__ = __mul__
+
+    def times(self, poly):
+        '''Product with a numeric {exponent tuple: float} polynomial'''
+        if not poly or not len(self):
+            return AffinePolynomial(self.dim)
+        exps = np.array(list(poly.keys()), dtype=np.int64)
+        coeffs = np.array(list(poly.values()), dtype=np.double)
+        return AffinePolynomial(self.dim,
+                                (self.exponents[:, None, :] + exps[None, :, :]).reshape(-1, self.dim),
+                                np.repeat(self.columns, len(coeffs)),
+                                (self.values[:, None] * coeffs[None, :]).ravel())
+
+    def apply(self, operator, dim=None):
+        '''
+        Apply a linear operator given monomial-wise: operator(exponent tuple)
+        returns the numeric polynomial (possibly in dim variables) that x^exponent maps to.
+        '''
+        dim = self.dim if dim is None else dim
+        if not len(self):
+            return AffinePolynomial(dim)
+        monoms, inverse = np.unique(self.exponents, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        images = [operator(tuple(int(e) for e in m)) for m in monoms]
+        image_exps = [np.array(list(p.keys()), dtype=np.int64).reshape(-1, dim) for p in images]
+        image_coeffs = [np.array(list(p.values()), dtype=np.double) for p in images]
+        sizes = np.array([len(c) for c in image_coeffs])
+
+        # every triplet is repeated once per term of the image of its monomial
+        repeats = sizes[inverse]
+        starts = np.concatenate([[0], np.cumsum(sizes)])[inverse]
+        offsets = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        flat = np.repeat(starts, repeats) + offsets
+        all_exps = np.vstack(image_exps) if len(image_exps) else np.zeros((0, dim), dtype=np.int64)
+        all_coeffs = np.concatenate(image_coeffs) if len(image_coeffs) else np.zeros(0)
+        return AffinePolynomial(dim, all_exps[flat], np.repeat(self.columns, repeats),
+                                np.repeat(self.values, repeats) * all_coeffs[flat])
+
+    def collect(self):
+        '''Merge duplicate (monomial, column) triplets and drop zero entries'''
+        if not len(self):
+            return AffinePolynomial(self.dim)
+        keys = np.hstack([self.exponents, self.columns[:, None]])
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        values = np.bincount(inverse.ravel(), weights=self.values, minlength=len(unique))
+        nonzero = values != 0
+        return AffinePolynomial(self.dim, unique[nonzero, :-1], unique[nonzero, -1], values[nonzero])
+
+    def monomials(self):
+        '''Distinct monomial exponents with a nonzero coefficient'''
+        return np.unique(self.collect().exponents, axis=0)
+
+    def value(self, solution):
+        '''Numeric {exponent tuple: float} polynomial for a vector of decision variable values'''
+        collected = self.collect()
+        extended = np.append(np.asarray(solution, dtype=np.double), 1.0)
+        result = {}
+        for monom, column, v in zip(map(tuple, collected.exponents), collected.columns, collected.values):
+            result[monom] = result.get(monom, 0.0) + v * extended[column]
+        return result
@@ -0,0 +1,488 @@
+# IMPORTS FROM INSTALLS
+import numpy as np
+import sympy as sp
+from SumOfSquares import round_sympy_expr
+
+# IMPORTS FROM TOOL
+from .basis_reduction import reduce_basis
+from .sparse_polynomial import AffinePolynomial, clique_basis, monomial_basis
+from .timings import span
+
+
+class SolverFailure(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class SparseSOSConstraint:
+    '''
+    Gram matrix block of a SparseSOSProgram: p(x) = z(x)^T Q z(x) with Q >> 0,
+    where z is the monomial basis. Q is stored as the upper triangle
+    (row-major) in columns offset..offset + n(n+1)/2 of the program.
+    '''
+
+    def __init__(self, name, basis, offset):
+        self.name = name
+        self.basis = basis
+        self.offset = offset
+        self.rows, self.cols = np.triu_indices(len(basis))
+        self.full_size = len(basis)
+        self.Qval = None
+
+    def __len__(self):
+        return len(self.basis)
+
+    @property
+    def num_columns(self):
+        return len(self.rows)
+
+    def polynomial(self):
+        '''z^T Q z as an AffinePolynomial'''
+        dim = self.basis.shape[1]
+        return AffinePolynomial(dim, self.basis[self.rows] + self.basis[self.cols],
+                                self.offset + np.arange(self.num_columns),
+                                np.where(self.rows == self.cols, 1.0, 2.0))
+
+    def set_value(self, solution):
+        n = len(self)
+        Q = np.zeros((n, n))
+        Q[self.rows, self.cols] = solution[self.offset:self.offset + self.num_columns]
+        Q[self.cols, self.rows] = Q[self.rows, self.cols]
+        self.Qval = Q
+
+    def get_sos_decomp(self, x, precision=3):
+        '''Vector of squares summing to the constrained polynomial (as in SumOfSquares)'''
+        mineig = min(min(np.linalg.eigh(self.Qval)[0]), 0)
+        L = sp.Matrix(np.linalg.cholesky(self.Qval - np.eye(len(self)) * mineig * 1.1))
+        b = sp.Matrix([sp.Mul(*[xi ** int(e) for xi, e in zip(x, monom)]) for monom in self.basis])
+        S = (L.T @ b).applyfunc(lambda v: v ** 2)
+        return round_sympy_expr(S, precision)
+
+
+class SparseCliqueSOSConstraint:
+    '''
+    Sum of clique-restricted Gram blocks, p(x) = sum_k z_k(x)^T Q_k z_k(x),
+    where z_k only involves the variables of clique k (correlative sparsity).
+    '''
+
+    def __init__(self, name, grams, full_size):
+        self.name = name
+        self.grams = grams
+        self.full_size = full_size
+
+    def __len__(self):
+        # the largest block, which drives the cost of the semidefinite constraint
+        return max((len(gram) for gram in self.grams), default=0)
+
+    def get_sos_decomp(self, x, precision=3):
+        return sp.Matrix.vstack(*[gram.get_sos_decomp(x, precision) for gram in self.grams])
+
+
+class SparseSOSProgram:
+    '''
+    Sum of squares program assembled directly into sparse (COO) matrices.
+
+    Polynomials are AffinePolynomial objects over the program columns; SOS
+    constraints are matched coefficient-wise against Gram blocks indexed by
+    monomial exponents, so no sympy object is created per coefficient. The
+    resulting conic problem is passed to cvxopt or MOSEK.
+    '''
+
+    def __init__(self, dim, relaxation="sos"):
+        self.dim = dim
+        self.relaxation = relaxation
+        self.num_columns = 0
+        self.grams = []
+        self._equalities = []
+        self._inequalities = []
+        self._objective = None
+        self.solution = None
+        self.iterations = None
+        # stable label of every column, e.g. (gram name, row monomial, column monomial),
+        # so that a solution can warm start a program of another degree
+        self.column_keys = {}
+        self._scalars = 0
+        self._polynomials = 0
+
+    def _new_columns(self, count):
+        start = self.num_columns
+        self.num_columns += count
+        return start
+
+    def add_scalar(self):
+        '''New scalar decision variable, returned as a constant AffinePolynomial'''
+        self._scalars += 1
+        column = self._new_columns(1)
+        self.column_keys[("scalar", self._scalars)] = column
+        return AffinePolynomial.variable(self.dim, column)
+
+    def add_polynomial(self, degree, cliques=None):
+        '''
+        Polynomial of the given degree with one free decision variable per coefficient,
+        optionally restricted to monomials in the variables of a single clique
+        '''
+        basis = monomial_basis(self.dim, degree) if cliques is None else \
+            np.unique(np.vstack([clique_basis(self.dim, clique, degree) for clique in cliques]), axis=0)
+        start = self._new_columns(len(basis))
+        self._polynomials += 1
+        for k, monom in enumerate(basis.tolist()):
+            self.column_keys[("polynomial", self._polynomials, tuple(monom))] = start + k
+        return AffinePolynomial(self.dim, basis, start + np.arange(len(basis)), np.ones(len(basis)))
+
+    def add_gram(self, basis, name=''):
+        name = name or f'_Q{len(self.grams) + 1}'
+        gram = SparseSOSConstraint(name, basis, self.num_columns)
+        monoms = list(map(tuple, basis.tolist()))
+        for k, (i, j) in enumerate(zip(gram.rows, gram.cols)):
+            self.column_keys[(name, monoms[i], monoms[j])] = gram.offset + k
+        self._new_columns(gram.num_columns)
+        self.grams.append(gram)
+        return gram
+
+    def add_sos_polynomial(self, degree, name='', variables=None):
+        '''
+        SOS polynomial of the given (even) degree, optionally in a subset of the
+        variables, parametrised directly by its Gram matrix. Returns the
+        polynomial and its constraint.
+        '''
+        assert degree % 2 == 0, 'Polynomial degree must be even!'
+        variables = range(self.dim) if variables is None else variables
+        gram = self.add_gram(clique_basis(self.dim, variables, degree // 2), name)
+        return gram.polynomial(), gram
+
+    def add_sos_constraint(self, poly, name='', basis_reduction=None, cliques=None):
+        '''
+        Constrain the AffinePolynomial POLY to be a sum of squares, optionally
+        pruning the Gram basis (see reduce_basis). With cliques, POLY is instead
+        required to be a sum of SOS polynomials each in the variables of one clique.
+        '''
+        poly = poly.collect()
+        deg = poly.degree()
+        assert deg % 2 == 0, 'Polynomial degree must be even!'
+        basis = reduce_basis(poly.monomials(), deg, basis_reduction)
+        full_size = len(monomial_basis(self.dim, deg // 2))
+        if cliques is None:
+            gram = self.add_gram(basis, name)
+            gram.full_size = full_size
+            self._equalities.append(gram.polynomial() - poly)
+            return gram
+
+        # the clique bases are intersected with the (reduced) full basis:
+        # a sum of SOS terms can only use monomials of its Newton polytope
+        allowed = set(map(tuple, basis.tolist()))
+        grams = []
+        for k, clique in enumerate(cliques):
+            block = clique_basis(self.dim, clique, deg // 2)
+            block = block[[tuple(m) in allowed for m in block.tolist()]]
+            if len(block):
+                grams.append(self.add_gram(block, f'{name}_{k + 1}' if name else ''))
+        self._equalities.append(sum((gram.polynomial() for gram in grams), AffinePolynomial(self.dim)) - poly)
+        return SparseCliqueSOSConstraint(name, grams, full_size)
+
+    def add_constraint(self, expr):
+        '''Constrain a degree-0 AffinePolynomial to be nonnegative'''
+        self._inequalities.append(expr.collect())
+
+    def set_objective(self, expr):
+        '''Minimise a degree-0 AffinePolynomial'''
+        self._objective = expr.collect()
+
+    def value(self, expr):
+        '''Value of a degree-0 AffinePolynomial at the solution'''
+        return sum(expr.value(self.solution).values())
+
+    def solution_map(self):
+        '''Solution keyed by column label (see warm_start in solve)'''
+        return {key: float(self.solution[column]) for key, column in self.column_keys.items()}
+
+    # ========================= Assembly =========================
+
+    def equality_triplets(self):
+        '''COO triplets (rows, columns, values) and right hand side of the coefficient matching'''
+        rows, cols, vals, rhs = [], [], [], []
+        offset = 0
+        for eq in self._equalities:
+            eq = eq.collect()
+            monoms, inverse = np.unique(eq.exponents, axis=0, return_inverse=True)
+            inverse = inverse.ravel() + offset
+            variable = eq.columns >= 0
+            b = np.zeros(len(monoms))
+            np.add.at(b, inverse[~variable] - offset, -eq.values[~variable])
+            rows.append(inverse[variable])
+            cols.append(eq.columns[variable])
+            vals.append(eq.values[variable])
+            rhs.append(b)
+            offset += len(monoms)
+
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+        vals = np.concatenate(vals) if vals else np.zeros(0)
+        rhs = np.concatenate(rhs) if rhs else np.zeros(0)
+
+        # rows without any variable are either trivially satisfied or infeasible
+        used = np.zeros(len(rhs), dtype=bool)
+        used[rows] = True
+        if np.any(np.abs(rhs[~used]) > 1e-12):
+            raise SolverFailure("coefficient matching is infeasible")
+        renumber = np.cumsum(used) - 1
+        return renumber[rows], cols, vals, rhs[used]
+
+    def inequality_triplets(self):
+        '''COO triplets of G x <= h for the linear constraints expr >= 0'''
+        rows, cols, vals, h = [], [], [], []
+        for r, expr in enumerate(self._inequalities):
+            variable = expr.columns >= 0
+            rows.append(np.full(variable.sum(), r))
+            cols.append(expr.columns[variable])
+            vals.append(-expr.values[variable])
+            h.append(expr.values[~variable].sum())
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+        return np.concatenate(rows), np.concatenate(cols), np.concatenate(vals), np.array(h)
+
+    def objective_vector(self):
+        c = np.zeros(self.num_columns)
+        if self._objective is not None:
+            variable = self._objective.columns >= 0
+            np.add.at(c, self._objective.columns[variable], self._objective.values[variable])
+        return c
+
+    # ========================= Solve =========================
+
+    def solve(self, solver="mosek", warm_start=None, threads=None):
+        '''
+        Solve with cvxopt or MOSEK. WARM_START is a solution_map of a related
+        program (e.g. the same conditions at a lower barrier degree): with cvxopt
+        and the SOS relaxation, the matching columns form the initial point and
+        the others start at zero. MOSEK's interior-point optimizer has no warm start.
+        THREADS caps the MOSEK threads; cvxopt runs on the BLAS threads of the process.
+        '''
+        if solver == "cvxopt":
+            solution = self._solve_cvxopt(warm_start)
+        elif solver == "mosek":
+            solution = self._solve_mosek(threads)
+        else:
+            raise ValueError(f"Unrecognised solver: {solver}")
+
+        self.solution = solution
+        for gram in self.grams:
+            gram.set_value(solution)
+        return solution
+
+    def _solve_cvxopt(self, warm_start=None):
+        import cvxopt
+
+        a_rows, a_cols, a_vals, b = self.equality_triplets()
+        g_rows, g_cols, g_vals, g_rhs = self.inequality_triplets()
+        equalities = _Triplets(a_rows, a_cols, a_vals, len(b))
+        linear = _Triplets(g_rows, g_cols, g_vals, len(g_rhs))
+        cones, cone_sizes = _Triplets(), []
+        sdp, sdp_sizes = _Triplets(), []
+        n = self.num_columns
+
+        for gram in self.grams:
+            size = len(gram)
+            columns = gram.offset + np.arange(gram.num_columns)
+            diagonal = gram.rows == gram.cols
+            diagonal_columns = columns[diagonal]
+            pairs = np.flatnonzero(~diagonal)
+            pair_columns = columns[pairs]
+
+            if self.relaxation == "sos":
+                # Q >> 0 as -vec(Q) + s = 0 with s in the semidefinite cone (column-major vec)
+                sdp.add(gram.rows + gram.cols * size, columns, -np.ones(gram.num_columns))
+                sdp.add(gram.cols[pairs] + gram.rows[pairs] * size, pair_columns, -np.ones(len(pairs)))
+                sdp.rows_used += size * size
+                sdp_sizes.append(size)
+
+            elif self.relaxation == "dsos":
+                # diagonal dominance: t_ij >= |Q_ij| and Q_ii >= sum_j t_ij
+                t = n + np.arange(len(pairs))
+                n += len(pairs)
+                k = np.arange(len(pairs))
+                linear.add(2 * k, pair_columns, np.ones(len(pairs)))
+                linear.add(2 * k, t, -np.ones(len(pairs)))
+                linear.add(2 * k + 1, pair_columns, -np.ones(len(pairs)))
+                linear.add(2 * k + 1, t, -np.ones(len(pairs)))
+                linear.rows_used += 2 * len(pairs)
+                linear.add(np.arange(size), diagonal_columns, -np.ones(size))
+                linear.add(gram.rows[pairs], t, np.ones(len(pairs)))
+                linear.add(gram.cols[pairs], t, np.ones(len(pairs)))
+                linear.rows_used += size
+
+            elif self.relaxation == "sdsos":
+                # scaled diagonal dominance: Q is a sum of 2x2 PSD blocks [[p, Q_ij], [Q_ij, q]]
+                if size == 1:
+                    linear.add(np.zeros(1), diagonal_columns, -np.ones(1))
+                    linear.rows_used += 1
+                    continue
+                p = n + np.arange(len(pairs))
+                q = p + len(pairs)
+                n += 2 * len(pairs)
+                equalities.add(np.arange(size), diagonal_columns, np.ones(size))
+                equalities.add(gram.rows[pairs], p, -np.ones(len(pairs)))
+                equalities.add(gram.cols[pairs], q, -np.ones(len(pairs)))
+                equalities.rows_used += size
+                # ||(2 Q_ij, p - q)|| <= p + q
+                k = 3 * np.arange(len(pairs))
+                cones.add(np.concatenate([k, k]), np.concatenate([p, q]), -np.ones(2 * len(pairs)))
+                cones.add(k + 1, pair_columns, -2 * np.ones(len(pairs)))
+                cones.add(np.concatenate([k + 2, k + 2]), np.concatenate([p, q]),
+                          np.concatenate([-np.ones(len(pairs)), np.ones(len(pairs))]))
+                cones.rows_used += 3 * len(pairs)
+                cone_sizes += [3] * len(pairs)
+
+            else:
+                raise ValueError(f"Unrecognised relaxation: {self.relaxation}")
+
+        G = _Triplets.stack([linear, cones, sdp], n)
+        A = _Triplets.stack([equalities], n)
+        h = np.zeros(G.size[0])
+        h[:len(g_rhs)] = g_rhs
+        rhs = np.zeros(A.size[0])
+        rhs[:len(b)] = b
+        c = np.zeros(n)
+        c[:self.num_columns] = self.objective_vector()
+        dims = {'l': linear.rows_used, 'q': cone_sizes, 's': sdp_sizes}
+
+        arguments = (cvxopt.matrix(c), G, cvxopt.matrix(h), dims, A, cvxopt.matrix(rhs))
+        start = {}
+        if warm_start and self.relaxation == "sos":
+            start['primalstart'] = self._primal_start(warm_start, G, h, dims)
+        with span("solver_run"):
+            try:
+                result = cvxopt.solvers.conelp(*arguments, options={'show_progress': False}, **start)
+            except ValueError:
+                # rank deficient equalities: retry with the LDL factorisation, as picos does
+                result = cvxopt.solvers.conelp(*arguments, kktsolver='ldl', options={'show_progress': False},
+                                               **start)
+        if result['status'] != 'optimal':
+            raise SolverFailure(f"cvxopt status: {result['status']}")
+        self.iterations = result['iterations']
+        return np.array(result['x']).ravel()[:self.num_columns]
+
+    def _primal_start(self, warm_start, G, h, dims, margin=1e-1):
+        '''
+        cvxopt primal starting point from a solution_map. conelp is an infeasible
+        start method, so only the slack has to be strictly inside the cone: it is
+        h - G x, with linear entries raised to MARGIN and semidefinite blocks
+        shifted until their smallest eigenvalue is MARGIN.
+        '''
+        import cvxopt
+
+        x = np.zeros(G.size[1])
+        for key, column in self.column_keys.items():
+            x[column] = warm_start.get(key, 0.0)
+        s = h - np.array(G * cvxopt.matrix(x)).ravel()
+        s[:dims['l']] = np.maximum(s[:dims['l']], margin)
+        offset = dims['l'] + sum(dims['q'])
+        for size in dims['s']:
+            block = s[offset:offset + size * size].reshape(size, size)
+            block = (block + block.T) / 2
+            shift = max(margin - np.linalg.eigvalsh(block)[0], 0.0)
+            s[offset:offset + size * size] = (block + shift * np.eye(size)).ravel()
+            offset += size * size
+        return {'x': cvxopt.matrix(x), 's': cvxopt.matrix(s)}
+
+    def _solve_mosek(self, threads=None):
+        import mosek
+
+        gram_of_column = np.full(self.num_columns, -1)
+        for j, gram in enumerate(self.grams):
+            gram_of_column[gram.offset:gram.offset + gram.num_columns] = j
+        scalar_columns = np.flatnonzero(gram_of_column < 0)
+        scalar_index = np.full(self.num_columns, -1)
+        scalar_index[scalar_columns] = np.arange(len(scalar_columns))
+
+        a_rows, a_cols, a_vals, b = self.equality_triplets()
+        g_rows, g_cols, g_vals, h = self.inequality_triplets()
+        num_equalities = len(b)
+        # G x <= h is written as -G x >= -h, stacked below the equalities
+        rows = np.concatenate([a_rows, g_rows + num_equalities])
+        cols = np.concatenate([a_cols, g_cols])
+        vals = np.concatenate([a_vals, -g_vals])
+
+        with mosek.Task() as task:
+            task.appendvars(len(scalar_columns))
+            if len(scalar_columns):
+                task.putvarboundsliceconst(0, len(scalar_columns), mosek.boundkey.fr, -np.inf, np.inf)
+            task.appendbarvars([len(gram) for gram in self.grams])
+            task.appendcons(num_equalities + len(h))
+
+            scalar = gram_of_column[cols] < 0
+            task.putaijlist(rows[scalar].tolist(), scalar_index[cols[scalar]].tolist(), vals[scalar].tolist())
+
+            # <A, X> with lower triangular A counts off-diagonal entries twice
+            bar_i, bar_j, bar_k, bar_l, bar_v = [], [], [], [], []
+            for j, gram in enumerate(self.grams):
+                mask = gram_of_column[cols] == j
+                local = cols[mask] - gram.offset
+                r, c = gram.rows[local], gram.cols[local]
+                bar_i.append(rows[mask])
+                bar_j.append(np.full(mask.sum(), j))
+                bar_k.append(np.maximum(r, c))
+                bar_l.append(np.minimum(r, c))
+                bar_v.append(np.where(r == c, vals[mask], vals[mask] / 2))
+            if bar_i:
+                task.putbarablocktriplet(*[np.concatenate(v).tolist() for v in (bar_i, bar_j, bar_k, bar_l, bar_v)])
+
+            bounds = [mosek.boundkey.fx] * num_equalities + [mosek.boundkey.lo] * len(h)
+            lower = np.concatenate([b, -h]).tolist()
+            upper = np.concatenate([b, np.full(len(h), np.inf)]).tolist()
+            task.putconboundslice(0, num_equalities + len(h), bounds, lower, upper)
+
+            c = self.objective_vector()
+            task.putclist(np.arange(len(scalar_columns)).tolist(), c[scalar_columns].tolist())
+            task.putobjsense(mosek.objsense.minimize)
+            if threads is not None:
+                task.putintparam(mosek.iparam.num_threads, threads)
+            with span("solver_run"):
+                task.optimize()
+
+            solsta = task.getsolsta(mosek.soltype.itr)
+            if solsta != mosek.solsta.optimal:
+                raise SolverFailure(f"MOSEK solution status: {solsta}")
+
+            solution = np.zeros(self.num_columns)
+            solution[scalar_columns] = task.getxx(mosek.soltype.itr)
+            for j, gram in enumerate(self.grams):
+                # barx is the lower triangle stored column by column
+                n = len(gram)
+                lower_rows, lower_cols = np.tril_indices(n)
+                order = np.lexsort((lower_rows, lower_cols))
+                packed = np.zeros((n, n))
+                packed[lower_rows[order], lower_cols[order]] = task.getbarxj(mosek.soltype.itr, j)
+                solution[gram.offset:gram.offset + gram.num_columns] = packed[gram.cols, gram.rows]
+        return solution
+
+
+class _Triplets:
+    '''Block of sparse constraint rows for cvxopt, built incrementally from COO triplets'''
+
+    def __init__(self, rows=None, cols=None, vals=None, rows_used=0):
+        self.rows = [] if rows is None else [np.asarray(rows)]
+        self.cols = [] if cols is None else [np.asarray(cols)]
+        self.vals = [] if vals is None else [np.asarray(vals, dtype=np.double)]
+        self.rows_used = rows_used
+
+    def add(self, rows, cols, vals):
+        '''Add entries to rows numbered from the current end of the block'''
+        self.rows.append(self.rows_used + np.asarray(rows))
+        self.cols.append(np.asarray(cols))
+        self.vals.append(np.asarray(vals, dtype=np.double))
+
+    @staticmethod
+    def stack(blocks, num_columns):
+        import cvxopt
+
+        rows, cols, vals = [], [], []
+        offset = 0
+        for block in blocks:
+            rows += [r + offset for r in block.rows]
+            cols += block.cols
+            vals += block.vals
+            offset += block.rows_used
+        rows, cols, vals = (np.concatenate(v) if v else np.zeros(0) for v in (rows, cols, vals))
+        keep = vals != 0
+        return cvxopt.spmatrix(vals[keep].tolist(), rows[keep].astype(int).tolist(), cols[keep].astype(int).tolist(),
+                               (offset, num_columns))
@@ -0,0 +1,57 @@
+STOPPING_POLICIES = (None, "first_feasible", "lowest_degree", "confidence")
+
+
+def check_stopping(stopping, target_confidence=None):
+    '''Raise a ValueError for an unknown policy, or the confidence policy without a target'''
+    if stopping not in STOPPING_POLICIES:
+        raise ValueError(f"Unrecognised stopping policy: {stopping}")
+    if stopping == "confidence" and target_confidence is None:
+        raise ValueError("the confidence stopping policy needs target_confidence")
+
+
+def policy_satisfied(stopping, barriers, pending, target_confidence=None):
+    '''
+    =========================================
+    Whether the parallel degree search can stop
+    =========================================
+    stopping = None (wait for every degree), "first_feasible" (any barrier),
+               "lowest_degree" (a barrier with every lower degree finished) or
+               "confidence" (a barrier reaching target_confidence)
+    barriers = dict of barrier results found so far, keyed by degree, in order of completion
+    pending = set of degrees that have not finished
+    target_confidence = confidence threshold of the "confidence" policy; a deterministic
+                        barrier (no "confidence" key) meets any threshold
+    '''
+    check_stopping(stopping, target_confidence)
+    if stopping is None or not barriers:
+        return not pending
+    if stopping == "first_feasible":
+        return True
+    if stopping == "lowest_degree":
+        return not any(degree < min(barriers) for degree in pending)
+    return any(result.get("confidence", 1.0) >= target_confidence for result in barriers.values())
+
+
+def cancel_pending(futures):
+    '''
+    Cancel every unfinished future of a {future: degree} dict; pebble terminates
+    the workers that are still running. Returns the sorted cancelled degrees.
+    '''
+    cancelled = [degree for future, degree in futures.items() if not future.done() and future.cancel()]
+    return sorted(cancelled)
+
+
+def select_barrier(stopping, barriers):
+    '''
+    Barrier reported by the search: the lowest degree for "lowest_degree", the first
+    found for "first_feasible", otherwise the highest confidence (the first found
+    for deterministic results). None when there is no barrier.
+    '''
+    if not barriers:
+        return None
+    if stopping == "lowest_degree":
+        return barriers[min(barriers)]
+    first = next(iter(barriers.values()))
+    if stopping == "first_feasible" or "confidence" not in first:
+        return first
+    return max(barriers.values(), key=lambda result: result["confidence"])
@@ -0,0 +1,204 @@
+# IMPORTS FROM INSTALLS
+import argparse
+import time
+from itertools import product
+
+import numpy as np
+
+# IMPORTS FROM TOOL
+from src.functions.ct_DS import ct_DS
+from src.functions.ct_SS import ct_SS
+from src.functions.dt_DS import dt_DS
+from src.functions.dt_SS import dt_SS
+from src.functions.degree_scheduler import Job, RowWriter, completed_jobs
+from src.functions.problem_size import estimate_problem_size, dynamics_degree
+from src.utils.config import load_config
+from src.utils.system_mode import SystemMode
+
+ENGINES = {SystemMode.DT_DS: dt_DS, SystemMode.CT_DS: ct_DS, SystemMode.DT_SS: dt_SS, SystemMode.CT_SS: ct_SS}
+SWEEP_PARAMETERS = ("lam", "gam", "c_val", "l_degree")
+DESIGNS = ("grid", "random", "lhs")
+ROW_FIELDS = ["b_degree", *SWEEP_PARAMETERS, "confidence", "gamma", "lambda", "c", "seconds", "error", "barrier"]
+
+
+def sweep_points(space, design="grid", samples=None, seed=None):
+    '''
+    =========================================
+    Design points of a hyperparameter sweep
+    =========================================
+    space = dict from parameter name (lam, gam, c_val, l_degree) to a list of values
+            (None leaves the parameter free) or, for the random and lhs designs,
+            a (low, high) tuple of a continuous range
+    design = "grid" (every combination), "random" (independent uniform draws) or
+             "lhs" (Latin hypercube: every range split into SAMPLES strata, each hit once)
+    samples = number of points of the random and lhs designs
+    seed = seed of the random and lhs designs
+
+    Returns a list of dicts of engine keyword arguments.
+    '''
+    unknown = set(space) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unrecognised sweep parameters: {sorted(unknown)}")
+    if design not in DESIGNS:
+        raise ValueError(f"Unrecognised design: {design}")
+
+    names = list(space)
+    if design == "grid":
+        if any(isinstance(space[name], tuple) for name in names):
+            raise ValueError("grid designs need a list of values for every parameter")
+        return [dict(zip(names, values)) for values in product(*(space[name] for name in names))]
+
+    if not samples:
+        raise ValueError(f"the {design} design needs a number of samples")
+    rng = np.random.default_rng(seed)
+    columns = []
+    for name in names:
+        if design == "random":
+            u = rng.random(samples)
+        else:
+            u = (rng.permutation(samples) + rng.random(samples)) / samples
+        spec = space[name]
+        if isinstance(spec, tuple):
+            low, high = spec
+            columns.append([float(low + v * (high - low)) for v in u])
+        else:
+            columns.append([spec[int(v * len(spec))] for v in u])
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+def _sweep_job(engine, b_degree, parameters, point):
+    '''Run one design point in a worker and flatten the result into a row'''
+    start = time.perf_counter()
+    try:
+        result = engine(b_degree, **parameters, **point)
+    except Exception as exc:
+        result = {"error": f"{type(exc).__name__}: {exc}"}
+    result = result if result is not None else {"error": "no result"}
+
+    row = {"b_degree": b_degree, **point, "seconds": round(time.perf_counter() - start, 3)}
+    for key in ("confidence", "gamma", "lambda", "c", "error"):
+        if result.get(key) is not None:
+            row[key] = result[key] if isinstance(result[key], str) else float(result[key])
+    if "barrier" in result:
+        row["barrier"] = str(result["barrier"])
+    return row
+
+
+def best_per_degree(rows):
+    '''Row with the highest confidence (any barrier for deterministic rows) per barrier degree'''
+    best = {}
+    for row in rows:
+        if "barrier" not in row:
+            continue
+        current = best.get(row["b_degree"])
+        if current is None or row.get("confidence", 0) > current.get("confidence", 0):
+            best[row["b_degree"]] = row
+    return dict(sorted(best.items()))
+
+
+def run_sweep(engine, b_degrees, space, parameters, design="grid", samples=None, seed=None, output=None,
+              memory_budget=None, max_workers=None):
+    '''
+    =========================================
+    Hyperparameter sweep of a barrier engine over a process pool
+    =========================================
+    engine = dt_DS, ct_DS, dt_SS or ct_SS
+    b_degrees = barrier degrees, crossed with every design point
+    space, design, samples, seed = see sweep_points
+    parameters = remaining engine parameters (e.g. from load_config)
+    output = .csv or .jsonl file the rows are streamed to as they finish (None: no file)
+    memory_budget = bytes of estimated peak memory the running jobs may use together (None: the memory
+                    available, see completed_jobs)
+    max_workers = size of a dedicated pool (None: the shared worker pool, see worker_pool)
+
+    Returns the rows in order of completion and the best row per degree.
+    '''
+    points = sweep_points(space, design, samples, seed)
+    parameters = {key: value for key, value in parameters.items() if key not in ("b_degree", *space)}
+    discrete, stochastic = engine.__name__.startswith("dt"), engine.__name__.endswith("SS")
+    x, f = parameters["x"], parameters["f"]
+
+    def memory(b_degree, point):
+        l_degree = point.get("l_degree", parameters.get("l_degree"))
+        return estimate_problem_size(parameters["dim"], b_degree, l_degree, len(parameters["L_unsafe"]),
+                                     dynamics_degree(x, f, b_degree, discrete), stochastic,
+                                     parameters.get("backend", "picos"))["memory"]
+
+    jobs = [Job(index, _sweep_job, (engine, b_degree, parameters, point), {}, memory(b_degree, point))
+            for index, (b_degree, point) in enumerate(product(b_degrees, points))]
+
+    rows = []
+    writer = RowWriter(output, ROW_FIELDS) if output is not None else None
+    try:
+        for job, future in completed_jobs(jobs, memory_budget, max_workers):
+            try:
+                row = future.result()
+            except Exception as exc:
+                # the worker itself died (e.g. killed): keep the design point in the output
+                _, b_degree, _, point = job.args
+                row = {"b_degree": b_degree, **point, "error": f"{type(exc).__name__}: {exc}"}
+            rows.append(row)
+            if writer is not None:
+                writer.write(row)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return rows, best_per_degree(rows)
+
+
+def _values(strings, integer=False):
+    '''Command line values; "free" (or "none") leaves the parameter free'''
+    return [None if s.lower() in ("free", "none") else (int(s) if integer else float(s)) for s in strings]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.functions.sweep",
+        description="Sweep lam, gam, c_val and l_degree (crossed with the barrier degree) for a GUI config file. "
+                    "With the random and lhs designs, two values of lam, gam or c_val give a range.")
+    parser.add_argument("config", help="configuration file exported by the GUI (see ex/GUI_config_files)")
+    parser.add_argument("--b-degrees", type=int, nargs="+",
+                        help="barrier degrees (default: the even degrees up to the config's b_degree)")
+    parser.add_argument("--lam", nargs="+")
+    parser.add_argument("--gam", nargs="+")
+    parser.add_argument("--c-val", nargs="+")
+    parser.add_argument("--l-degree", nargs="+")
+    parser.add_argument("--design", choices=DESIGNS, default="grid")
+    parser.add_argument("--samples", type=int, help="number of points of the random and lhs designs")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help=".csv or .jsonl file for the rows")
+    parser.add_argument("--memory-budget", type=float,
+                        help="MiB of estimated memory for the running jobs (default: the memory available)")
+    parser.add_argument("--workers", type=int, help="number of worker processes")
+    parser.add_argument("--solver", choices=("mosek", "cvxopt"), help="override the config's solver")
+    args = parser.parse_args(argv)
+
+    mode, parameters = load_config(args.config)
+    if args.solver:
+        parameters["solver"] = args.solver
+    b_degrees = args.b_degrees or list(range(2, parameters["b_degree"] + 1, 2))
+
+    space = {}
+    for name, strings in (("lam", args.lam), ("gam", args.gam), ("c_val", args.c_val)):
+        if strings:
+            values = _values(strings)
+            ranged = args.design != "grid" and len(values) == 2 and None not in values
+            space[name] = tuple(values) if ranged else values
+    if args.l_degree:
+        space["l_degree"] = _values(args.l_degree, integer=True)
+
+    memory_budget = args.memory_budget * 2 ** 20 if args.memory_budget is not None else None
+    rows, best = run_sweep(ENGINES[mode], b_degrees, space, parameters, args.design, args.samples, args.seed,
+                           args.output, memory_budget, args.workers)
+
+    print(f"{len(rows)} runs, {sum('barrier' in row for row in rows)} with a barrier")
+    for b_degree, row in best.items():
+        point = ", ".join(f"{name}={row.get(name)}" for name in space)
+        confidence = f"confidence={row['confidence']:.6f}" if "confidence" in row else "barrier found"
+        print(f"b_degree {b_degree}: {confidence} ({point})")
+    return rows, best
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# IMPORTS FROM INSTALLS
+import contextvars
+import functools
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# phases reported under "timings", in the order the engines go through them
+PHASES = ("sets", "multipliers", "generator", "moments", "constraints", "solver_compile", "solver_run",
+          "extraction")
+
+_timer = contextvars.ContextVar("phase_timer", default=None)
+
+
+class PhaseTimer:
+    '''
+    Accumulates seconds per phase. lap(phase) charges the time since the previous
+    lap to PHASE; span(phase) charges a nested block to its own phase and leaves
+    it out of the enclosing lap.
+    '''
+
+    def __init__(self):
+        self.timings = {}
+        self._last = time.perf_counter()
+        self._nested = 0.0
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self._add(phase, now - self._last - self._nested)
+        self._last, self._nested = now, 0.0
+
+    def account(self, phase, seconds):
+        '''Charge SECONDS measured elsewhere (e.g. by the solver) to PHASE instead of the current lap'''
+        self._add(phase, seconds)
+        self._nested += seconds
+
+    @contextmanager
+    def span(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.account(phase, time.perf_counter() - start)
+
+    def _add(self, phase, seconds):
+        self.timings[phase] = self.timings.get(phase, 0.0) + max(seconds, 0.0)
+
+
+def lap(phase):
+    '''End the current phase of the running engine as PHASE (no-op unless timings were requested)'''
+    timer = _timer.get()
+    if timer is not None:
+        timer.lap(phase)
+
+
+@contextmanager
+def span(phase):
+    '''Time a nested block as PHASE (no-op unless timings were requested)'''
+    timer = _timer.get()
+    if timer is None:
+        yield
+    else:
+        with timer.span(phase):
+            yield
+
+
+def lap_picos_solve(prob):
+    '''End a picos solve: the solver's own search time is solver_run, the rest solver_compile'''
+    timer = _timer.get()
+    if timer is None:
+        return
+    try:
+        timer.account("solver_run", prob.last_solution.searchTime)
+    except Exception:
+        # no solution was produced: the whole solve is charged to the compile phase
+        pass
+    timer.lap("solver_compile")
+
+
+class LoggerSink:
+    '''Logs every timing record as one JSON line'''
+
+    def __init__(self, logger=logger, level=logging.INFO):
+        self.logger = logger
+        self.level = level
+
+    def __call__(self, record):
+        self.logger.log(self.level, json.dumps(record))
+
+
+class JsonlSink:
+    '''
+    Appends every timing record to a JSON lines file. Each record is a single
+    append-mode write, so several worker processes can share the file.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, record):
+        with open(self.path, "a") as file:
+            file.write(json.dumps(record) + "\n")
+
+
+class MemorySink:
+    '''Keeps the timing records in memory, in the calling process'''
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
+
+
+def timed(engine):
+    '''
+    Add phase timings to an engine, which gains the keyword arguments timings
+    (True: return the seconds per phase, and in total, under "timings") and
+    timing_sink (a callable receiving {"engine", "b_degree", "timings"}, e.g.
+    LoggerSink, JsonlSink or MemorySink; implies timings).
+    '''
+
+    @functools.wraps(engine)
+    def wrapper(*args, timings=False, timing_sink=None, **kwargs):
+        if not timings and timing_sink is None:
+            return engine(*args, **kwargs)
+
+        timer = PhaseTimer()
+        token = _timer.set(timer)
+        start = time.perf_counter()
+        try:
+            result = engine(*args, **kwargs)
+        finally:
+            _timer.reset(token)
+        phases = {phase: round(timer.timings[phase], 6) for phase in PHASES if phase in timer.timings}
+        phases["total"] = round(time.perf_counter() - start, 6)
+
+        if isinstance(result, dict):
+            result["timings"] = phases
+        if timing_sink is not None:
+            b_degree = args[0] if args else kwargs.get("b_degree")
+            try:
+                timing_sink({"engine": engine.__name__, "b_degree": b_degree, "timings": phases})
+            except Exception as exc:
+                logger.warning(f"Timing sink failed: {exc}")
+        return result
+
+    return wrapper
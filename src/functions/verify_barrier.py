@@ -0,0 +1,420 @@
+# IMPORTS FROM INSTALLS
+import os
+import time
+from math import comb
+
+import numpy as np
+import sympy as sp
+
+# IMPORTS FROM TOOL
+from src.functions.barrier_evaluator import BATCH_ENTRIES, PolynomialEvaluator
+from src.functions.degree_scheduler import Job, completed_jobs
+from src.functions.generate_polynomial import generate_polynomial
+from src.functions.noise_moments import exact_moment_table
+from src.utils.system_mode import SystemMode
+
+VERIFIED, VIOLATED, UNKNOWN = "verified", "violated", "unknown"
+# entries of the Bernstein coefficient tensor of a box above which boxes are bounded by interval arithmetic
+DENSE_ENTRIES = 1 << 16
+# unit roundoff of double precision
+UNIT = np.finfo(np.double).eps / 2
+TINY = np.finfo(np.double).tiny
+
+
+def set_box(g, x):
+    '''
+    =========================================
+    Box {g_i(x) >= 0} of set polynomials made by generate_polynomial
+    =========================================
+    g = list of sympy polynomials (x_i - l_i)(u_i - x_i), one per variable
+    x = list of sympy variables
+
+    Returns the numpy arrays (lower, upper). The roots are computed in floating
+    point, so the bounds are approximate.
+    '''
+    bounds = []
+    for gi, xi in zip(g, x):
+        roots = np.sort(np.roots([float(c) for c in sp.Poly(gi, xi).all_coeffs()]).real)
+        bounds.append((roots[0], roots[-1]) if len(roots) else (-np.inf, np.inf))
+    lower, upper = np.array(bounds, dtype=np.double).reshape(-1, 2).T
+    return lower, upper
+
+
+def _gamma(n):
+    '''Upper bound of gamma_n = n u / (1 - n u), the relative error of n roundings (Higham, 2002)'''
+    if n * UNIT >= 0.005:
+        return np.inf
+    return 1.01 * n * UNIT
+
+
+def _outward(low, high, error):
+    '''low - error and high + error rounded outwards; undefined bounds become infinite'''
+    low = np.nextafter(low - error, -np.inf)
+    high = np.nextafter(high + error, np.inf)
+    return np.where(np.isnan(low), -np.inf, low), np.where(np.isnan(high), np.inf, high)
+
+
+def _powers(values, degree):
+    '''Array of shape (m, degree + 1) of values^k by repeated multiplication (k - 1 roundings for k >= 1)'''
+    powers = np.ones((len(values), degree + 1))
+    for k in range(1, degree + 1):
+        powers[:, k] = powers[:, k - 1] * values
+    return powers
+
+
+def _bernstein_matrices(lower, width, degree):
+    '''
+    Per-box matrices of shape (m, degree + 1, degree + 1) taking the power
+    coefficients of a univariate polynomial to its Bernstein coefficients on
+    [lower, lower + width]: the change of variable x = lower + width * u
+    followed by the power-to-Bernstein basis change on [0, 1]. Every entry is
+    computed with at most 2 * degree + 2 roundings.
+    '''
+    j, k = np.meshgrid(np.arange(degree + 1), np.arange(degree + 1), indexing="ij")
+    binomial = np.array([[comb(kk, jj) for kk in range(degree + 1)] for jj in range(degree + 1)], dtype=np.double)
+    # shift[m, j, k] = C(k, j) lower^(k - j) width^j for k >= j
+    lower_powers, width_powers = _powers(lower, degree), _powers(width, degree)
+    shift = np.where(k >= j, binomial, 0.0) * lower_powers[:, np.where(k >= j, k - j, 0)] * width_powers[:, j]
+    # basis[k, j] = C(k, j) / C(degree, j) for j <= k
+    basis = np.where(j.T <= k.T, binomial.T / binomial[:, degree][None, :], 0.0)
+    return basis[None, :, :] @ shift
+
+
+def bernstein_range(evaluator, lower, upper):
+    '''
+    =========================================
+    Enclosures of a polynomial over a batch of boxes from its Bernstein coefficients
+    =========================================
+    evaluator = PolynomialEvaluator of a single polynomial
+    lower = numpy array of shape (m, dim), lower corners of the boxes
+    upper = numpy array of shape (m, dim), upper corners of the boxes
+
+    The polynomial takes its values on a box between the smallest and the
+    largest of its Bernstein coefficients there, and the enclosure shrinks with
+    the square of the box width. Every box is transformed at once, one variable
+    at a time. The same transform of the absolute values bounds the rounding
+    errors (3 * degree + 4 roundings per variable, and one of the coefficients)
+    and the bounds are rounded outwards, so the enclosures hold for the exact
+    polynomial whose coefficients round to those of the evaluator. Returns the
+    numpy arrays (low, high) of shape (m,).
+    '''
+    lower = np.asarray(lower, dtype=np.double)
+    # rounded up, so that [lower, lower + width] covers the box
+    width = np.nextafter(np.asarray(upper, dtype=np.double) - lower, np.inf)
+    degrees = evaluator._max_powers
+    dense = np.zeros(tuple(degrees + 1))
+    np.add.at(dense, tuple(evaluator.exponents.T), evaluator.coefficients[:, 0])
+
+    coefficients = np.broadcast_to(dense, (len(lower),) + dense.shape)
+    magnitudes = np.broadcast_to(np.abs(dense), (len(lower),) + dense.shape)
+    for i, degree in enumerate(degrees):
+        if degree == 0:
+            continue
+        transform = _bernstein_matrices(lower[:, i], width[:, i], degree)
+        absolute = _bernstein_matrices(np.abs(lower[:, i]), width[:, i], degree)
+        coefficients = np.moveaxis(np.einsum("m...j,mkj->m...k", np.moveaxis(coefficients, i + 1, -1), transform),
+                                   -1, i + 1)
+        magnitudes = np.moveaxis(np.einsum("m...j,mkj->m...k", np.moveaxis(magnitudes, i + 1, -1), absolute),
+                                 -1, i + 1)
+    flat = coefficients.reshape(len(lower), -1)
+    # the magnitudes carry rounding errors of their own: gamma_n / (1 - gamma_n) <= gamma_2n
+    roundings = 1 + sum(3 * int(degree) + 4 for degree in degrees if degree)
+    error = _gamma(2 * roundings + 2) * magnitudes.reshape(len(lower), -1) + TINY * dense.size * roundings
+    low, high = _outward(flat, flat, error)
+    return low.min(axis=1), high.max(axis=1)
+
+
+def interval_range(evaluator, lower, upper):
+    '''
+    =========================================
+    Enclosures of a polynomial over a batch of boxes by interval arithmetic
+    =========================================
+    evaluator = PolynomialEvaluator of a single polynomial
+    lower = numpy array of shape (m, dim), lower corners of the boxes
+    upper = numpy array of shape (m, dim), upper corners of the boxes
+
+    Every monomial is bounded by the product of the ranges of its powers, which
+    costs terms * dim operations per box instead of the prod(degree_i + 1) of
+    the Bernstein form, but shrinks only linearly with the box width. The
+    rounding errors are bounded and the bounds rounded outwards as in
+    bernstein_range. Returns the numpy arrays (low, high) of shape (m,).
+    '''
+    lower = np.asarray(lower, dtype=np.double)
+    upper = np.asarray(upper, dtype=np.double)
+    exponents, coefficients = evaluator.exponents, evaluator.coefficients[:, 0]
+    product_low = np.ones((len(lower), len(exponents)))
+    product_high = np.ones((len(lower), len(exponents)))
+    magnitude = np.ones((len(lower), len(exponents)))
+    for i in evaluator._columns:
+        degree = int(evaluator._max_powers[i])
+        lower_powers, upper_powers = _powers(lower[:, i], degree), _powers(upper[:, i], degree)
+        # range of x_i^k over [lower_i, upper_i]: monotone for odd k, through zero for even k
+        low = np.minimum(lower_powers, upper_powers)
+        high = np.maximum(lower_powers, upper_powers)
+        odd = np.arange(degree + 1) % 2 == 1
+        low[:, odd], high[:, odd] = lower_powers[:, odd], upper_powers[:, odd]
+        straddles = (lower[:, i] < 0) & (upper[:, i] > 0)
+        low[np.ix_(straddles, ~odd & (np.arange(degree + 1) > 0))] = 0.0
+
+        power_low, power_high = low[:, exponents[:, i]], high[:, exponents[:, i]]
+        candidates = np.stack([product_low * power_low, product_low * power_high,
+                               product_high * power_low, product_high * power_high])
+        product_low, product_high = candidates.min(axis=0), candidates.max(axis=0)
+        magnitude *= np.maximum(np.abs(lower_powers), np.abs(upper_powers))[:, exponents[:, i]]
+
+    positive = coefficients >= 0
+    term_low = np.where(positive, coefficients * product_low, coefficients * product_high)
+    term_high = np.where(positive, coefficients * product_high, coefficients * product_low)
+    roundings = 3 + int(evaluator._max_powers.sum()) + 2 * evaluator.dim + len(exponents)
+    error = _gamma(2 * roundings + 2) * (np.abs(coefficients) * magnitude).sum(axis=1) + \
+        TINY * len(exponents) * roundings
+    return _outward(term_low.sum(axis=1), term_high.sum(axis=1), error)
+
+
+def enclosure(evaluator, lower, upper):
+    '''Enclosures of bernstein_range, or of interval_range when the Bernstein tensor of a box exceeds DENSE_ENTRIES'''
+    if _dense_entries(evaluator) <= DENSE_ENTRIES:
+        return bernstein_range(evaluator, lower, upper)
+    return interval_range(evaluator, lower, upper)
+
+
+def _dense_entries(evaluator):
+    return int(np.prod(evaluator._max_powers + 1))
+
+
+def _box_batch(evaluator):
+    '''Boxes bounded at once, so that the arrays of a batch hold about BATCH_ENTRIES entries'''
+    entries = _dense_entries(evaluator)
+    if entries > DENSE_ENTRIES:
+        entries = len(evaluator.exponents) * 4
+    return max(1, BATCH_ENTRIES // max(entries, 1))
+
+
+def _verify_boxes(evaluator, lower, upper, tolerance, max_depth, max_counterexamples):
+    '''
+    Branch and bound of "evaluator <= tolerance" over the box [lower, upper]:
+    boxes whose enclosure is below the tolerance are proven, boxes whose centre
+    provably exceeds it are counterexamples, the others are bisected along their
+    widest side (relative to the starting box) up to max_depth times.
+    '''
+    scale = np.where(upper > lower, upper - lower, 1.0)
+    batch = _box_batch(evaluator)
+    stack_lower, stack_upper, stack_depth = lower[None, :], upper[None, :], np.zeros(1, dtype=np.int64)
+    counterexamples, unknown, boxes = [], [], 0
+    while len(stack_depth) and len(counterexamples) < max_counterexamples:
+        lo, hi, depth = stack_lower[-batch:], stack_upper[-batch:], stack_depth[-batch:]
+        stack_lower, stack_upper, stack_depth = stack_lower[:-batch], stack_upper[:-batch], stack_depth[:-batch]
+        boxes += len(depth)
+
+        low, high = enclosure(evaluator, lo, hi)
+        open_ = high > tolerance
+        centres = (lo + hi) / 2
+        violated = np.zeros(len(depth), dtype=bool)
+        if open_.any():
+            violated[open_] = enclosure(evaluator, centres[open_], centres[open_])[0] > tolerance
+        values = evaluator(centres[violated]) if violated.any() else []
+        for k, value in list(zip(np.flatnonzero(violated), values))[:max_counterexamples - len(counterexamples)]:
+            counterexamples.append({"lower": lo[k].tolist(), "upper": hi[k].tolist(), "point": centres[k].tolist(),
+                                    "value": float(value), "everywhere": bool(low[k] > tolerance)})
+
+        undecided = open_ & ~violated
+        exhausted = undecided & (depth >= max_depth)
+        unknown += [{"lower": lo[k].tolist(), "upper": hi[k].tolist(), "high": float(high[k])}
+                    for k in np.flatnonzero(exhausted)[:max_counterexamples - len(unknown)]]
+        split = np.flatnonzero(undecided & ~exhausted)
+        if len(split):
+            lo, hi, depth = lo[split], hi[split], depth[split]
+            axis = np.argmax((hi - lo) / scale, axis=1)
+            rows = np.arange(len(split))
+            middle = (lo[rows, axis] + hi[rows, axis]) / 2
+            left_hi, right_lo = hi.copy(), lo.copy()
+            left_hi[rows, axis] = middle
+            right_lo[rows, axis] = middle
+            stack_lower = np.vstack([stack_lower, lo, right_lo])
+            stack_upper = np.vstack([stack_upper, left_hi, hi])
+            stack_depth = np.concatenate([stack_depth, depth + 1, depth + 1])
+    return {"counterexamples": counterexamples, "unknown": unknown, "boxes": boxes}
+
+
+def _exact(value):
+    '''sympy expression of value with every float replaced by the rational it represents exactly'''
+    expr = sp.sympify(value)
+    return expr.xreplace({number: sp.Rational(number) for number in expr.atoms(sp.Float)})
+
+
+def _exact_drift(mode, barrier, x, f, varsigma=None, noise_type="normal", mean=None, sigma=None, rate=None,
+                 a=None, b=None, delta=None, rho=None, p_rate=None):
+    '''
+    The polynomial of drift_evaluator in exact rational arithmetic, as a
+    {exponent tuple: rational} dict: the data of the system are taken at the
+    exact values of their double precision representation.
+    '''
+    dim = len(x)
+    if mode.is_discrete():
+        varsigma = list(varsigma or [])
+        ring, *_ = sp.ring(list(x) + varsigma, sp.QQ)
+        B = ring(_exact(barrier))
+        dynamics = [ring(_exact(fi)) for fi in f]
+        powers = {}
+
+        def power(i, p):
+            if (i, p) not in powers:
+                powers[(i, p)] = ring.one if p == 0 else power(i, p - 1) * dynamics[i]
+            return powers[(i, p)]
+
+        composed = ring.zero
+        for monom, coeff in B.terms():
+            term = ring.ground_new(coeff)
+            for i, p in enumerate(monom[:dim]):
+                if p:
+                    term = term * power(i, p)
+            composed += term
+
+        # expectation over the noise: varsigma_i^k becomes its k-th moment
+        max_order = max((max(monom[dim:], default=0) for monom in composed.keys()), default=0)
+        moments = exact_moment_table(noise_type, len(varsigma), max_order, mean, sigma, rate, a, b) \
+            if varsigma else []
+        moments = [[sp.QQ.from_sympy(m) for m in row] for row in moments]
+        drift = {}
+        for monom, coeff in composed.terms():
+            for k, p in enumerate(monom[dim:]):
+                coeff = coeff * moments[k][p]
+            drift[monom[:dim]] = drift.get(monom[:dim], sp.QQ.zero) + coeff
+        for monom, coeff in B.terms():
+            drift[monom[:dim]] = drift.get(monom[:dim], sp.QQ.zero) - coeff
+        return drift
+
+    ring, *gens = sp.ring(list(x), sp.QQ)
+    B = ring(_exact(barrier))
+    drift = ring.zero
+    for i in range(dim):
+        drift += B.diff(gens[i]) * ring(_exact(f[i]))
+    if mode.is_stochastic():
+        # same weighting as trace((delta^T delta) * Hessian) in ct_SS
+        delta = np.array(delta, dtype=object)
+        if delta.ndim == 2:
+            variance = [sum(_exact(delta[k][i]) ** 2 for k in range(len(delta))) for i in range(dim)]
+        else:
+            variance = [sum(_exact(d) ** 2 for d in delta)] * dim
+        for i in range(dim):
+            drift += ring(variance[i]) * B.diff(gens[i]).diff(gens[i]) * sp.QQ(1, 2)
+        for j in range(dim):
+            if p_rate[j] != 0:
+                jumped = B.compose(gens[j], gens[j] + ring(_exact(rho[j])))
+                drift += ring(_exact(p_rate[j])) * (jumped - B)
+    return dict(drift.terms())
+
+
+def _evaluator(polynomial, dim, scale=1, offset=0):
+    '''PolynomialEvaluator of scale * polynomial + offset, for a {exponent tuple: rational} polynomial'''
+    exact = {monom: scale * coeff for monom, coeff in polynomial.items()}
+    constant = (0,) * dim
+    exact[constant] = exact.get(constant, sp.QQ.zero) + offset
+    return PolynomialEvaluator.from_polynomials([{monom: float(coeff) for monom, coeff in exact.items()}], dim,
+                                                scalar=True)
+
+
+def _box(x, lower, upper):
+    '''The box [lower, upper] of a set, checked against the set polynomials the engines build from it'''
+    lower, upper = np.asarray(lower, dtype=np.double), np.asarray(upper, dtype=np.double)
+    roots = set_box(generate_polynomial(x, lower, upper), x)
+    if not (np.allclose(roots[0], lower) and np.allclose(roots[1], upper)):
+        raise ValueError(f"the set polynomials of [{lower}, {upper}] do not describe this box")
+    return lower, upper
+
+
+def _pieces(lower, upper, count):
+    '''Split the box into at least count boxes by bisecting the widest sides'''
+    pieces = [(np.asarray(lower, dtype=np.double), np.asarray(upper, dtype=np.double))]
+    while len(pieces) < count:
+        lo, hi = pieces.pop(0)
+        axis = int(np.argmax(hi - lo))
+        if hi[axis] <= lo[axis]:
+            pieces.append((lo, hi))
+            break
+        middle = (lo[axis] + hi[axis]) / 2
+        left_hi, right_lo = hi.copy(), lo.copy()
+        left_hi[axis], right_lo[axis] = middle, middle
+        pieces += [(lo, left_hi), (right_lo, hi)]
+    return pieces
+
+
+def verify_barrier(mode, result, dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space, x, f,
+                   varsigma=None, noise_type="normal", mean=None, sigma=None, rate=None, a=None, b=None, delta=None,
+                   rho=None, p_rate=None, tolerance=1e-6, max_depth=30, max_counterexamples=10, pieces=None,
+                   max_workers=None):
+    '''
+    =========================================
+    Check the conditions of a barrier over their boxes by branch and bound
+    =========================================
+    mode = SystemMode (or its value) of the engine that produced result
+    result = result holding "barrier", "gamma", "lambda" (and "c" for the stochastic modes)
+    dim, L_initial, U_initial, L_unsafe, U_unsafe, L_space, U_space, x, f = the system, as in the engines
+    varsigma, noise_type, mean, sigma, rate, a, b = noise of a dt_SS system, as in dt_SS
+    delta, rho, p_rate = diffusion, jump sizes and jump rates of a ct_SS system, as in ct_SS
+    tolerance = slack allowed in every condition (the SOS conditions of a barrier are often tight,
+                e.g. B = 0 at its minimum)
+    max_depth = number of bisections after which an undecided box is reported as unknown
+    max_counterexamples = counterexamples collected per condition before giving up (and unknown
+                          boxes reported per condition)
+    pieces = boxes every condition is split into for the worker pool (default: two per worker)
+    max_workers = None (shared worker pool) or the size of a dedicated pool
+
+    The sets are the boxes [L, U] of the engines (checked against their set
+    polynomials of generate_polynomial). The conditions are
+        initial:  B(x) <= gamma on the initial set
+        unsafeN:  B(x) >= lambda on the N-th unsafe set
+        barrier:  B(x) >= 0 on the state set
+        dynamics: the drift of drift_evaluator <= c (0 for the deterministic modes) on the state set
+    The check is rigorous: the polynomials of the conditions are built in exact
+    rational arithmetic from the exact values of the (double precision) data,
+    and the enclosures of enclosure() bound their rounding errors a priori and
+    round outwards. "verified" is therefore a proof that every condition holds
+    up to the tolerance, and a counterexample box holds a point where the
+    condition provably fails by more than the tolerance ("everywhere" if it
+    fails on the whole box); unknown boxes could not be decided within max_depth.
+    Returns {"status": "verified", "violated" or "unknown", "conditions": {name: {"status",
+    "counterexamples", "unknown", "boxes"}}, "seconds"}.
+    '''
+    if "barrier" not in result:
+        raise ValueError(f"result has no barrier: {result.get('error')}")
+    start = time.perf_counter()
+    mode = SystemMode(getattr(mode, "value", mode))
+    ring, *_ = sp.ring(list(x), sp.QQ)
+    barrier = dict(ring(_exact(result["barrier"])).terms())
+    gamma, lambda_ = sp.QQ.from_sympy(_exact(result["gamma"])), sp.QQ.from_sympy(_exact(result["lambda"]))
+    c = sp.QQ.from_sympy(_exact(result.get("c") or 0)) if mode.is_stochastic() else sp.QQ.zero
+    drift = _exact_drift(mode, result["barrier"], x, f, varsigma=varsigma, noise_type=noise_type, mean=mean,
+                         sigma=sigma, rate=rate, a=a, b=b, delta=delta, rho=rho, p_rate=p_rate)
+
+    # every condition as "polynomial <= 0" over a box
+    conditions = {"initial": (_evaluator(barrier, dim, 1, -gamma), _box(x, L_initial, U_initial))}
+    for i in range(len(L_unsafe)):
+        conditions["unsafe" + str(i + 1)] = (_evaluator(barrier, dim, -1, lambda_), _box(x, L_unsafe[i], U_unsafe[i]))
+    space = _box(x, L_space, U_space)
+    conditions["barrier"] = (_evaluator(barrier, dim, -1), space)
+    conditions["dynamics"] = (_evaluator(drift, dim, 1, -c), space)
+
+    count = pieces or 2 * (max_workers or os.cpu_count() or 1)
+    jobs = []
+    for name, (evaluator, (lower, upper)) in conditions.items():
+        for piece_lower, piece_upper in _pieces(lower, upper, count):
+            jobs.append(Job((name, len(jobs)), _verify_boxes,
+                            (evaluator, piece_lower, piece_upper, tolerance, max_depth, max_counterexamples), {}, 0))
+
+    report = {name: {"counterexamples": [], "unknown": [], "boxes": 0} for name in conditions}
+    for job, future in completed_jobs(jobs, None, max_workers):
+        part = future.result()
+        condition = report[job.key[0]]
+        condition["counterexamples"] += part["counterexamples"]
+        condition["unknown"] += part["unknown"]
+        condition["boxes"] += part["boxes"]
+    for condition in report.values():
+        condition["counterexamples"] = condition["counterexamples"][:max_counterexamples]
+        condition["unknown"] = condition["unknown"][:max_counterexamples]
+        condition["status"] = VIOLATED if condition["counterexamples"] else UNKNOWN if condition["unknown"] \
+            else VERIFIED
+
+    statuses = [condition["status"] for condition in report.values()]
+    status = VIOLATED if VIOLATED in statuses else UNKNOWN if UNKNOWN in statuses else VERIFIED
+    return {"status": status, "conditions": report, "seconds": round(time.perf_counter() - start, 3)}
@@ -0,0 +1,129 @@
+# IMPORTS FROM INSTALLS
+import atexit
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+# imported once by the forkserver, so that every worker forked from it starts with them loaded
+PRELOAD_MODULES = ["numpy", "sympy", "scipy.optimize", "picos", "SumOfSquares", "cvxopt", "mosek",
+                   "src.functions.dt_DS", "src.functions.ct_DS", "src.functions.dt_SS", "src.functions.ct_SS",
+                   "src.functions.prescreen", "src.functions.degree_ladder"]
+
+_pool = None
+_workers = 0
+_sequential_pool = None
+_manager = None
+_lock = threading.Lock()
+
+
+def _context():
+    '''
+    forkserver context preloading the engines: the workers neither re-import the
+    numerical libraries (as spawned workers do) nor inherit the threads of the
+    caller (as forked ones do). Platforms without forkserver fall back to spawn;
+    a main script read from stdin, which new processes cannot re-import, to fork.
+    '''
+    main_path = getattr(sys.modules["__main__"], "__file__", None)
+    if main_path is not None and not os.path.isfile(main_path) and "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(PRELOAD_MODULES)
+    return context
+
+
+def _ping():
+    return os.getpid()
+
+
+def shared_pool(max_workers=None):
+    '''
+    =========================================
+    Long-lived process pool shared by the parallel functions and the GUI
+    =========================================
+    max_workers = number of workers when the pool is (re)created, defaults to the number of cores
+
+    The pool is created on first use and recreated if it has been stopped or
+    broken; cancelled jobs only replace their own worker. It lives until
+    shutdown_pool, which also runs at interpreter exit.
+    '''
+    from pebble import ProcessPool
+
+    global _pool, _workers
+    with _lock:
+        if _pool is None or not _pool.active:
+            _workers = max_workers or os.cpu_count() or 1
+            _pool = ProcessPool(max_workers=_workers, context=_context())
+            logger.debug(f"Started the shared worker pool with {_workers} workers.")
+        return _pool
+
+
+def sequential_pool():
+    '''
+    Single-worker pool for the GUI's sequential computations, which keeps the
+    sympy and picos work out of the GUI process. Its worker exits after every
+    job, so that the memory of a solve goes back to the operating system, and
+    the next worker is forked straight away, ready for the following job.
+    '''
+    from pebble import ProcessPool
+
+    global _sequential_pool
+    with _lock:
+        if _sequential_pool is None or not _sequential_pool.active:
+            _sequential_pool = ProcessPool(max_workers=1, max_tasks=1, context=_context())
+        return _sequential_pool
+
+
+def shared_manager():
+    '''
+    multiprocessing manager started like the pool workers, whose queues can be
+    passed to jobs (e.g. the progress queues, see progress.ProgressChannel)
+    '''
+    global _manager
+    with _lock:
+        if _manager is None:
+            _manager = _context().Manager()
+        return _manager
+
+
+def warm_up(timeout=None, sequential=False):
+    '''Start every worker of the shared pool (or the sequential pool) now rather than on the first job'''
+    pool, workers = (sequential_pool(), 1) if sequential else (shared_pool(), _workers)
+    futures = [pool.schedule(_ping) for _ in range(workers)]
+    return [future.result(timeout=timeout) for future in futures]
+
+
+def pool_healthy(timeout=30):
+    '''Whether the shared pool is running and a worker answers within TIMEOUT seconds'''
+    with _lock:
+        pool = _pool
+    if pool is None or not pool.active:
+        return False
+    try:
+        pool.schedule(_ping).result(timeout=timeout)
+    except Exception as exc:
+        logger.warning(f"Shared worker pool is not responding: {exc}")
+        return False
+    return True
+
+
+def shutdown_pool():
+    '''Stop the shared and sequential pools, terminating running jobs; the next use starts new ones'''
+    global _pool, _sequential_pool, _manager
+    with _lock:
+        pools, _pool, _sequential_pool = (_pool, _sequential_pool), None, None
+        manager, _manager = _manager, None
+    for pool in pools:
+        if pool is not None:
+            pool.stop()
+            pool.join()
+    if manager is not None:
+        manager.shutdown()
+
+
+atexit.register(shutdown_pool)
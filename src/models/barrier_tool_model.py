@@ -1,20 +1,54 @@
 import logging
 import copy
+import importlib
+import threading
+from concurrent.futures import CancelledError, TimeoutError
 
 from PyQt6.QtCore import pyqtSignal, QObject, QThread
 
-from src.functions.ct_DS import ct_DS
-from src.functions.ct_SS import ct_SS
-from src.functions.dt_DS import dt_DS
-from src.functions.dt_SS import dt_SS
-from src.functions.parallel_ct_DS import parallel_ct_DS
-from src.functions.parallel_ct_SS import parallel_ct_SS
-from src.functions.parallel_dt_DS import parallel_dt_DS
-from src.functions.parallel_dt_SS import parallel_dt_SS
+from src.functions.cancellation import CANCELLED_ERROR, CancellationToken
+from src.functions.degree_scheduler import TIMEOUT_ERROR
+from src.functions.progress import FAILED, ProgressChannel
+from src.functions.worker_pool import pool_healthy, sequential_pool, shutdown_pool, warm_up
 from src.utils.system_mode import SystemMode
 
 logger = logging.getLogger(__name__)
 
+# milliseconds a cancelled computation gets to stop when the application quits
+SHUTDOWN_WAIT = 2000
+
+# The engines import sympy, picos, SumOfSquares and scipy, so they are only
+# imported on first use (or by BarrierToolModel.preload once the window is shown).
+ENGINES = {
+    SystemMode.DT_DS: "src.functions.dt_DS",
+    SystemMode.CT_DS: "src.functions.ct_DS",
+    SystemMode.DT_SS: "src.functions.dt_SS",
+    SystemMode.CT_SS: "src.functions.ct_SS",
+}
+PARALLEL_ENGINES = {
+    SystemMode.DT_DS: "src.functions.parallel_dt_DS",
+    SystemMode.CT_DS: "src.functions.parallel_ct_DS",
+    SystemMode.DT_SS: "src.functions.parallel_dt_SS",
+    SystemMode.CT_SS: "src.functions.parallel_ct_SS",
+}
+
+
+def load_engine(mode: SystemMode, parallel: bool = False):
+    """
+    Imports the function computing barriers for the given mode.
+
+    Args:
+        mode (SystemMode): System mode of the computation.
+        parallel (bool): Whether to load the parallel wrapper instead of the engine.
+
+    Returns:
+        The function, named after its module (e.g. dt_DS or parallel_dt_DS).
+    """
+    module = (PARALLEL_ENGINES if parallel else ENGINES).get(mode)
+    if module is None:
+        raise NotImplementedError("Error: unrecognized system mode.")
+    return getattr(importlib.import_module(module), module.rsplit(".", 1)[1])
+
 
 class BarrierToolModel(QObject):
     """
@@ -25,9 +59,15 @@ class BarrierToolModel(QObject):
         _system_mode(SystemMode): Computation mode. Can be either of the enum values.
         _result(dict): Dictionary mapping the result parameters to their actual values.
             The parameters may vary based on the computation mode.
+        _timeout(float): Seconds a computation may take (None: no limit).
+        _job_timeout(float): Seconds a single degree of a computation may take (None: no limit).
+        _cancel_token(CancellationToken): Token of the running computation.
+        _stopping_threads(set): Gateway threads of cancelled computations that have not stopped yet.
     """
 
     result_computed = pyqtSignal()
+    # progress events of the running computation (see src.functions.progress)
+    progress_reported = pyqtSignal(dict)
 
     def __init__(self, parallel: bool = None):
         super().__init__()
@@ -35,13 +75,22 @@ class BarrierToolModel(QObject):
         self._parallel = parallel
         self._gateway_thread = None
         self._result = None
+        self._timeout = None
+        self._job_timeout = None
+        self._cancel_token = None
+        self._stopping_threads = set()
 
     class GatewayThread(QThread):
-        def __init__(self, mode: SystemMode, parameters: dict, parallel: bool, *args, **kwargs):
+        progress = pyqtSignal(dict)
+
+        def __init__(self, mode: SystemMode, parameters: dict, parallel: bool, timeout: float = None,
+                     cancel_token: CancellationToken = None, *args, **kwargs):
             super().__init__(*args, **kwargs)
             self.mode = copy.deepcopy(mode)
             self.parameters = copy.deepcopy(parameters)
             self._parallel = parallel
+            self._timeout = timeout
+            self._cancel_token = cancel_token
             self._result = None
 
         def run(self):
@@ -59,31 +108,49 @@ class BarrierToolModel(QObject):
                 raises the Exception (or its subclass) as is intended in
                 validate_computation_parameters method.
             """
+            # pebble is imported with the worker pools, after the window is shown
+            from pebble import ProcessExpired
+
             mode = self.mode
             parameters = self.parameters
 
+            engine = load_engine(mode, self._parallel)
             if self._parallel:
-                if mode == SystemMode.DT_DS:
-                    self._result = parallel_dt_DS(**parameters)
-                elif mode == SystemMode.CT_DS:
-                    self._result = parallel_ct_DS(**parameters)
-                elif mode == SystemMode.DT_SS:
-                    self._result = parallel_dt_SS(**parameters)
-                elif mode == SystemMode.CT_SS:
-                    self._result = parallel_ct_SS(**parameters)
-                else:
-                    raise NotImplementedError("Error: this mode is not implemented so far.")
-            else:
-                if mode == SystemMode.DT_DS:
-                    self._result = dt_DS(**parameters)
-                elif mode == SystemMode.CT_DS:
-                    self._result = ct_DS(**parameters)
-                elif mode == SystemMode.DT_SS:
-                    self._result = dt_SS(**parameters)
-                elif mode == SystemMode.CT_SS:
-                    self._result = ct_SS(**parameters)
-                else:
-                    raise NotImplementedError("Error: unrecognized system mode.")
+                if not pool_healthy():
+                    # a pool whose workers stopped answering is replaced by the wrapper
+                    shutdown_pool()
+                # the parallel functions enforce their timeouts and cancellation themselves
+                self._result = engine(**parameters, cancel_token=self._cancel_token, progress=self.progress.emit)
+                return
+
+            # The sympy and picos work of a sequential computation would hold the GIL and freeze the
+            # GUI, so it runs in the worker of the sequential pool, which can also be stopped at the
+            # deadline or on cancellation and returns its memory to the system when it is done.
+            channel = ProgressChannel(self.progress.emit)
+            future = sequential_pool().schedule(engine, kwargs=dict(parameters, progress=channel.queue),
+                                                timeout=self._timeout)
+            if self._cancel_token is not None:
+                self._cancel_token.on_cancel(future.cancel)
+            b_degree = parameters.get("b_degree")
+            try:
+                self._result = future.result()
+            except TimeoutError:
+                channel.report(b_degree, FAILED, error=TIMEOUT_ERROR)
+                self._result = {"error": TIMEOUT_ERROR, "b_degree": b_degree, "timed_out_degrees": [b_degree]}
+            except CancelledError:
+                self._result = {"error": CANCELLED_ERROR, "b_degree": b_degree}
+            except ProcessExpired as e:
+                # the worker was killed, e.g. by the OOM killer, or crashed in a native solver
+                error = f"worker process died (exit code {e.exitcode})"
+                channel.report(b_degree, FAILED, error=error)
+                self._result = {"error": error, "b_degree": b_degree}
+            except Exception as e:
+                logger.exception(e)
+                error = f"{type(e).__name__}: {e}"
+                channel.report(b_degree, FAILED, error=error)
+                self._result = {"error": error, "b_degree": b_degree}
+            finally:
+                channel.close()
 
         def __del__(self):
             try:
@@ -105,22 +172,92 @@ class BarrierToolModel(QObject):
         if parallel is not None:
             self.set_parallel(parallel)
 
-        self._gateway_thread = self.GatewayThread(mode, parameters, self._parallel)
+        timeout = None
+        if self._parallel:
+            parameters = dict(parameters, timeout=self._timeout, job_timeout=self._job_timeout)
+        elif self._timeout is not None or self._job_timeout is not None:
+            # a sequential computation is a single degree, bounded by either timeout
+            timeout = min(t for t in (self._timeout, self._job_timeout) if t is not None)
+        self._cancel_token = CancellationToken()
+        self._gateway_thread = self.GatewayThread(mode, parameters, self._parallel, timeout, self._cancel_token)
         self._gateway_thread.finished.connect(self.__update_result)
+        self._gateway_thread.progress.connect(self.progress_reported)
         self._gateway_thread.start()
 
     def retrieve_result(self) -> dict:
         return self._result
 
+    def cancel_computing(self):
+        """
+        Stops the running computation. The parallel functions stop scheduling degrees and
+        terminate the workers of the running ones; the worker of a sequential computation is
+        terminated. The computation reports a "cancelled" error, or the best barrier it found.
+        """
+        if self._cancel_token is not None:
+            self._cancel_token.cancel()
+
     def terminate_computing(self):
-        if self._gateway_thread is not None:
-            try:
-                self._gateway_thread.terminate()
-            except Exception as e:
-                logger.debug(e)
+        """
+        Cancels the running computation and discards its result.
+        """
+        thread = self._gateway_thread
+        if thread is None:
+            return
+        self._gateway_thread = None
+        try:
+            self.cancel_computing()
+            thread.finished.disconnect(self.__update_result)
+            thread.progress.disconnect(self.progress_reported)
+            if thread.isRunning():
+                # destroying a running QThread aborts the application: keep it until it stops
+                self._stopping_threads.add(thread)
+                thread.finished.connect(lambda: self._stopping_threads.discard(thread))
+        except Exception as e:
+            logger.debug(e)
 
     def set_parallel(self, parallel: bool):
         self._parallel = parallel
 
+    def set_timeouts(self, timeout: float = None, job_timeout: float = None):
+        """
+        Bounds the following computations in wall-clock time. A computation that runs
+        out of time returns the best barrier found before the deadline, or a "timeout" error.
+
+        Args:
+            timeout (float): Seconds a computation may take (None: no limit).
+            job_timeout (float): Seconds a single degree may take (None: no limit).
+        """
+        self._timeout = timeout
+        self._job_timeout = job_timeout
+
+    def shutdown(self):
+        """
+        Terminates any computation and stops the shared worker pool.
+        Called when the application quits.
+        """
+        self.terminate_computing()
+        for thread in list(self._stopping_threads):
+            if not thread.wait(SHUTDOWN_WAIT):
+                # a sequential solve cannot be interrupted
+                thread.terminate()
+        shutdown_pool()
+
+    def preload(self):
+        """
+        Imports the engines in a background thread and starts the shared worker pool
+        (or, for sequential computations, the sequential pool), so that neither delays
+        the first computation. Called once the window is shown.
+        """
+        threading.Thread(target=self.__preload, args=(self._parallel,), daemon=True).start()
+
+    @staticmethod
+    def __preload(parallel: bool):
+        try:
+            for mode in ENGINES:
+                load_engine(mode, parallel)
+            warm_up(sequential=not parallel)
+        except Exception as e:
+            logger.debug(e)
+
     def __del__(self):
         self.terminate_computing()
@@ -1,11 +1,8 @@
 import logging
 import json
 
-import numpy as np
-import sympy as sp
-
+from src.functions.cancellation import CANCELLED_ERROR
 from src.models.barrier_tool_model import BarrierToolModel
-from src.utils.common import get_np_array_from_string, get_expression_from_string
 from src.utils.exceptions import BarrierNotFoundError, ExpressionFromStringError, RequiredParameterMissingError
 from src.utils.noise_type import NoiseType
 from src.views.barrier_tool_view import BarrierToolView
@@ -27,6 +24,7 @@ class BarrierToolPresenter:
         self.view.add_avoid_region_button_clicked.connect(self.view.add_avoid_region)
         self.view.delete_avoid_region_button_clicked.connect(self.__delete_avoid_region)
         self.view.find_barrier_button_clicked.connect(self.__find_barrier)
+        self.view.cancel_button_clicked.connect(self.__cancel_computation)
         self.view.number_of_dimensions_changed.connect(self.__update_dimensionality)
         self.view.parallelization_check_box_state_changed.connect(self.__set_parallel)
         self.view.import_config_button_clicked.connect(self.__import_config)
@@ -34,6 +32,7 @@ class BarrierToolPresenter:
 
         # Connect signal from the model
         self.model.result_computed.connect(self.__update_results)
+        self.model.progress_reported.connect(self.view.update_progress)
 
     def show(self):
         self.view.show()
@@ -191,106 +190,10 @@ class BarrierToolPresenter:
 
     @staticmethod
     def __prepare_parameters_for_computation(mode: SystemMode, parameters: dict) -> dict:
+        # numpy and sympy load on the first computation, not with the window
+        from src.utils.config import prepare_parameters
 
-        if parameters.get('mode') is not None:
-            del parameters['mode']
-
-        # Generic parameters:
-        parameters['dim'] = int(parameters['dim'])
-        parameters['b_degree'] = int(parameters['b_degree'])
-        parameters['l_degree'] = int(parameters['l_degree']) if parameters['l_degree'] != '' else parameters['b_degree']
-        parameters['gam'] = float(parameters['gam']) if parameters['gam'] != '' else None
-        parameters['lam'] = float(parameters['lam']) if parameters['lam'] != '' else None
-
-        # Region parameters:
-        parameters['L_space'] = get_np_array_from_string(parameters['L_space'])
-        parameters['U_space'] = get_np_array_from_string(parameters['U_space'])
-        parameters['L_initial'] = get_np_array_from_string(parameters['L_initial'])
-        parameters['U_initial'] = get_np_array_from_string(parameters['U_initial'])
-        parameters['L_unsafe'] = [get_np_array_from_string(val) for val in parameters['L_unsafe']]
-        parameters['U_unsafe'] = [get_np_array_from_string(val) for val in parameters['U_unsafe']]
-
-        # Dynamics parameters:
-        parameters['x'] = sp.symbols(f"x1:{parameters['dim'] + 1}")
-        sp_vars = parameters['x']
-
-        if mode == SystemMode.DT_SS:
-            parameters['varsigma'] = sp.symbols(f"varsigma1:{parameters['dim'] + 1}")
-            sp_vars += parameters['varsigma']
-
-        dynamics_expressions = []
-        for i in range(len(parameters['f'])):
-            s = parameters['f'][i]
-            expression = get_expression_from_string(s=s,
-                                                    locals=sp_vars,
-                                                    err_message=f"Please make sure to enter correct dynamics "
-                                                                f"expression in the line {i + 1}!")
-            dynamics_expressions.append(expression)
-        parameters['f'] = np.array(dynamics_expressions)
-
-        if mode.is_stochastic():
-            parameters['optimize'] = True if parameters['optimize'].lower().strip() == 'true' else False
-            parameters['confidence'] = float(parameters['confidence'])
-            parameters['c_val'] = float(parameters['c_val']) if parameters['c_val'] != '' else None
-
-            if parameters['t'] == '':
-                raise RequiredParameterMissingError("Time horizon parameter is required.")
-            parameters['t'] = float(parameters['t'])
-
-            if parameters['optimize'] is True and parameters['lam'] is None:
-                print("Here")
-                raise RequiredParameterMissingError("λ parameter is required for optimization.")
-
-            if mode == SystemMode.DT_SS:
-                if parameters['noise_type'] == 'normal':
-                    parameters['mean'] = get_np_array_from_string(parameters['mean']) \
-                        if parameters['mean'] != "" else np.zeros(parameters['dim'], dtype=np.double)
-
-                    if parameters['sigma'] == "":
-                        raise RequiredParameterMissingError("σ parameter is required.")
-
-                    parameters['sigma'] = get_np_array_from_string(parameters['sigma'])
-
-                elif parameters['noise_type'] == 'exponential':
-                    if parameters['rate'] == "":
-                        raise RequiredParameterMissingError("Rate is a required parameter.")
-
-                    parameters['rate'] = get_np_array_from_string(parameters['rate'])
-
-                elif parameters['noise_type'] == 'uniform':
-
-                    if parameters['a'] == "" or parameters['b'] == "":
-                        raise RequiredParameterMissingError("a and b are required parameters.")
-
-                    parameters['a'] = get_np_array_from_string(parameters['a'])
-                    parameters['b'] = get_np_array_from_string(parameters['b'])
-
-            elif mode == SystemMode.CT_SS:
-                delta_expressions = []
-                for i in range(len(parameters['delta'])):
-                    s = parameters['delta'][i]
-                    delta_expressions.append(get_expression_from_string(s=s,
-                                                                        locals=parameters['x'],
-                                                                        err_message=f"Please make sure to enter the "
-                                                                                    f"correct δ in the line {i + 1}!")
-                                             if s != "" else 0)
-                parameters['delta'] = np.array(delta_expressions)
-
-                rho_expressions = []
-                for i in range(len(parameters['rho'])):
-                    s = parameters['rho'][i]
-                    rho_expressions.append(get_expression_from_string(s=s,
-                                                                      locals=parameters['x'],
-                                                                      err_message=f"Please make sure to enter the "
-                                                                                  f"correct ρ in the line {i + 1}!")
-
-                                           if s != "" else 0)
-                parameters['rho'] = np.array(rho_expressions)
-
-                parameters['p_rate'] = get_np_array_from_string(parameters['p_rate']) \
-                    if parameters['p_rate'] != "" else np.zeros(parameters['dim'], dtype=np.double)
-
-        return parameters
+        return prepare_parameters(mode, parameters)
 
     def __find_barrier(self):
         try:
@@ -298,7 +201,9 @@ class BarrierToolPresenter:
             parameters = self.__retrieve_parameters()
             parameters = self.__prepare_parameters_for_computation(mode, parameters)
             logger.info("Computation parameters:\n" + str(parameters))
+            self.view.clear_progress()
             self.model.find_barrier(mode, parameters)
+            self.view.set_computing(True)
 
         except BarrierNotFoundError:
             self.view.show_warning("Barrier not found for given parameters.")
@@ -314,12 +219,19 @@ class BarrierToolPresenter:
             self.view.show_parameters_warning()
             return
 
+    def __cancel_computation(self):
+        logger.info("Cancelling the computation.")
+        self.model.cancel_computing()
+
     def __update_results(self):
+        self.view.set_computing(False)
         result: dict = self.model.retrieve_result()
         if result is not None:
             if result.get('barrier') is not None:
                 logger.info("Results:\n" + str(result))
                 self.view.update_result(result)
+            elif result.get('error') == CANCELLED_ERROR:
+                logger.info("Computation cancelled.")
             elif result.get('error'):
                 self.view.show_warning(f"Barrier not found: {result['error']}")
             else:
@@ -0,0 +1,138 @@
+import json
+
+import numpy as np
+import sympy as sp
+
+from src.utils.common import get_np_array_from_string, get_expression_from_string
+from src.utils.exceptions import RequiredParameterMissingError
+from src.utils.system_mode import SystemMode
+
+
+def prepare_parameters(mode: SystemMode, parameters: dict) -> dict:
+    """
+    Converts the string parameters of the user interface (or of a
+    configuration file) to the arguments of the barrier functions.
+
+    Args:
+        mode(SystemMode): Computation mode.
+        parameters(dict): String parameters, as exported by the GUI. Converted in place.
+
+    Returns:
+        dict: keyword arguments of the function of the given mode.
+
+    Raises:
+        RequiredParameterMissingError: If a parameter required by the mode is empty.
+        ExpressionFromStringError: If an expression cannot be parsed.
+    """
+
+    if parameters.get('mode') is not None:
+        del parameters['mode']
+
+    # Generic parameters:
+    parameters['dim'] = int(parameters['dim'])
+    parameters['b_degree'] = int(parameters['b_degree'])
+    parameters['l_degree'] = int(parameters['l_degree']) if parameters['l_degree'] != '' else parameters['b_degree']
+    parameters['gam'] = float(parameters['gam']) if parameters['gam'] != '' else None
+    parameters['lam'] = float(parameters['lam']) if parameters['lam'] != '' else None
+
+    # Region parameters:
+    parameters['L_space'] = get_np_array_from_string(parameters['L_space'])
+    parameters['U_space'] = get_np_array_from_string(parameters['U_space'])
+    parameters['L_initial'] = get_np_array_from_string(parameters['L_initial'])
+    parameters['U_initial'] = get_np_array_from_string(parameters['U_initial'])
+    parameters['L_unsafe'] = [get_np_array_from_string(val) for val in parameters['L_unsafe']]
+    parameters['U_unsafe'] = [get_np_array_from_string(val) for val in parameters['U_unsafe']]
+
+    # Dynamics parameters:
+    parameters['x'] = sp.symbols(f"x1:{parameters['dim'] + 1}")
+    sp_vars = parameters['x']
+
+    if mode == SystemMode.DT_SS:
+        parameters['varsigma'] = sp.symbols(f"varsigma1:{parameters['dim'] + 1}")
+        sp_vars += parameters['varsigma']
+
+    dynamics_expressions = []
+    for i in range(len(parameters['f'])):
+        s = parameters['f'][i]
+        expression = get_expression_from_string(s=s,
+                                                locals=sp_vars,
+                                                err_message=f"Please make sure to enter correct dynamics "
+                                                            f"expression in the line {i + 1}!")
+        dynamics_expressions.append(expression)
+    parameters['f'] = np.array(dynamics_expressions)
+
+    if mode.is_stochastic():
+        parameters['optimize'] = True if parameters['optimize'].lower().strip() == 'true' else False
+        parameters['confidence'] = float(parameters['confidence'])
+        parameters['c_val'] = float(parameters['c_val']) if parameters['c_val'] != '' else None
+
+        if parameters['t'] == '':
+            raise RequiredParameterMissingError("Time horizon parameter is required.")
+        parameters['t'] = float(parameters['t'])
+
+        if parameters['optimize'] is True and parameters['lam'] is None:
+            raise RequiredParameterMissingError("λ parameter is required for optimization.")
+
+        if mode == SystemMode.DT_SS:
+            if parameters['noise_type'] == 'normal':
+                parameters['mean'] = get_np_array_from_string(parameters['mean']) \
+                    if parameters['mean'] != "" else np.zeros(parameters['dim'], dtype=np.double)
+
+                if parameters['sigma'] == "":
+                    raise RequiredParameterMissingError("σ parameter is required.")
+
+                parameters['sigma'] = get_np_array_from_string(parameters['sigma'])
+
+            elif parameters['noise_type'] == 'exponential':
+                if parameters['rate'] == "":
+                    raise RequiredParameterMissingError("Rate is a required parameter.")
+
+                parameters['rate'] = get_np_array_from_string(parameters['rate'])
+
+            elif parameters['noise_type'] == 'uniform':
+
+                if parameters['a'] == "" or parameters['b'] == "":
+                    raise RequiredParameterMissingError("a and b are required parameters.")
+
+                parameters['a'] = get_np_array_from_string(parameters['a'])
+                parameters['b'] = get_np_array_from_string(parameters['b'])
+
+        elif mode == SystemMode.CT_SS:
+            delta_expressions = []
+            for i in range(len(parameters['delta'])):
+                s = parameters['delta'][i]
+                delta_expressions.append(get_expression_from_string(s=s,
+                                                                    locals=parameters['x'],
+                                                                    err_message=f"Please make sure to enter the "
+                                                                                f"correct δ in the line {i + 1}!")
+                                         if s != "" else 0)
+            parameters['delta'] = np.array(delta_expressions)
+
+            rho_expressions = []
+            for i in range(len(parameters['rho'])):
+                s = parameters['rho'][i]
+                rho_expressions.append(get_expression_from_string(s=s,
+                                                                  locals=parameters['x'],
+                                                                  err_message=f"Please make sure to enter the "
+                                                                              f"correct ρ in the line {i + 1}!")
+
+                                       if s != "" else 0)
+            parameters['rho'] = np.array(rho_expressions)
+
+            parameters['p_rate'] = get_np_array_from_string(parameters['p_rate']) \
+                if parameters['p_rate'] != "" else np.zeros(parameters['dim'], dtype=np.double)
+
+    return parameters
+
+
+def load_config(path: str) -> tuple[SystemMode, dict]:
+    """
+    Loads a configuration file exported by the GUI (see ex/GUI_config_files).
+
+    Returns:
+        tuple: the computation mode and the prepared keyword arguments.
+    """
+    with open(path, 'r') as json_file:
+        parameters = json.load(json_file)
+    mode = SystemMode(parameters['mode'])
+    return mode, prepare_parameters(mode, parameters)
@@ -7,7 +7,6 @@ from PyQt6.QtWidgets import QMainWindow, QTableWidget, QHeaderView, QLineEdit, Q
     QSizePolicy, QLabel, QFormLayout, QDoubleSpinBox, QMessageBox, QLayout, QComboBox, QCheckBox, QHBoxLayout, \
     QWidget, QFileDialog
 from PyQt6 import uic
-from brian2.parsing.sympytools import sympy_to_str
 
 from src.utils.noise_type import NoiseType
 from src.utils.system_mode import SystemMode
@@ -27,6 +26,7 @@ class BarrierToolView(QMainWindow):
     add_avoid_region_button_clicked = pyqtSignal()
     delete_avoid_region_button_clicked = pyqtSignal()
     find_barrier_button_clicked = pyqtSignal()
+    cancel_button_clicked = pyqtSignal()
     import_config_button_clicked = pyqtSignal()
     export_config_button_clicked = pyqtSignal()
 
@@ -405,6 +405,9 @@ class BarrierToolView(QMainWindow):
         mode = self.retrieve_system_mode()
 
         if result.get('error') is None:
+            # imported here: brian2 pulls in sympy and its code generators, which would delay the start-up
+            from brian2.parsing.sympytools import sympy_to_str
+
             # TODO: add set <parameter> function and call update result from presenter
             self.barrierTextEdit.setText(sympy_to_str(result["barrier"]))
             self.lambdaLineEdit.setText(str(result["lambda"]))
@@ -414,6 +417,24 @@ class BarrierToolView(QMainWindow):
                 self.optional_components["mainParameterConfigForm"]["cLineEdit"].setText(str(result["c"]))
                 self.optional_components["confidenceLayout"]["confidenceLineEdit"].setText(str(result["confidence"]))
 
+    def set_computing(self, computing: bool):
+        self.cancelButton.setEnabled(computing)
+
+    def clear_progress(self):
+        self.progressTable.setRowCount(0)
+
+    def update_progress(self, event: dict):
+        """Shows a progress event (see src.functions.progress) in the row of its degree."""
+        row = self.__progress_row(event["b_degree"])
+        cells = {1: event.get("state"), 2: event.get("phase"),
+                 3: f"{event['elapsed']:.1f}" if "elapsed" in event else None,
+                 4: f"{event['gram_blocks']} (max {event['gram_size']})" if "gram_blocks" in event else None}
+        for column, text in cells.items():
+            if text is not None:
+                self.progressTable.setItem(row, column, QTableWidgetItem(text))
+        if event.get("error"):
+            self.progressTable.item(row, 1).setToolTip(str(event["error"]))
+
     def update_region_labels(self, last_row):
         for row in range(last_row, self.regionTable.rowCount()):
             label = f'Xu_{row - 1} :'
@@ -448,6 +469,15 @@ class BarrierToolView(QMainWindow):
     def show_warning(self, warning_text: str):
         QMessageBox.warning(self, "Warning", warning_text)
 
+    def __progress_row(self, b_degree) -> int:
+        for row in range(self.progressTable.rowCount()):
+            if self.progressTable.item(row, 0).text() == str(b_degree):
+                return row
+        row = self.progressTable.rowCount()
+        self.progressTable.insertRow(row)
+        self.progressTable.setItem(row, 0, QTableWidgetItem(str(b_degree)))
+        return row
+
     def __format_existing_tables(self):
         # Formatting region table resize-ability:
         region_table = self.findChild(QTableWidget, "regionTable")
@@ -459,6 +489,9 @@ class BarrierToolView(QMainWindow):
         dynamics_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         dynamics_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
 
+        # Formatting progress table resize-ability:
+        self.progressTable.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+
         # Resize table headers
         region_table.verticalHeader().setMinimumSize(self.__min_table_horizontal_header_width, 0)
         dynamics_table.verticalHeader().setMinimumSize(self.__min_table_horizontal_header_width, 0)
@@ -468,6 +501,7 @@ class BarrierToolView(QMainWindow):
         self.add_avoid_region_button_clicked = self.addRegionButton.clicked
         self.delete_avoid_region_button_clicked = self.deleteRegionButton.clicked
         self.find_barrier_button_clicked = self.findBarrierButton.clicked
+        self.cancel_button_clicked = self.cancelButton.clicked
         self.import_config_button_clicked = self.importConfigButton.clicked
         self.export_config_button_clicked = self.exportConfigButton.clicked
 
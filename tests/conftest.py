@@ -0,0 +1,5 @@
+import os
+
+# the tests exercise the solvers, so results are not read from (or written to) the user's cache even
+# if it is turned on; set before any worker pool starts, so that the workers inherit it
+os.environ["PROTECT_CACHE"] = "0"
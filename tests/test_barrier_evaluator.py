@@ -0,0 +1,59 @@
+import os
+import pickle
+import sys
+
+import numpy as np
+import sympy as sp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.barrier_evaluator import barrier_evaluator, drift_evaluator
+from src.utils.system_mode import SystemMode
+
+x = sp.symbols('x1:3')
+varsigma = sp.symbols('varsigma1:3')
+B = 1.5 * x[0] ** 4 - 0.3 * x[0] * x[1] ** 3 + 2 * x[1] ** 2 + 0.7
+f = np.array([x[0] - 0.1 * x[1] ** 2, 0.5 * x[1]])
+STATES = np.random.default_rng(0).uniform(-1, 1, (1000, 2))
+
+
+def reference(expr, states):
+    return sp.lambdify(x, expr)(states[:, 0], states[:, 1])
+
+
+def test_barrier_and_gradient_match_sympy():
+    evaluator = barrier_evaluator({"barrier": B}, x)
+    assert np.allclose(evaluator(STATES), reference(B, STATES))
+    assert np.isclose(evaluator(STATES[0]), reference(B, STATES[:1])[0])
+
+    gradient = evaluator.gradient()(STATES)
+    assert gradient.shape == (1000, 2)
+    assert np.allclose(gradient, np.array(reference([sp.diff(B, xi) for xi in x], STATES)).T)
+
+    restored = pickle.loads(pickle.dumps(evaluator))
+    assert np.array_equal(restored(STATES), evaluator(STATES))
+
+
+def test_deterministic_drifts():
+    composed = B.subs(dict(zip(x, f)), simultaneous=True) - B
+    assert np.allclose(drift_evaluator(SystemMode.DT_DS, B, x, f)(STATES), reference(composed, STATES))
+    lie = sum(sp.diff(B, xi) * fi for xi, fi in zip(x, f))
+    assert np.allclose(drift_evaluator("continuous_deterministic", B, x, f)(STATES), reference(lie, STATES))
+
+
+def test_stochastic_drifts():
+    noisy = np.array([x[0] + varsigma[0], 0.5 * x[1] + 0.1 * varsigma[1]])
+    drift = drift_evaluator(SystemMode.DT_SS, B, x, noisy, varsigma=varsigma, noise_type="normal", sigma=[0.1, 0.2])
+    # E[B(f)] for independent normal noise: compare with the sympy expectation
+    n1, n2 = sp.symbols('n1 n2')
+    expectation = sp.expand(B.subs({x[0]: x[0] + n1, x[1]: 0.5 * x[1] + 0.1 * n2}, simultaneous=True))
+    expectation = expectation.subs({n1 ** 4: 3 * 0.1 ** 4, n2 ** 4: 3 * 0.2 ** 4}).subs(
+        {n1 ** 3: 0, n2 ** 3: 0}).subs({n1 ** 2: 0.1 ** 2, n2 ** 2: 0.2 ** 2}).subs({n1: 0, n2: 0})
+    assert np.allclose(drift(STATES), reference(expectation - B, STATES))
+
+    delta, rho, p_rate = np.array([0.1, 0.2]), np.array([0.05, -0.1]), np.array([0.3, 0.5])
+    drift = drift_evaluator(SystemMode.CT_SS, B, x, f, delta=delta, rho=rho, p_rate=p_rate)
+    generator = sum(sp.diff(B, xi) * fi for xi, fi in zip(x, f)) \
+        + 0.5 * (delta @ delta) * sum(sp.diff(B, xi, 2) for xi in x) \
+        + sum(p_rate[j] * (B.subs(x[j], x[j] + rho[j]) - B) for j in range(2))
+    assert np.allclose(drift(STATES), reference(generator, STATES))
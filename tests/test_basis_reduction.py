@@ -0,0 +1,45 @@
+import os
+import sys
+
+import numpy as np
+import sympy as sp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from SumOfSquares import SOSProblem
+
+from src.functions.basis_reduction import add_sos_constraint, reduce_basis
+from src.functions.ct_DS import ct_DS
+
+
+def test_newton_basis_of_motzkin_polynomial():
+    """x^4 y^2 + x^2 y^4 - 3 x^2 y^2 + 1 only needs 1, xy, x^2 y and x y^2."""
+    support = [(0, 0), (4, 2), (2, 4), (2, 2)]
+    assert len(reduce_basis(support, 6, None)) == 10
+    basis = reduce_basis(support, 6, "newton")
+    assert sorted(map(tuple, basis.tolist())) == [(0, 0), (1, 1), (1, 2), (2, 1)]
+
+
+def test_basis_reduction_reports_gram_sizes():
+    """Low degree multipliers leave the cubic dynamics term outside part of the full basis."""
+    x = sp.symbols('x1:3')
+    f = np.array([-x[1] - 1.5 * x[0] ** 2 - 0.5 * x[0] ** 3 - 0.5, 3 * x[0] - x[1]])
+    result = ct_DS(4, 2, np.array([0.1, 0.1]), np.array([0.4, 0.4]), np.array([[0.45, 0.6]]),
+                   np.array([[0.5, 0.65]]), np.array([0.1, 0.1]), np.array([0.5, 0.65]), x, f,
+                   solver="cvxopt", l_degree=2, backend="sparse", basis_reduction="diagonal")
+
+    assert "barrier" in result
+    assert result["gram_sizes"]["dynamics"] == (10, 8)
+    assert result["gram_sizes"]["barrier"] == (6, 6)
+
+
+def test_unrepresentable_coefficients_vanish():
+    """c x^3 is outside the reduced basis of c x^3 + x^2 y^2 + 1, so c has to be zero."""
+    x, y, c = sp.symbols('x y c')
+    for basis_reduction, size in (("newton", 3), ("diagonal", 2)):
+        prob = SOSProblem()
+        constraint, sizes = add_sos_constraint(prob, c * x ** 3 + x ** 2 * y ** 2 + 1, [x, y], basis_reduction)
+        assert sizes == (6, size)
+        prob.set_objective("max", prob.sym_to_var(c))
+        prob.solve(solver="cvxopt")
+        assert abs(prob.sym_to_var(c).value) < 1e-6
@@ -0,0 +1,30 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.batch import format_table, run_batch
+
+CONFIGS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ex", "GUI_config_files"))
+
+
+def test_batch_runs_configs_and_reports_failures(tmp_path):
+    broken = tmp_path / "broken_config"
+    broken.write_text("{not json")
+    output = str(tmp_path / "batch.jsonl")
+
+    rows = run_batch([os.path.join(CONFIGS, "1d_ct_SS"), str(broken)], all_degrees=True,
+                     overrides={"solver": "cvxopt", "backend": "sparse"}, output=output, max_workers=1)
+
+    with open(output) as file:
+        streamed = [json.loads(line) for line in file]
+    assert len(rows) == len(streamed) == 4
+    solved = sorted((row for row in rows if row["config"] == "1d_ct_SS"), key=lambda row: row["b_degree"])
+    assert [row["b_degree"] for row in solved] == [2, 4, 6]
+    assert all(row["status"] == "ok" and 0 <= row["confidence"] <= 1 and row["solve_seconds"] > 0
+               for row in solved)
+    assert [row["status"] for row in rows if row["config"] == "broken_config"] == ["failed"]
+
+    table = format_table(rows).splitlines()
+    assert table[0].split()[:3] == ["config", "b_degree", "status"] and len(table) == 5
@@ -0,0 +1,72 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import sympy as sp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.cancellation import CANCELLED_ERROR, CancellationToken
+from src.functions.ct_DS import ct_DS
+from src.functions.parallel_ct_DS import parallel_ct_DS
+from src.models.barrier_tool_model import BarrierToolModel
+from src.utils.system_mode import SystemMode
+
+x = sp.symbols('x1:3')
+PROBLEM = dict(dim=2, L_initial=np.array([0.1, 0.1]), U_initial=np.array([0.4, 0.4]),
+               L_unsafe=np.array([[0.45, 0.6]]), U_unsafe=np.array([[0.5, 0.65]]), L_space=np.array([0.1, 0.1]),
+               U_space=np.array([0.5, 0.65]), x=x,
+               f=np.array([-x[1] - 1.5 * x[0] ** 2 - 0.5 * x[0] ** 3 - 0.5, 3 * x[0] - x[1]]), solver="cvxopt")
+
+
+def cancelled_after(seconds):
+    token = CancellationToken()
+    threading.Timer(seconds, token.cancel).start()
+    return token
+
+
+def test_token_runs_callbacks_once():
+    token, calls = CancellationToken(), []
+    token.on_cancel(lambda: calls.append("before"))
+    token.cancel()
+    token.cancel()
+    token.on_cancel(lambda: calls.append("after"))
+    assert token.cancelled and calls == ["before", "after"]
+
+
+def test_engine_stops_at_phase_boundary():
+    token = CancellationToken()
+    assert "barrier" in ct_DS(2, **PROBLEM, cancel_token=token)
+
+    token.cancel()
+    result = ct_DS(2, **PROBLEM, cancel_token=token)
+    assert result["error"] == CANCELLED_ERROR and result["b_degree"] == 2
+
+
+def test_parallel_terminates_running_degrees():
+    start = time.monotonic()
+    result = parallel_ct_DS(10, **PROBLEM, stopping=None, cancel_token=cancelled_after(1))
+    assert 10 in result["cancelled_degrees"]
+    assert time.monotonic() - start < 30
+
+
+def test_model_cancels_worker():
+    token = cancelled_after(1)
+    thread = BarrierToolModel.GatewayThread(SystemMode.CT_DS, dict(PROBLEM, b_degree=10), False,
+                                            cancel_token=token)
+    start = time.monotonic()
+    thread.run()
+    assert thread.retrieve_result() == {"error": CANCELLED_ERROR, "b_degree": 10}
+    assert time.monotonic() - start < 30
+
+
+def test_model_reports_worker_failures():
+    thread = BarrierToolModel.GatewayThread(SystemMode.CT_DS, dict(PROBLEM, b_degree=2, unknown_option=1), False)
+    finished = []
+    thread.finished.connect(lambda: finished.append(True))
+    thread.run()
+    result = thread.retrieve_result()
+    assert result["error"].startswith("TypeError") and result["b_degree"] == 2
+    assert finished == [True]
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import sympy as sp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.chordal import chordal_cliques, correlative_cliques
+from src.functions.ct_DS import ct_DS
+
+
+def chain(n):
+    x = sp.symbols(f'x1:{n + 1}')
+    f = np.array([-x[0] - 0.1 * x[0] ** 3] + [-x[i] + 0.2 * x[i - 1] for i in range(1, n)])
+    return x, f
+
+
+def test_chordal_extension_of_cycle():
+    """A 4-cycle needs one chord, giving two triangles."""
+    adjacency = np.zeros((4, 4), dtype=bool)
+    for i in range(4):
+        adjacency[i, (i + 1) % 4] = adjacency[(i + 1) % 4, i] = True
+    cliques = chordal_cliques(adjacency)
+    assert len(cliques) == 2 and all(len(c) == 3 for c in cliques)
+    assert set(cliques[0]) | set(cliques[1]) == {0, 1, 2, 3}
+
+
+def test_correlative_ct_DS_chain():
+    """A chain only couples neighbours, so the barrier splits over pairs of states."""
+    n = 5
+    x, f = chain(n)
+    assert correlative_cliques(x, f) == [[i, i + 1] for i in range(n - 1)]
+
+    result = ct_DS(2, n, np.full(n, -0.5), np.full(n, 0.5), np.array([np.full(n, 1.5)]), np.array([np.full(n, 2.0)]),
+                   np.full(n, -2.0), np.full(n, 2.0), x, f, solver="cvxopt", backend="sparse", sparsity="correlative")
+
+    assert "barrier" in result
+    assert result["gram_sizes"]["dynamics"] == (21, 6)
+    assert result["cliques"][0] == ['x1', 'x2']
+
+
+def test_correlative_needs_sparse_backend():
+    x, f = chain(3)
+    with pytest.raises(ValueError):
+        ct_DS(2, 3, np.full(3, -0.5), np.full(3, 0.5), np.array([np.full(3, 1.5)]), np.array([np.full(3, 2.0)]),
+              np.full(3, -2.0), np.full(3, 2.0), x, f, solver="cvxopt", sparsity="correlative")
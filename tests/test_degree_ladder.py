@@ -0,0 +1,41 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import sympy as sp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.ct_SS import ct_SS
+from src.functions.degree_ladder import degree_ladder
+
+
+def _ct_SS_params():
+    x = sp.symbols('x1:3')
+    return dict(dim=2, L_initial=np.array([-0.5, -0.5]), U_initial=np.array([0.5, 0.5]),
+                L_unsafe=np.array([[2, 2]]), U_unsafe=np.array([[3, 3]]),
+                L_space=np.array([-3, -3]), U_space=np.array([3, 3]), x=x, f=np.array([-x[1], x[0] - x[1]]),
+                delta=np.array([0, 0.5 * x[1]]), rho=np.array([0.1, 0]), p_rate=np.array([0.5, 0]), t=5,
+                lam=10, optimize=True, solver="cvxopt", backend="sparse")
+
+
+def test_warm_start_reaches_the_cold_optimum():
+    """Starting from the degree-2 solution does not change the degree-4 optimum."""
+    params = _ct_SS_params()
+    low = ct_SS(2, warm_start={}, **params)
+    cold = ct_SS(4, **params)
+    warm = ct_SS(4, warm_start=low["warm_start"], **params)
+
+    assert any(key[0] == "polynomial" for key in low["warm_start"])
+    assert warm["confidence"] == pytest.approx(cold["confidence"], abs=1e-6)
+    assert warm["iterations"] > 0
+
+
+def test_ladder_stops_at_target_confidence():
+    params = _ct_SS_params()
+    results = degree_ladder(ct_SS, [2, 4, 6], target_confidence=0.99, **params)
+
+    assert [result["b_degree"] for result in results] == [2, 4]
+    assert results[0]["confidence"] < 0.99 <= results[1]["confidence"]
+    assert all("warm_start" not in result for result in results)
@@ -0,0 +1,95 @@
+import logging
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import sympy as sp
+from pebble import ThreadPool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions import sparse_sos
+from src.functions.ct_DS import ct_DS
+from src.functions.degree_scheduler import DegreeScheduler, Job, plan_degrees, run_degrees
+from src.functions.problem_size import dynamics_degree, estimate_problem_size
+
+
+def test_estimate_matches_sparse_program(monkeypatch):
+    """The estimate is exact for full bases: compare it with the program the sparse backend builds."""
+    built = {}
+    solve = sparse_sos.SparseSOSProgram.solve
+
+    def recording_solve(program, *args, **kwargs):
+        built.update(grams=sorted(len(gram) for gram in program.grams), columns=program.num_columns,
+                     equalities=len(program.equality_triplets()[3]))
+        return solve(program, *args, **kwargs)
+
+    monkeypatch.setattr(sparse_sos.SparseSOSProgram, "solve", recording_solve)
+    x = sp.symbols('x1:3')
+    f = np.array([-x[1] - 1.5 * x[0] ** 2 - 0.5 * x[0] ** 3 - 0.5, 3 * x[0] - x[1]])
+    ct_DS(4, 2, np.array([0.1, 0.1]), np.array([0.4, 0.4]), np.array([[0.45, 0.6]]), np.array([[0.5, 0.65]]),
+          np.array([0.1, 0.1]), np.array([0.5, 0.65]), x, f, solver="cvxopt", backend="sparse")
+
+    estimate = estimate_problem_size(2, 4, unsafe_regions=1, condition_degree=dynamics_degree(x, f, 4, False),
+                                     backend="sparse")
+    assert sorted(estimate["gram_blocks"]) == built["grams"]
+    assert estimate["columns"] == built["columns"]
+    assert estimate["equalities"] == built["equalities"]
+
+
+def test_plan_orders_by_cost():
+    size_of = lambda degree: estimate_problem_size(3, degree)
+    assert plan_degrees([2, 4, 6], size_of) == [(2, None, 0), (4, None, 0), (6, None, 0)]
+
+    plan = plan_degrees([2, 4, 6], size_of, "cost", workers=8)
+    assert [degree for degree, _, _ in plan] == [6, 4, 2]
+    assert plan[0][1] > plan[-1][1] == 1
+    # an early stop is reached sooner from the low degrees
+    assert [degree for degree, _, _ in plan_degrees([2, 4, 6], size_of, "cost", "first_feasible")] == [2, 4, 6]
+
+
+def test_memory_budget_caps_concurrency():
+    running, peak = [], []
+    lock = threading.Lock()
+
+    def job(degree):
+        with lock:
+            running.append(degree)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(degree)
+        return degree
+
+    jobs = [Job(degree, job, (degree,), {}, 100) for degree in [2, 4, 6, 8]]
+    with ThreadPool(max_workers=4) as pool:
+        scheduler = DegreeScheduler(pool, jobs, memory_budget=250)
+        finished = [degree for degree, _ in scheduler.completed()]
+
+    assert sorted(finished) == [2, 4, 6, 8]
+    assert max(peak) == 2
+
+
+def degree_result(degree, progress=None):
+    if degree == 4:
+        raise RuntimeError("solver crashed")
+    if degree == 6:
+        return {"error": "memory_limit", "b_degree": degree}
+    return {"barrier": "x**2", "b_degree": degree} if degree == 8 else {"error": "infeasible", "b_degree": degree}
+
+
+def test_run_degrees_logs_and_reports_failures(capsys, caplog):
+    events = []
+    jobs = [Job(degree, degree_result, (degree,), {}, 0) for degree in [2, 4, 6, 8]]
+    size_of = lambda degree: {"gram_blocks": [degree]}
+    with ThreadPool(max_workers=4) as pool, caplog.at_level(logging.INFO):
+        result = run_degrees(jobs, [2, 4, 6, 8], size_of, progress=events.append, pool=pool)
+
+    assert result["b_degree"] == 8 and result["memory_limited_degrees"] == [6]
+    assert capsys.readouterr().out == ""
+    assert "Degree 4 raised an exception: solver crashed" in caplog.text
+    assert "No barrier of degree 2: infeasible" in caplog.text
+    failed = [event for event in events if event["state"] == "failed"]
+    assert [(event["b_degree"], event["error"]) for event in failed] == [(4, "solver crashed")]
@@ -0,0 +1,87 @@
+import os
+import resource
+import sys
+
+import mosek
+import numpy as np
+import sympy as sp
+from pebble import ThreadPool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.ct_DS import ct_DS
+from src.functions.degree_scheduler import DegreeScheduler, Job
+from src.functions.memory_limit import MEMORY_LIMIT_ERROR, limit_jobs, memory_limited, out_of_memory
+from src.functions.parallel_ct_DS import parallel_ct_DS
+
+x = sp.symbols('x1:3')
+PROBLEM = (2, np.array([0.1, 0.1]), np.array([0.4, 0.4]), np.array([[0.45, 0.6]]), np.array([[0.5, 0.65]]),
+           np.array([0.1, 0.1]), np.array([0.5, 0.65]), x,
+           np.array([-x[1] - 1.5 * x[0] ** 2 - 0.5 * x[0] ** 3 - 0.5, 3 * x[0] - x[1]]))
+
+
+@memory_limited
+def allocate(b_degree, megabytes):
+    return {"b_degree": b_degree, "total": float(np.ones(megabytes * 2 ** 17).sum())}
+
+
+def test_limit_is_reported_and_restored():
+    before = resource.getrlimit(resource.RLIMIT_AS)
+
+    result = allocate(2, 512, memory_limit=64 * 2 ** 20)
+    assert result["error"] == MEMORY_LIMIT_ERROR and result["b_degree"] == 2
+    assert resource.getrlimit(resource.RLIMIT_AS) == before
+
+    result = allocate(2, 16, memory_limit=256 * 2 ** 20)
+    assert result["total"] == 16 * 2 ** 17
+    assert result["peak_memory"] >= 16 * 2 ** 20
+
+
+@memory_limited
+def failing_solve(b_degree, megabytes):
+    # a native solver whose workspace grows until an allocation fails, without raising MemoryError
+    workspace = []
+    try:
+        while len(workspace) < megabytes:
+            workspace.append(np.ones(2 ** 17))
+    except MemoryError:
+        pass
+    return {"error": "Solver Exception", "b_degree": b_degree}
+
+
+def test_native_allocation_failures_are_memory_limits():
+    try:
+        raise RuntimeError("solve failed") from mosek.Error(mosek.rescode.err_space, "out of space")
+    except RuntimeError as exc:
+        assert out_of_memory(exc)
+    assert not out_of_memory(ValueError("MSK_RES_ERR_INF_DOU_INDEX"))
+
+    assert failing_solve(2, 1024, memory_limit=128 * 2 ** 20)["error"] == MEMORY_LIMIT_ERROR
+    # the same failure far from the limit is the solver's
+    assert failing_solve(2, 1, memory_limit=2 ** 30)["error"] == "Solver Exception"
+
+
+def test_engine_records_peak_memory():
+    result = ct_DS(4, *PROBLEM, solver="cvxopt", memory_limit=2 ** 31)
+    assert "barrier" in result and result["peak_memory"] > 0
+
+
+def test_limits_serialise_jobs():
+    jobs = [Job(degree, allocate, (degree, 1), {}, 0) for degree in (2, 4, 6)]
+    limited, budget = limit_jobs(jobs, 2 ** 30, 2 ** 31 - 1)
+    assert budget == 2 ** 31 - 1
+    assert all(job.memory == 2 ** 30 and job.kwargs == {"memory_limit": 2 ** 30} for job in limited)
+    assert limit_jobs(jobs, None) == (jobs, None)
+
+    with ThreadPool(max_workers=3) as pool:
+        scheduler = DegreeScheduler(pool, limited, budget)
+        scheduler._submit()
+        # two limits do not fit the budget together
+        assert len(scheduler.running) == 1
+        assert [key for key, _ in scheduler.completed()] == [2, 4, 6]
+
+
+def test_parallel_under_limit():
+    result = parallel_ct_DS(4, *PROBLEM, solver="cvxopt", memory_limit=2 ** 31)
+    assert "barrier" in result and result["peak_memory"] > 0
+    assert "memory_limited_degrees" not in result
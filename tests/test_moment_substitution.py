@@ -0,0 +1,57 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import sympy as sp
+from SumOfSquares import poly_variable
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.moment_substitution import expected_composition, legacy_substitute_moments
+from src.functions.noise_moments import noise_moment_table
+
+
+NOISE = {
+    "normal": {'mean': np.array([0.0, 0.1]), 'sigma': np.array([0.01, 0.2])},
+    "exponential": {'rate': np.array([2.0, 5.0])},
+    "uniform": {'a': np.array([-0.02, -0.5]), 'b': np.array([0.02, 0.5])},
+}
+
+
+@pytest.mark.parametrize("noise_type", list(NOISE))
+def test_expected_composition_matches_legacy(noise_type):
+    """The exponent based moment substitution gives the same polynomial as the string based loop."""
+    x = sp.symbols('x1:3')
+    varsigma = sp.symbols('varsigma1:3')
+    f = np.array([x[0] + 0.1 * x[1] + varsigma[0],
+                  x[1] + (-x[0] + (1 - x[0] ** 2) * x[1]) * 0.1 + x[0] * varsigma[1]])
+    Barrier = poly_variable('Barrier', x, 4)
+    noise = NOISE[noise_type]
+
+    y = [sp.Dummy(f'y{i}') for i in range(len(x))]
+    BB = Barrier.subs([(x[i], y[i]) for i in range(len(x))])
+    BB = sp.expand(BB.subs([(y[i], f[i]) for i in range(len(y))]))
+    legacy = legacy_substitute_moments(BB, varsigma, noise_type, **noise)
+
+    moments = noise_moment_table(noise_type, len(varsigma), 4, **noise)
+    vectorized = expected_composition(Barrier, x, varsigma, f, moments)
+
+    difference = sp.Poly(sp.expand(legacy - vectorized), *sorted(Barrier.free_symbols, key=str))
+    assert max([abs(float(c)) for c in difference.coeffs()] + [0.0]) < 1e-10
+
+
+def test_gaussian_moment_table_matches_scipy():
+    """Closed form Gaussian moments agree with scipy and repeated lookups hit the cache."""
+    scipy = pytest.importorskip("scipy")
+    from src.functions.noise_moments import distribution_moments
+
+    mean, sigma = np.array([0.0, 0.3]), np.array([0.5, 1.2])
+    table = noise_moment_table("gaussian", 2, 8, mean=mean, sigma=sigma)
+    for i in range(2):
+        expected = [1.0] + [scipy.stats.norm.moment(k, mean[i], sigma[i]) for k in range(1, 9)]
+        assert np.allclose(table[i], expected, rtol=1e-12, atol=1e-15)
+
+    hits = distribution_moments.cache_info().hits
+    noise_moment_table("normal", 2, 8, mean=mean, sigma=sigma)
+    assert distribution_moments.cache_info().hits == hits + 2
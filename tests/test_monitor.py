@@ -0,0 +1,63 @@
+import json
+import os
+import sys
+
+import numpy as np
+import sympy as sp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.monitor import SafetyMonitor, load_certificate, save_certificate
+from src.utils.system_mode import SystemMode
+
+CONFIG = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "ex", "GUI_config_files", "2d_Two_Tank_dt_SS"))
+x = sp.symbols('x1:3')
+# B = x1^2 + x2^2 with gamma 10, approach level 10 + 0.5 * 152 = 86 and lambda 162 (the unsafe corner 9,9)
+RESULT = {"barrier": x[0] ** 2 + x[1] ** 2, "gamma": 10.0, "lambda": 162.0, "c": 0.5, "confidence": 0.2,
+          "b_degree": 2}
+TRAJECTORY = np.array([[2.0, 2.0], [2.1, 2.0], [3.0, 2.0], [7.0, 7.0], [9.5, 9.5], [6.0, 6.0], [0.5, 6.0],
+                       [2.0, 2.0]])
+
+
+def certificate(tmp_path):
+    with open(CONFIG) as file:
+        config = json.load(file)
+    path = str(tmp_path / "certificate.json")
+    save_certificate(path, config, RESULT)
+    return load_certificate(path)
+
+
+def test_certificate_round_trip(tmp_path):
+    loaded = certificate(tmp_path)
+    assert loaded["mode"] == SystemMode.DT_SS
+    assert sp.simplify(loaded["barrier"] - RESULT["barrier"]) == 0
+    assert (loaded["gamma"], loaded["lambda"], loaded["c"]) == (10.0, 162.0, 0.5)
+    assert list(loaded["L_unsafe"][0]) == [9, 9]
+
+
+def test_monitor_flags_crossings_across_chunks(tmp_path):
+    monitor = SafetyMonitor(certificate(tmp_path), approach=0.5)
+    report = monitor.run(iter(TRAJECTORY), chunk_size=3)
+
+    assert report["states"] == 8 and report["chunks"] == 3 and not report["safe"]
+    assert [(event["index"], event["kind"]) for event in report["events"]] == [
+        (2, "above_gamma"), (2, "decrease_violated"), (3, "approaching_lambda"), (3, "decrease_violated"),
+        (4, "above_lambda"), (4, "entered_unsafe"), (4, "decrease_violated"), (6, "left_state_set")]
+    assert report["max_barrier"] == 180.5
+
+    # the same stream from a csv file with a time column and from a memory-mapped .npy file
+    csv = tmp_path / "states.csv"
+    np.savetxt(csv, np.column_stack([np.arange(8), TRAJECTORY]), delimiter=",", header="t,x1,x2", comments="")
+    npy = tmp_path / "states.npy"
+    np.save(npy, TRAJECTORY)
+    for source, columns in ((str(csv), [1, 2]), (str(npy), None)):
+        monitor.reset()
+        assert monitor.run(source, chunk_size=5, columns=columns)["events"] == report["events"]
+
+
+def test_monitor_keeps_bounded_events(tmp_path):
+    monitor = SafetyMonitor(certificate(tmp_path), max_events=5)
+    oscillating = np.tile([[2.0, 2.0], [9.5, 9.5]], (1000, 1))
+    report = monitor.run(oscillating, chunk_size=128)
+    assert report["counts"]["above_lambda"] == 1000 and len(report["events"]) == 5
+    assert report["states_per_second"] > 0
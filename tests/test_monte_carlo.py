@@ -0,0 +1,87 @@
+import os
+import sys
+
+import numpy as np
+import sympy as sp
+from scipy.stats import norm
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.monte_carlo import clopper_pearson, validate
+from src.functions.monte_carlo_ct_SS import monte_carlo_ct_SS
+from src.functions.monte_carlo_dt_SS import monte_carlo_dt_SS
+
+x = sp.symbols('x1:2')
+varsigma = sp.symbols('varsigma1:2')
+# random walk from 0 with the unsafe set [1, 10] and the state set [-10, 10]
+WALK = dict(dim=1, L_initial=np.array([0.0]), U_initial=np.array([0.0]), L_unsafe=np.array([[1.0]]),
+            U_unsafe=np.array([[10.0]]), L_space=np.array([-10.0]), U_space=np.array([10.0]), x=x,
+            varsigma=varsigma, f=np.array([x[0] + varsigma[0]]))
+
+
+def test_clopper_pearson():
+    low, high = clopper_pearson(0, 100)
+    assert low == 0.0 and 0.036 < high < 0.037
+    low, high = clopper_pearson(50, 100)
+    assert 0.39 < low < 0.4 and 0.6 < high < 0.61
+    assert clopper_pearson(100, 100)[1] == 1.0
+
+
+def test_random_walk_matches_exact_probability():
+    estimate = monte_carlo_dt_SS(**WALK, t=1, noise_type="normal", sigma=np.array([1.0]), trajectories=200_000,
+                                 batch_size=50_000, seed=3)
+    low, high = estimate["confidence_interval"]
+    assert low <= norm.cdf(1.0) <= high
+    assert estimate["trajectories"] == 200_000 and estimate["left_state_set"] == 0
+
+    again = monte_carlo_dt_SS(**WALK, t=1, noise_type="normal", sigma=np.array([1.0]), trajectories=200_000,
+                              batch_size=50_000, seed=3)
+    assert again["unsafe"] == estimate["unsafe"]
+
+
+def test_estimate_is_compared_with_the_certificate():
+    # uniform steps of [0, 1]: two steps reach 1 with probability 1/2
+    certificate = {"barrier": x[0] ** 2, "confidence": 0.9}
+    estimate = monte_carlo_dt_SS(**WALK, t=2, noise_type="uniform", a=np.array([0.0]), b=np.array([1.0]),
+                                 result=certificate, trajectories=20_000, seed=0)
+    assert abs(estimate["safety_probability"] - 0.5) < 0.02
+    assert estimate["certified_confidence"] == 0.9 and not estimate["consistent"]
+
+    estimate = monte_carlo_dt_SS(**WALK, t=2, noise_type="exponential", rate=np.array([10.0]),
+                                 result=dict(certificate, confidence=0.9), trajectories=20_000, seed=0)
+    assert estimate["consistent"]
+
+    # nothing to validate without a barrier
+    parameters = dict(WALK, t=2, noise_type="exponential", rate=np.array([10.0]), b_degree=2)
+    assert validate(monte_carlo_dt_SS, parameters, {"error": "Solver Exception", "b_degree": 2}) is None
+    assert validate(monte_carlo_dt_SS, parameters, certificate, trajectories=1000, seed=0)["consistent"] is not None
+
+
+def test_jump_diffusion_hitting_probabilities():
+    # Poisson jumps of size 1 at rate 0.7 from 0: the unsafe set [0.5, 10] is hit within t = 1
+    # with probability 1 - exp(-0.7)
+    jumps = dict(WALK, f=np.array([0]), delta=np.array([0]), rho=np.array([1]), p_rate=np.array([0.7]), t=1)
+    del jumps["varsigma"]
+    jumps.update(L_unsafe=np.array([[0.5]]))
+    for step in (None, 0.01):
+        estimate = monte_carlo_ct_SS(**jumps, trajectories=50_000, step=step, seed=1)
+        low, high = estimate["confidence_interval"]
+        assert low <= np.exp(-0.7) <= high
+
+    # Brownian motion reaches 1 within t = 1 with probability 2 (1 - Phi(1)); a discretely
+    # monitored path misses some crossings
+    brownian = dict(jumps, delta=np.array([1.0]), rho=np.array([0]), p_rate=np.array([0]), L_unsafe=np.array([[1.0]]))
+    estimate = monte_carlo_ct_SS(**brownian, trajectories=20_000, step=0.004, seed=2)
+    assert 0.28 < 1 - estimate["safety_probability"] < 2 * (1 - norm.cdf(1.0))
+    assert estimate["steps"] > 200
+
+
+def test_adaptive_steps_follow_the_drift():
+    # x' = 1 from [0, 0.1] always reaches [0.95, 10] before t = 1
+    drift = dict(WALK, f=np.array([1]), delta=np.array([0]), rho=np.array([0]), p_rate=np.array([0]), t=1,
+                 L_initial=np.array([0.0]), U_initial=np.array([0.1]), L_unsafe=np.array([[0.95]]))
+    del drift["varsigma"]
+    estimate = monte_carlo_ct_SS(**drift, trajectories=1000, tolerance=0.005, max_step=1, seed=0)
+    assert estimate["unsafe"] == 1000
+    # steps of 0.005 * 20 (the state set side) = 0.1 until the unsafe set
+    assert 9 <= estimate["steps"] <= 10
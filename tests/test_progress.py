@@ -0,0 +1,68 @@
+import os
+import sys
+
+import numpy as np
+import sympy as sp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ["QT_QPA_PLATFORM"] = "offscreen"
+
+from PyQt6.QtWidgets import QApplication
+
+from src.functions.ct_DS import ct_DS
+from src.functions.parallel_ct_DS import parallel_ct_DS
+from src.functions.progress import FINAL_STATES, ProgressChannel
+from src.views.barrier_tool_view import BarrierToolView
+
+x = sp.symbols('x1:3')
+PROBLEM = dict(dim=2, L_initial=np.array([0.1, 0.1]), U_initial=np.array([0.4, 0.4]),
+               L_unsafe=np.array([[0.45, 0.6]]), U_unsafe=np.array([[0.5, 0.65]]), L_space=np.array([0.1, 0.1]),
+               U_space=np.array([0.5, 0.65]), x=x,
+               f=np.array([-x[1] - 1.5 * x[0] ** 2 - 0.5 * x[0] ** 3 - 0.5, 3 * x[0] - x[1]]), solver="cvxopt")
+
+
+def test_engine_reports_its_states():
+    events = []
+    ct_DS(2, **PROBLEM, progress=events.append)
+    states = [event["state"] for event in events]
+    assert states[0] == "building" and states[-1] == "done" and "solving" in states
+    assert all(event["b_degree"] == 2 for event in events)
+    assert [event["elapsed"] for event in events] == sorted(event["elapsed"] for event in events)
+
+
+def test_parallel_reports_every_degree():
+    events = []
+    result = parallel_ct_DS(6, **PROBLEM, progress=events.append)
+
+    queued = [event for event in events if event["state"] == "queued"]
+    assert [event["b_degree"] for event in queued] == [2, 4, 6]
+    assert queued[0]["gram_size"] < queued[-1]["gram_size"]
+    last = {event["b_degree"]: event["state"] for event in events}
+    assert set(last.values()) <= set(FINAL_STATES)
+    assert last[result["b_degree"]] == "done"
+
+
+def test_closed_channel_cancels_unfinished_degrees():
+    events = []
+    channel = ProgressChannel(events.append)
+    channel.report(2, "queued")
+    channel.report(2, "done")
+    channel.report(4, "queued")
+    channel.close()
+    assert [(event["b_degree"], event["state"]) for event in events] == \
+           [(2, "queued"), (2, "done"), (4, "queued"), (4, "cancelled")]
+
+
+def test_view_shows_progress_table():
+    app = QApplication.instance() or QApplication([])
+    view = BarrierToolView()
+    view.update_progress({"b_degree": 4, "state": "queued", "gram_blocks": 10, "gram_size": 10})
+    view.update_progress({"b_degree": 2, "state": "queued", "gram_blocks": 10, "gram_size": 6})
+    view.update_progress({"b_degree": 4, "state": "solving", "phase": "constraints", "elapsed": 1.25})
+
+    table = view.progressTable
+    assert table.rowCount() == 2
+    assert [table.item(0, column).text() for column in range(5)] == ["4", "solving", "constraints", "1.2",
+                                                                     "10 (max 10)"]
+    view.clear_progress()
+    assert table.rowCount() == 0
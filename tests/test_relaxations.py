@@ -0,0 +1,42 @@
+import os
+import sys
+
+import numpy as np
+import sympy as sp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.ct_DS import ct_DS
+from src.functions.ct_SS import ct_SS
+from src.functions.prescreen import prescreened
+
+
+def test_relaxations_are_ordered_ct_SS():
+    """DSOS ⊂ SDSOS ⊂ SOS, so the optimal confidence can only improve along the chain."""
+    x = sp.symbols('x1:3')
+    params = dict(dim=2, L_initial=np.array([-0.5, -0.5]), U_initial=np.array([0.5, 0.5]),
+                  L_unsafe=np.array([[2, 2]]), U_unsafe=np.array([[3, 3]]),
+                  L_space=np.array([-3, -3]), U_space=np.array([3, 3]), x=x, f=np.array([-x[1], x[0] - x[1]]),
+                  delta=np.array([0, 0.5 * x[1]]), rho=np.array([0.1, 0]), p_rate=np.array([0.5, 0]), t=5,
+                  lam=10, optimize=True, solver="cvxopt", backend="sparse")
+
+    confidence = {relaxation: ct_SS(4, relaxation=relaxation, **params)["confidence"]
+                  for relaxation in ["dsos", "sdsos", "sos"]}
+    assert confidence["dsos"] <= confidence["sdsos"] + 1e-6 <= confidence["sos"] + 2e-6
+
+    result = prescreened(ct_SS, 4, "dsos", **params)
+    assert result["relaxation"] == "dsos" and "barrier" in result
+
+
+def test_prescreen_escalates_to_sos():
+    """The jet engine has no DSOS barrier of degree 4, so the full SOS program is solved."""
+    x = sp.symbols('x1:3')
+    f = np.array([-x[1] - 1.5 * x[0] ** 2 - 0.5 * x[0] ** 3 - 0.5, 3 * x[0] - x[1]])
+    params = dict(dim=2, L_initial=np.array([0.1, 0.1]), U_initial=np.array([0.4, 0.4]),
+                  L_unsafe=np.array([[0.45, 0.6]]), U_unsafe=np.array([[0.5, 0.65]]),
+                  L_space=np.array([0.1, 0.1]), U_space=np.array([0.5, 0.65]), x=x, f=f,
+                  solver="cvxopt", backend="sparse")
+
+    assert "error" in ct_DS(4, relaxation="dsos", **params)
+    result = prescreened(ct_DS, 4, "dsos", **params)
+    assert "barrier" in result and "relaxation" not in result
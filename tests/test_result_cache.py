@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+import sympy as sp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions import sparse_sos
+from src.functions.ct_DS import ct_DS
+from src.functions.result_cache import ResultCache, problem_key, result_cache
+
+x = sp.symbols('x1:3')
+PROBLEM = dict(dim=2, L_initial=np.array([0.1, 0.1]), U_initial=np.array([0.4, 0.4]),
+               L_unsafe=np.array([[0.45, 0.6]]), U_unsafe=np.array([[0.5, 0.65]]), L_space=np.array([0.1, 0.1]),
+               U_space=np.array([0.5, 0.65]), x=x, f=np.array([-x[1] - 1.5 * x[0] ** 2 - 0.5 * x[0] ** 3 - 0.5,
+                                                                3 * x[0] - x[1]]),
+               solver="cvxopt", backend="sparse")
+
+
+def test_key_is_canonical():
+    key = problem_key("ct_DS", dict(PROBLEM, b_degree=4))
+
+    # the same problem written differently
+    factored = np.array([-x[1] - x[0] ** 2 * (1.5 + 0.5 * x[0]) - 0.5, 3 * x[0] - x[1]])
+    assert problem_key("ct_DS", dict(PROBLEM, b_degree=4, f=factored)) == key
+    assert problem_key("ct_DS", dict(PROBLEM, b_degree=4, L_initial=[0.1, 0.1], threads=2)) == key
+
+    assert problem_key("ct_DS", dict(PROBLEM, b_degree=6)) != key
+    assert problem_key("ct_DS", dict(PROBLEM, b_degree=4, solver="mosek")) != key
+    assert problem_key("dt_DS", dict(PROBLEM, b_degree=4)) != key
+
+
+def test_engine_results_are_cached(tmp_path, monkeypatch):
+    monkeypatch.delenv("PROTECT_CACHE")
+    assert result_cache() is None
+    monkeypatch.setenv("PROTECT_CACHE", "1")
+    monkeypatch.setenv("PROTECT_CACHE_DIR", str(tmp_path))
+    solved = []
+    solve = sparse_sos.SparseSOSProgram.solve
+
+    def counting_solve(program, *args, **kwargs):
+        solved.append(program)
+        return solve(program, *args, **kwargs)
+
+    monkeypatch.setattr(sparse_sos.SparseSOSProgram, "solve", counting_solve)
+
+    result = ct_DS(4, **PROBLEM)
+    start = time.perf_counter()
+    hit = ct_DS(4, **PROBLEM)
+    assert time.perf_counter() - start < 0.5
+    assert len(solved) == 1
+    assert sp.simplify(hit["barrier"] - result["barrier"]) == 0 and hit["gamma"] == result["gamma"]
+    # the peak memory was measured by the first run, not by the cache hit
+    assert "peak_memory" in result and "cached" not in result
+    assert hit["cached"] and "peak_memory" not in hit
+
+    ct_DS(4, **PROBLEM, cache=False)
+    assert len(solved) == 2
+
+    # failures may come from the run (licence, memory, crash) and are solved again
+    failing = dict(PROBLEM, L_unsafe=np.array([[0.1, 0.1]]), U_unsafe=np.array([[0.4, 0.4]]))
+    first = ct_DS(4, **failing)
+    assert "barrier" not in first
+    ct_DS(4, **failing)
+    assert len(solved) == 4
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10 ** 9)
+    for key in "abc":
+        cache.put(key, {"barrier": key * 1000})
+        # distinct modification times on coarse-grained file systems
+        os.utime(cache._path(key), (time.time() - 10 + ord(key), time.time() - 10 + ord(key) - ord("a")))
+    assert cache.get("a") == {"barrier": "a" * 1000}
+
+    cache.max_bytes = sum(size for _, size, _ in cache.entries())
+    cache.put("d", {"barrier": "d" * 1000})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None and cache.get("d") is not None
+
+
+def test_unreadable_entries_are_misses(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put("key", {"b_degree": 2})
+    with open(cache._path("key"), "wb") as file:
+        file.write(b"truncated")
+    assert cache.get("key") is None
+    assert not os.path.exists(cache._path("key"))
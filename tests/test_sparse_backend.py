@@ -0,0 +1,42 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import sympy as sp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.ct_DS import ct_DS
+from src.functions.ct_SS import ct_SS
+
+
+def test_sparse_backend_matches_picos_ct_SS():
+    """With fixed lambda the optimal confidence does not depend on the backend."""
+    x = sp.symbols('x1:3')
+    params = dict(dim=2, L_initial=np.array([-0.5, -0.5]), U_initial=np.array([0.5, 0.5]),
+                  L_unsafe=np.array([[2, 2]]), U_unsafe=np.array([[3, 3]]),
+                  L_space=np.array([-3, -3]), U_space=np.array([3, 3]), x=x, f=np.array([-x[1], x[0] - x[1]]),
+                  delta=np.array([0, 0.5 * x[1]]), rho=np.array([0.1, 0]), p_rate=np.array([0.5, 0]), t=5,
+                  lam=10, optimize=True, solver="cvxopt")
+
+    picos = ct_SS(4, **params)
+    sparse = ct_SS(4, backend="sparse", **params)
+
+    assert "barrier" in picos and "barrier" in sparse
+    assert set(sparse) == set(picos)
+    assert sparse["confidence"] == pytest.approx(picos["confidence"], abs=1e-6)
+    assert sparse["gamma"] == pytest.approx(picos["gamma"], rel=1e-4)
+
+
+def test_sparse_backend_ct_DS_barrier():
+    """Fully free level sets are normalised and still give a valid barrier."""
+    x = sp.symbols('x1:3')
+    f = np.array([-x[1] - 1.5 * x[0] ** 2 - 0.5 * x[0] ** 3 - 0.5, 3 * x[0] - x[1]])
+    result = ct_DS(4, 2, np.array([0.1, 0.1]), np.array([0.4, 0.4]), np.array([[0.45, 0.6]]),
+                   np.array([[0.5, 0.65]]), np.array([0.1, 0.1]), np.array([0.5, 0.65]), x, f,
+                   solver="cvxopt", backend="sparse")
+
+    assert "barrier" in result
+    assert result["lambda"] - result["gamma"] >= 1 - 1e-6
+    assert result["barrier"].free_symbols <= set(x)
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# numerical libraries that must not load before the window is shown
+HEAVY_MODULES = {"sympy", "numpy", "scipy", "picos", "SumOfSquares", "cvxopt", "mosek", "pebble", "brian2"}
+# cumulative import time of main in microseconds (about 0.1 s now, 2 s with the engines imported eagerly)
+IMPORT_BUDGET = 1_000_000
+
+
+def import_times(module):
+    """Cumulative import time in microseconds of every module imported by MODULE, from python -X importtime."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                               capture_output=True, text=True, check=True)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_main_imports_no_numerical_libraries():
+    times = import_times("main")
+
+    assert not HEAVY_MODULES & set(times)
+    assert times["main"] < IMPORT_BUDGET
@@ -0,0 +1,45 @@
+import os
+import sys
+from concurrent.futures import Future
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.stopping import cancel_pending, check_stopping, policy_satisfied, select_barrier
+
+
+def test_policies():
+    barriers = {6: {"b_degree": 6, "confidence": 0.95}}
+
+    assert not policy_satisfied(None, barriers, {2, 4})
+    assert policy_satisfied("first_feasible", barriers, {2, 4})
+    assert not policy_satisfied("lowest_degree", barriers, {2, 8})
+    assert policy_satisfied("lowest_degree", barriers, {8})
+    assert not policy_satisfied("confidence", barriers, {2}, target_confidence=0.99)
+    assert policy_satisfied("confidence", barriers, {2}, target_confidence=0.9)
+    # a deterministic barrier meets any target
+    assert policy_satisfied("confidence", {4: {"b_degree": 4}}, {2}, target_confidence=0.9)
+    # without a barrier the search only ends with the last degree
+    assert policy_satisfied("first_feasible", {}, set())
+
+    with pytest.raises(ValueError):
+        check_stopping("confidence")
+    with pytest.raises(ValueError):
+        check_stopping("fastest")
+
+
+def test_selection_and_cancellation():
+    barriers = {6: {"b_degree": 6, "confidence": 0.9}, 2: {"b_degree": 2, "confidence": 0.8},
+                4: {"b_degree": 4, "confidence": 0.95}}
+    assert select_barrier("first_feasible", barriers)["b_degree"] == 6
+    assert select_barrier("lowest_degree", barriers)["b_degree"] == 2
+    assert select_barrier(None, barriers)["b_degree"] == 4
+    assert select_barrier(None, {}) is None
+
+    done, running, queued = Future(), Future(), Future()
+    done.set_result(None)
+    running.set_running_or_notify_cancel()
+    # a running concurrent.futures.Future cannot be cancelled (pebble's can)
+    assert cancel_pending({done: 2, running: 4, queued: 6}) == [6]
+    assert queued.cancelled()
@@ -0,0 +1,45 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+import sympy as sp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.ct_SS import ct_SS
+from src.functions.sweep import run_sweep, sweep_points
+
+
+def test_designs():
+    grid = sweep_points({"lam": [5, 10], "c_val": [None, 0.01, 0.1]})
+    assert len(grid) == 6 and {"lam": 10, "c_val": None} in grid
+
+    lhs = sweep_points({"lam": (0.0, 10.0), "l_degree": [2, 4]}, "lhs", samples=10, seed=0)
+    # one point per stratum of every range, and a balanced use of the choices
+    assert sorted(int(point["lam"]) for point in lhs) == list(range(10))
+    assert sum(point["l_degree"] == 2 for point in lhs) == 5
+
+    with pytest.raises(ValueError):
+        sweep_points({"lam": (0.0, 10.0)})
+    with pytest.raises(ValueError):
+        sweep_points({"rate": [1]})
+
+
+def test_sweep_streams_rows_and_reports_best(tmp_path):
+    x = sp.symbols('x1:3')
+    parameters = dict(dim=2, L_initial=np.array([-0.5, -0.5]), U_initial=np.array([0.5, 0.5]),
+                      L_unsafe=np.array([[2, 2]]), U_unsafe=np.array([[3, 3]]),
+                      L_space=np.array([-3, -3]), U_space=np.array([3, 3]), x=x, f=np.array([-x[1], x[0] - x[1]]),
+                      delta=np.array([0, 0.5 * x[1]]), rho=np.array([0.1, 0]), p_rate=np.array([0.5, 0]), t=5,
+                      optimize=True, solver="cvxopt", backend="sparse")
+    output = str(tmp_path / "sweep.jsonl")
+
+    rows, best = run_sweep(ct_SS, [2, 4], {"lam": [5, 10]}, parameters, output=output, max_workers=1)
+
+    with open(output) as file:
+        streamed = [json.loads(line) for line in file]
+    assert len(rows) == len(streamed) == 4
+    assert sorted(best) == [2, 4]
+    assert best[4]["confidence"] == max(row["confidence"] for row in streamed if row["b_degree"] == 4)
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+from concurrent.futures import TimeoutError
+
+import numpy as np
+import pytest
+import sympy as sp
+from pebble import ProcessPool
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.degree_scheduler import TIMEOUT_ERROR, DegreeScheduler, Job
+from src.functions.parallel_ct_DS import parallel_ct_DS
+from src.models.barrier_tool_model import BarrierToolModel
+from src.utils.system_mode import SystemMode
+
+x = sp.symbols('x1:3')
+PROBLEM = dict(dim=2, L_initial=np.array([0.1, 0.1]), U_initial=np.array([0.4, 0.4]),
+               L_unsafe=np.array([[0.45, 0.6]]), U_unsafe=np.array([[0.5, 0.65]]), L_space=np.array([0.1, 0.1]),
+               U_space=np.array([0.5, 0.65]), x=x,
+               f=np.array([-x[1] - 1.5 * x[0] ** 2 - 0.5 * x[0] ** 3 - 0.5, 3 * x[0] - x[1]]), solver="cvxopt")
+
+
+def test_scheduler_deadlines():
+    with ProcessPool(max_workers=2) as pool:
+        start = time.monotonic()
+        scheduler = DegreeScheduler(pool, [Job(2, time.sleep, (0.1,), {}, 0), Job(4, time.sleep, (60,), {}, 0)],
+                                    timeout=2)
+        assert [key for key, _ in scheduler.completed()] == [2]
+        assert scheduler.expired and scheduler.cancel() == [4]
+        assert time.monotonic() - start < 10
+
+        scheduler = DegreeScheduler(pool, [Job(2, time.sleep, (60,), {}, 0)], job_timeout=0.5)
+        [(_, future)] = scheduler.completed()
+        with pytest.raises(TimeoutError):
+            future.result()
+        assert not scheduler.expired
+
+
+def test_parallel_reports_timed_out_degrees():
+    start = time.monotonic()
+    for timeouts in ({"timeout": 0.01}, {"job_timeout": 0.01}):
+        result = parallel_ct_DS(4, **PROBLEM, **timeouts)
+        assert result == {"error": TIMEOUT_ERROR, "b_degree": 2, "timed_out_degrees": [2, 4]}
+    assert time.monotonic() - start < 30
+
+    result = parallel_ct_DS(4, **PROBLEM, timeout=300)
+    assert "barrier" in result and "timed_out_degrees" not in result
+
+
+def test_model_stops_sequential_computation():
+    thread = BarrierToolModel.GatewayThread(SystemMode.CT_DS, dict(PROBLEM, b_degree=10), False, timeout=0.5)
+    start = time.monotonic()
+    thread.run()
+    assert thread.retrieve_result() == {"error": TIMEOUT_ERROR, "b_degree": 10, "timed_out_degrees": [10]}
+    assert time.monotonic() - start < 30
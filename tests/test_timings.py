@@ -0,0 +1,43 @@
+import json
+import os
+import sys
+
+import numpy as np
+import sympy as sp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.ct_SS import ct_SS
+from src.functions.timings import PHASES, JsonlSink, MemorySink, PhaseTimer
+
+x = sp.symbols('x1:3')
+PROBLEM = dict(dim=2, L_initial=np.array([-0.5, -0.5]), U_initial=np.array([0.5, 0.5]),
+               L_unsafe=np.array([[2, 2]]), U_unsafe=np.array([[3, 3]]), L_space=np.array([-3, -3]),
+               U_space=np.array([3, 3]), x=x, f=np.array([-x[1], x[0] - x[1]]), delta=np.array([0, 0.5 * x[1]]),
+               rho=np.array([0.1, 0]), p_rate=np.array([0.5, 0]), t=5, solver="cvxopt")
+
+
+def test_spans_are_excluded_from_laps():
+    timer = PhaseTimer()
+    timer.account("solver_run", 0.25)
+    timer.lap("solver_compile")
+    assert timer.timings["solver_run"] == 0.25
+    assert 0 <= timer.timings["solver_compile"] < 0.25
+
+
+def test_engine_phases(tmp_path):
+    sink, path = MemorySink(), str(tmp_path / "timings.jsonl")
+    for backend in ("picos", "sparse"):
+        result = ct_SS(4, **PROBLEM, backend=backend, timings=True, timing_sink=sink)
+        phases = result["timings"]
+        assert {"sets", "multipliers", "generator", "constraints", "solver_compile", "solver_run",
+                "extraction"} <= set(phases) <= set(PHASES) | {"total"}
+        assert sum(phases[phase] for phase in PHASES if phase in phases) <= phases["total"]
+
+    assert [(record["engine"], record["b_degree"]) for record in sink.records] == [("ct_SS", 4)] * 2
+
+    ct_SS(2, **PROBLEM, backend="sparse", timing_sink=JsonlSink(path))
+    with open(path) as file:
+        assert json.loads(file.readline())["timings"]["solver_run"] > 0
+
+    assert "timings" not in ct_SS(2, **PROBLEM, backend="sparse")
@@ -0,0 +1,111 @@
+import os
+import sys
+from fractions import Fraction
+
+import numpy as np
+import pytest
+import sympy as sp
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.barrier_evaluator import PolynomialEvaluator, drift_evaluator
+from src.functions.generate_polynomial import generate_polynomial
+from src.functions.verify_barrier import (_exact_drift, bernstein_range, enclosure, interval_range, set_box,
+                                          verify_barrier)
+from src.utils.system_mode import SystemMode
+
+x = sp.symbols('x1:3')
+# 1-D linear system x' = 0.5 x with B = x^2: gamma 0.25 on [-0.5, 0.5], lambda 2.25 on [1.5, 2]
+SYSTEM = dict(dim=1, L_initial=np.array([-0.5]), U_initial=np.array([0.5]), L_unsafe=np.array([[1.5]]),
+              U_unsafe=np.array([[2.0]]), L_space=np.array([-2.0]), U_space=np.array([2.0]), x=[x[0]],
+              f=np.array([0.5 * x[0]]), max_workers=1)
+RESULT = {"barrier": x[0] ** 2, "gamma": 0.25, "lambda": 2.25}
+
+
+def exact_value(evaluator, point):
+    return sum(Fraction(float(c)) * np.prod([Fraction(float(p)) ** int(e) for p, e in zip(point, exponent)])
+               for exponent, c in zip(evaluator.exponents, evaluator.coefficients[:, 0]))
+
+
+@pytest.mark.parametrize("enclosure", [bernstein_range, interval_range])
+def test_enclosures_hold_for_exact_values(enclosure):
+    evaluator = PolynomialEvaluator.from_expr(1.5 * x[0] ** 4 - 0.3 * x[0] * x[1] ** 3 + 2 * x[1] ** 2 - x[0], x)
+    rng = np.random.default_rng(0)
+    lower = rng.uniform(-2, 1, (200, 2))
+    upper = lower + rng.uniform(0, 1, (200, 2))
+    low, high = enclosure(evaluator, lower, upper)
+
+    points = lower[:, None, :] + (upper - lower)[:, None, :] * rng.random((200, 100, 2))
+    values = evaluator(points.reshape(-1, 2)).reshape(200, 100)
+    assert (values.min(axis=1) >= low).all() and (values.max(axis=1) <= high).all()
+    for k in range(20):
+        for point in (lower[k], upper[k], points[k, 0]):
+            assert low[k] <= exact_value(evaluator, point) <= high[k]
+
+    # attained at the corners of a box: x1^2 - x2 over [1, 2] x [0, 1], and never rounded inwards
+    low, high = enclosure(PolynomialEvaluator.from_expr(x[0] ** 2 - x[1], x), [[1.0, 0.0]], [[2.0, 1.0]])
+    assert -1e-12 < low[0] <= 0.0 and 4.0 <= high[0] < 4.0 + 1e-12
+
+
+def test_high_dimensional_boxes_use_interval_arithmetic():
+    # degree 4 in 8 variables: the Bernstein tensor of a box would have 5^8 entries
+    y = sp.symbols('y1:9')
+    expr = sum(v ** 4 for v in y) - 2 * y[0] * y[1] * y[2] * y[3] + sum(v for v in y)
+    evaluator = PolynomialEvaluator.from_expr(expr, y)
+    rng = np.random.default_rng(0)
+    lower = rng.uniform(-1, 0, (50, 8))
+    upper = lower + 0.1
+    low, high = enclosure(evaluator, lower, upper)
+    assert np.array_equal(low, interval_range(evaluator, lower, upper)[0])
+    values = evaluator((lower[:, None, :] + 0.1 * rng.random((50, 100, 8))).reshape(-1, 8)).reshape(50, 100)
+    assert (values.min(axis=1) >= low).all() and (values.max(axis=1) <= high).all()
+
+
+def test_set_box_recovers_bounds():
+    lower, upper = set_box(generate_polynomial(x, [-1, 0.5], [2, 3]), x)
+    assert np.allclose(lower, [-1, 0.5]) and np.allclose(upper, [2, 3])
+
+
+def test_tight_certificate_is_verified():
+    # the decrease condition -0.75 x^2 <= 0 is tight at the origin, the initial condition at the corners
+    report = verify_barrier("discrete_deterministic", RESULT, **SYSTEM)
+    assert report["status"] == "verified"
+    assert all(condition["status"] == "verified" for condition in report["conditions"].values())
+
+    # with the origin inside a box, the decrease condition is only proven after bisections
+    shifted = dict(SYSTEM, L_space=np.array([-2.0]), U_space=np.array([1.9]), L_unsafe=np.array([[1.5]]),
+                   U_unsafe=np.array([[1.9]]))
+    report = verify_barrier("discrete_deterministic", RESULT, **shifted, pieces=1)
+    assert report["status"] == "verified" and report["conditions"]["dynamics"]["boxes"] > 10
+
+
+def test_violated_conditions_have_counterexamples():
+    report = verify_barrier("discrete_deterministic", dict(RESULT, **{"lambda": 3.0}), **SYSTEM)
+    assert report["status"] == "violated"
+    unsafe = report["conditions"]["unsafe1"]
+    assert unsafe["status"] == "violated" and unsafe["counterexamples"]
+    for counterexample in unsafe["counterexamples"]:
+        assert 1.5 <= counterexample["point"][0] <= 2.0 and 3.0 - counterexample["point"][0] ** 2 > 1e-6
+    assert report["conditions"]["initial"]["status"] == "verified"
+
+    # x' = 1.5 x increases B away from the origin
+    report = verify_barrier("discrete_deterministic", RESULT, **dict(SYSTEM, f=np.array([1.5 * x[0]])))
+    assert report["conditions"]["dynamics"]["status"] == "violated"
+
+
+def test_exact_drift_matches_drift_evaluator():
+    B = 0.5 * x[0] ** 2 + x[0] * x[1] + 0.1 * x[1] ** 4
+    f = np.array([-0.3 * x[0] + 0.1 * x[1] ** 2, 0.5 * x[1]])
+    varsigma = sp.symbols('varsigma1:3')
+    systems = [(SystemMode.CT_SS, dict(delta=np.array([[0.1, 0.0], [0.2, 0.3]]), rho=np.array([0.5 * x[0], 0.0]),
+                                        p_rate=np.array([0.2, 0.0]))),
+               (SystemMode.DT_SS, dict(varsigma=varsigma, noise_type="normal", sigma=np.array([0.1, 0.2]))),
+               (SystemMode.DT_SS, dict(varsigma=varsigma, noise_type="uniform", a=np.array([0.0, -1.0]),
+                                       b=np.array([1.0, 1.0])))]
+    for mode, noise in systems:
+        dynamics = f + np.array(varsigma) if mode == SystemMode.DT_SS else f
+        exact = _exact_drift(mode, B, x, dynamics, **noise)
+        compiled = drift_evaluator(mode, B, x, dynamics, **noise)
+        points = np.random.default_rng(0).uniform(-1, 1, (20, 2))
+        values = PolynomialEvaluator.from_polynomials([{m: float(c) for m, c in exact.items()}], 2, scalar=True)
+        assert np.allclose(values(points), compiled(points))
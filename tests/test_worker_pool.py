@@ -0,0 +1,34 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.functions.worker_pool import pool_healthy, sequential_pool, shared_pool, shutdown_pool, warm_up
+
+
+def test_pool_is_shared_and_kept_warm():
+    shutdown_pool()
+    assert not pool_healthy()
+
+    pool = shared_pool()
+    workers = set(warm_up(timeout=60))
+    assert pool_healthy()
+    assert shared_pool() is pool
+    # later jobs reuse the started workers instead of new processes
+    assert set(warm_up(timeout=60)) <= workers
+
+    shutdown_pool()
+    assert not pool.active and not pool_healthy()
+
+    # the next use starts a new pool
+    assert shared_pool() is not pool
+    assert pool_healthy(timeout=60)
+    shutdown_pool()
+
+
+def test_sequential_pool_replaces_its_worker():
+    # every job gets a fresh worker, which returns the memory of the previous one
+    first, second = (warm_up(timeout=60, sequential=True)[0] for _ in range(2))
+    assert first != second != os.getpid()
+    assert sequential_pool() is sequential_pool()
+    shutdown_pool()